@@ -0,0 +1,600 @@
+"""
+Benchmark Suite - Generation Hot Paths
+Times the report pipeline's hot paths and writes machine-readable results so
+releases can be compared on the same hardware.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --only tcfd_deck env_deck
+    python benchmark.py --llm-latency-ms 800 --llm-jitter 0.4
+    python benchmark.py --output bench/v1.2.json --compare bench/v1.1.json
+
+With --llm-latency-ms > 0 the LLM-backed paths (TCFD deck, environment deck)
+call a simulated Anthropic client that sleeps for a log-normal latency
+(median = --llm-latency-ms, sigma = --llm-jitter) and returns deterministic
+content; otherwise they run in mock / test mode.
+
+Each benchmark reports p50/p95/mean/min/max wall time over its iterations,
+plus the peak Python heap (tracemalloc) and peak RSS growth measured on one
+extra iteration.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+ENVIRONMENT_DIR = PROJECT_ROOT / "shared" / "engine" / "environment"
+for _path in (PROJECT_ROOT, ENVIRONMENT_DIR):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+SCHEMA_VERSION = 1
+DEFAULT_INDUSTRY = "Manufacturing"
+DEFAULT_EMISSION = {"scope1": 1200.0, "scope2": 3400.0, "scope3": 560.0, "total": 5160.0, "data_year": "2024"}
+
+
+# ==================== LLM latency simulator ====================
+
+class SimulatedLLMClient:
+    """
+    Stand-in for anthropic.Anthropic: messages.create() sleeps for a simulated
+    latency and returns deterministic content with usage figures
+    """
+
+    def __init__(self, latency_ms: float, jitter: float = 0.0, responder: Callable[[str], str] = None,
+                 seed: int = 0, **_client_kwargs):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.responder = responder or (lambda prompt: "Simulated response.")
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.messages = self
+        self.calls = 0
+
+    def _sample_latency(self) -> float:
+        with self._lock:
+            self.calls += 1
+            if self.jitter <= 0:
+                return self.latency_ms / 1000
+            return self.latency_ms * self._rng.lognormvariate(0, self.jitter) / 1000
+
+    def create(self, model: str, max_tokens: int, messages: List[Dict], **_kwargs):
+        time.sleep(self._sample_latency())
+        return self.respond(model, max_tokens, messages)
+
+    def respond(self, model: str, max_tokens: int, messages: List[Dict]):
+        prompt = messages[-1]["content"]
+        text = self.responder(prompt)
+        return SimpleNamespace(
+            model=model,
+            content=[SimpleNamespace(type="text", text=text)],
+            usage=SimpleNamespace(input_tokens=max(1, len(prompt) // 4),
+                                  output_tokens=min(max_tokens, max(1, len(text) // 4))),
+            stop_reason="end_turn",
+        )
+
+
+class SimulatedAsyncLLMClient:
+    """Stand-in for anthropic.AsyncAnthropic sharing a SimulatedLLMClient's latency model and counters"""
+
+    def __init__(self, client: SimulatedLLMClient):
+        self.client = client
+        self.messages = self
+
+    async def create(self, model: str, max_tokens: int, messages: List[Dict], **_kwargs):
+        await asyncio.sleep(self.client._sample_latency())
+        return self.client.respond(model, max_tokens, messages)
+
+
+@contextlib.contextmanager
+def simulated_anthropic(latency_ms: float, jitter: float, responder: Callable[[str], str], seed: int):
+    """Route every anthropic.Anthropic / AsyncAnthropic(...) construction to one SimulatedLLMClient"""
+    from shared.llm.claude_client import get_client_manager
+    client = SimulatedLLMClient(latency_ms, jitter, responder, seed)
+    # Pooled clients are cached per key: start and end with an empty pool
+    get_client_manager().reset()
+    try:
+        async_client = SimulatedAsyncLLMClient(client)
+        with mock.patch("anthropic.Anthropic", lambda *args, **kwargs: client), \
+                mock.patch("anthropic.AsyncAnthropic", lambda *args, **kwargs: async_client):
+            yield client
+    finally:
+        get_client_manager().reset()
+
+
+# ==================== Benchmark environment ====================
+
+class BenchEnv:
+    """Shared fixtures for one suite run (isolated session, work directory, LLM settings)"""
+
+    def __init__(self, llm_latency_ms: float = 0.0, llm_jitter: float = 0.0, seed: int = 0):
+        self.llm_latency_ms = llm_latency_ms
+        self.llm_jitter = llm_jitter
+        self.seed = seed
+        self.session_id = f"bench-{uuid.uuid4()}"
+        self.workdir = Path(tempfile.mkdtemp(prefix="esg_bench_"))
+        self._patches = []
+        self._tcfd_deck: Optional[Path] = None
+        self._environment_deck: Optional[Path] = None
+        self._tcfd_responses: Optional[Dict[str, str]] = None
+
+    @property
+    def use_llm(self) -> bool:
+        return self.llm_latency_ms > 0
+
+    def __enter__(self):
+        from shared.engine import output_config
+        # 所有輸出寫到同一個基準測試會話，結束時一併清理
+        patcher = mock.patch.object(output_config, "get_session_id", lambda: self.session_id)
+        patcher.start()
+        self._patches.append(patcher)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        from shared.engine import output_config, get_artifact_store
+        for patcher in reversed(self._patches):
+            patcher.stop()
+        get_artifact_store().drop_session(self.session_id)
+        shutil.rmtree(output_config.get_temp_base_dir() / self.session_id, ignore_errors=True)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        return False
+
+    def llm(self, responder: Callable[[str], str]):
+        """Simulated Anthropic client context (no-op when LLM latency is off)"""
+        if not self.use_llm:
+            return contextlib.nullcontext()
+        return simulated_anthropic(self.llm_latency_ms, self.llm_jitter, responder, self.seed)
+
+    def tcfd_responder(self, prompt: str) -> str:
+        """TCFD-shaped answer: the mock rows of the table whose prompt this is"""
+        if self._tcfd_responses is None:
+            from shared.engine.tcfd import config, content
+            from shared.engine.tcfd.main import generate_mock_data
+            self._tcfd_responses = {}
+            for page in config.TCFD_PAGES.values():
+                prompt_text = content.get_prompt(prompt_id=page['prompt_id'], industry=DEFAULT_INDUSTRY,
+                                                 revenue="100M", carbon_emission=DEFAULT_EMISSION)
+                rows = generate_mock_data(page['prompt_id'], DEFAULT_INDUSTRY, DEFAULT_EMISSION)
+                self._tcfd_responses[prompt_text] = "\n".join(rows)
+        return self._tcfd_responses.get(prompt, "N/A ||| N/A ||| N/A")
+
+    @staticmethod
+    def content_responder(prompt: str) -> str:
+        return ("Our company is committed to sustainable development and continuously improves energy "
+                "efficiency, water stewardship and waste reduction across all operations. ") * 3
+
+    def build_tcfd_deck(self) -> Path:
+        from shared.engine.tcfd.main import generate_combined_pptx
+        with self.llm(self.tcfd_responder):
+            return generate_combined_pptx(
+                industry=DEFAULT_INDUSTRY, revenue="100M", carbon_emission=DEFAULT_EMISSION,
+                llm_api_key="bench" if self.use_llm else None,
+                llm_provider="anthropic" if self.use_llm else None,
+                use_mock=not self.use_llm
+            )
+
+    def tcfd_deck(self) -> Path:
+        """TCFD deck built once per suite run (copied out of the session directory)"""
+        if self._tcfd_deck is None:
+            with _quiet(True):
+                built = self.build_tcfd_deck()
+            self._tcfd_deck = self.workdir / "TCFD_table.pptx"
+            shutil.copyfile(built, self._tcfd_deck)
+        return self._tcfd_deck
+
+    def tcfd_manifest(self):
+        from shared.engine.run_manifest import ArtifactRef, RunManifest, TCFD_DECK
+        manifest = RunManifest(run_id=self.session_id)
+        manifest.record(ArtifactRef.from_file(TCFD_DECK, self.tcfd_deck(), step="tcfd"))
+        return manifest
+
+    def build_environment_deck(self, output_path: Path, manifest=None) -> Path:
+        from environment_pptx import EnvironmentPPTXEngine
+        with self.llm(self.content_responder):
+            engine = EnvironmentPPTXEngine(
+                test_mode=not self.use_llm, industry=DEFAULT_INDUSTRY, emission_data=DEFAULT_EMISSION,
+                api_key="bench" if self.use_llm else None, manifest=manifest
+            )
+            engine.generate()
+            engine.save(str(output_path))
+        return output_path
+
+    def environment_deck(self) -> Path:
+        """Environment deck without TCFD pages, built once (input of the merge benchmark)"""
+        if self._environment_deck is None:
+            from shared.engine.run_manifest import RunManifest
+            with _quiet(True):
+                self._environment_deck = self.build_environment_deck(
+                    self.workdir / "Environment_base.pptx", manifest=RunManifest(run_id=self.session_id)
+                )
+        return self._environment_deck
+
+
+# ==================== Benchmarks ====================
+
+@dataclass
+class Benchmark:
+    """
+    One timed path
+
+    make(env) runs once before timing and returns either run() or
+    (prepare, run): prepare() builds per-iteration input outside the timed
+    region and its result is passed to run().
+    """
+    name: str
+    description: str
+    make: Callable[[BenchEnv], Any]
+    iterations: int
+    uses_llm: bool = False
+
+
+def _make_tcfd_deck(env: BenchEnv):
+    env.tcfd_deck()  # warm imports / template
+    return env.build_tcfd_deck
+
+
+def _make_tcfd_table_render(env: BenchEnv):
+    from pptx import Presentation
+    from shared.engine.tcfd import config
+    from shared.engine.tcfd.main import load_table_module, generate_mock_data
+
+    page = config.TCFD_PAGES['page_1']
+    func = getattr(load_table_module(page['script_file']), page['entry_function'])
+    data_lines = generate_mock_data(page['prompt_id'], DEFAULT_INDUSTRY, DEFAULT_EMISSION)
+    template = config.BASE_DIR / "handdrawppt.pptx"
+
+    def prepare():
+        return Presentation(str(template)) if template.exists() else Presentation()
+
+    def run(prs):
+        func(prs=prs, data_lines=data_lines)
+    return prepare, run
+
+
+def _make_env_deck(env: BenchEnv):
+    manifest = env.tcfd_manifest()
+    counter = iter(range(1_000_000))
+    return lambda: env.build_environment_deck(env.workdir / f"Environment_{next(counter)}.pptx", manifest=manifest)
+
+
+def _make_tcfd_merge(env: BenchEnv):
+    from pptx import Presentation
+    from shared.engine.path_manager import get_run_manifest
+    from shared.engine.run_manifest import ArtifactRef, TCFD_DECK
+    from shared.engine.tcfd_merger import insert_tcfd_slides
+
+    get_run_manifest().record(ArtifactRef.from_file(TCFD_DECK, env.tcfd_deck(), step="tcfd"))
+    env_bytes = env.environment_deck().read_bytes()
+
+    def prepare():
+        return Presentation(io.BytesIO(env_bytes))
+
+    def run(env_prs):
+        insert_tcfd_slides(env_prs, insert_position=5)
+    return prepare, run
+
+
+def _make_emission_chart(cached: bool):
+    def make(env: BenchEnv):
+        import emission_pptx
+        from emission_pptx import EmissionData, RenderContext, create_emission_pie_chart
+
+        cache_dir = env.workdir / "chart_cache"
+        patcher = mock.patch.object(emission_pptx, "CHART_CACHE_DIR", cache_dir)
+        patcher.start()
+        env._patches.append(patcher)
+
+        counter = iter(range(1_000_000))
+
+        def prepare():
+            # 快取基準使用固定數據；冷啟動基準每次使用不同數據以避開快取
+            offset = 0 if cached else next(counter) + 1
+            return RenderContext(emission=EmissionData.from_dict(dict(DEFAULT_EMISSION, scope1=1200.0 + offset)))
+
+        def run(ctx):
+            create_emission_pie_chart(ctx=ctx)
+
+        if cached:
+            run(prepare())
+        return prepare, run
+    return make
+
+
+def _make_carbon_batch(rows: int):
+    def make(env: BenchEnv):
+        from shared.engine.carbon.emission_calc import Inputs, estimate_batch
+        rng = random.Random(env.seed)
+        regions = ["TW", "US", "EU", "CN", "JP"]
+        inputs = [
+            Inputs(
+                region=rng.choice(regions),
+                mode=rng.choice(["quick", "detail"]),
+                monthly_bill_ntd=rng.uniform(5_000, 500_000),
+                car_count=rng.randint(0, 20),
+                motorcycles=rng.randint(0, 50),
+                gasoline_liters_year=rng.uniform(0, 50_000),
+                diesel_liters_year=rng.uniform(0, 20_000),
+                refrigerant_leak_kg=rng.uniform(0, 5),
+                include_scope3=rng.random() < 0.5,
+                water_m3_year=rng.uniform(0, 10_000),
+                waste_ton_year=rng.uniform(0, 500),
+            )
+            for _ in range(rows)
+        ]
+        return lambda: estimate_batch(inputs)
+    return make
+
+
+BENCHMARKS = [
+    Benchmark("tcfd_deck", "TCFD 7-table deck build (mock, or simulated LLM) incl. save", _make_tcfd_deck, 5, uses_llm=True),
+    Benchmark("tcfd_table_render", "Single TCFD table render (table01) onto a template deck", _make_tcfd_table_render, 20),
+    Benchmark("env_deck", "Environment chapter deck build (test mode, or simulated LLM) incl. TCFD graft and save", _make_env_deck, 5, uses_llm=True),
+    Benchmark("tcfd_merge", "tcfd_merger.insert_tcfd_slides into an environment deck", _make_tcfd_merge, 10),
+    Benchmark("emission_chart_render", "Emission pie chart PNG render (cache miss)", _make_emission_chart(cached=False), 5),
+    Benchmark("emission_chart_cached", "Emission pie chart lookup (cache hit)", _make_emission_chart(cached=True), 50),
+    Benchmark("carbon_batch_1k", "estimate_batch over 1,000 rows", _make_carbon_batch(1_000), 10),
+    Benchmark("carbon_batch_100k", "estimate_batch over 100,000 rows", _make_carbon_batch(100_000), 3),
+]
+
+
+# ==================== Runner ====================
+
+@contextlib.contextmanager
+def _quiet(enabled: bool):
+    """Silence the pipeline's console output while timing"""
+    if not enabled:
+        yield
+        return
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        yield
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _RSSSampler(threading.Thread):
+    """Samples resident memory every few milliseconds (Linux /proc only)"""
+
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.baseline = _rss_bytes()
+        self.peak = self.baseline
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            rss = _rss_bytes()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> Optional[int]:
+        self._stop_event.set()
+        self.join()
+        if self.baseline is None:
+            return None
+        return max(0, self.peak - self.baseline)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of a sorted list"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q / 100
+    lower, upper = math.floor(pos), math.ceil(pos)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def _summarize(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    mean = sum(ordered) / len(ordered)
+    variance = sum((s - mean) ** 2 for s in ordered) / len(ordered)
+    return {
+        "p50_ms": round(_percentile(ordered, 50), 3),
+        "p95_ms": round(_percentile(ordered, 95), 3),
+        "mean_ms": round(mean, 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+        "stdev_ms": round(math.sqrt(variance), 3),
+    }
+
+
+def run_benchmark(bench: Benchmark, env: BenchEnv, iterations: int, warmup: int, quiet: bool) -> Dict:
+    """Run one benchmark: setup, warm-up, timed iterations, then one memory-measured iteration"""
+    result = {"name": bench.name, "description": bench.description, "iterations": iterations,
+              "uses_llm": bench.uses_llm and env.use_llm}
+    try:
+        with _quiet(quiet):
+            made = bench.make(env)
+        prepare, run = made if isinstance(made, tuple) else (None, made)
+
+        def once() -> float:
+            arg = prepare() if prepare else None
+            start = time.perf_counter()
+            run(arg) if prepare else run()
+            return (time.perf_counter() - start) * 1000
+
+        with _quiet(quiet):
+            for _ in range(warmup):
+                once()
+            samples = [once() for _ in range(iterations)]
+
+            arg = prepare() if prepare else None
+            sampler = _RSSSampler()
+            sampler.start()
+            tracemalloc.start()
+            try:
+                run(arg) if prepare else run()
+                _, peak_heap = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                rss_growth = sampler.stop()
+
+        result.update(_summarize(samples))
+        result["peak_heap_bytes"] = peak_heap
+        result["peak_rss_growth_bytes"] = rss_growth
+        result["samples_ms"] = [round(s, 3) for s in samples]
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _package_versions() -> Dict[str, Optional[str]]:
+    from importlib import metadata
+    versions = {}
+    for name in ("python-pptx", "lxml", "matplotlib", "anthropic", "streamlit"):
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def run_suite(names: Optional[List[str]] = None, llm_latency_ms: float = 0.0, llm_jitter: float = 0.0,
+              iteration_scale: float = 1.0, warmup: int = 1, seed: int = 0, quiet: bool = True) -> Dict:
+    """
+    Run the selected benchmarks (all by default)
+
+    Returns:
+        Report dict (schema_version, environment metadata, config, results)
+    """
+    selected = [b for b in BENCHMARKS if not names or b.name in names]
+    unknown = set(names or []) - {b.name for b in BENCHMARKS}
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    results = []
+    started = time.perf_counter()
+    with BenchEnv(llm_latency_ms=llm_latency_ms, llm_jitter=llm_jitter, seed=seed) as env:
+        for bench in selected:
+            iterations = max(1, round(bench.iterations * iteration_scale))
+            print(f"▶ {bench.name} ({iterations} iterations)...", flush=True)
+            result = run_benchmark(bench, env, iterations, warmup, quiet)
+            results.append(result)
+            if "error" in result:
+                print(f"  ❌ {result['error']}")
+            else:
+                print(f"  p50 {result['p50_ms']:.1f} ms | p95 {result['p95_ms']:.1f} ms | "
+                      f"peak heap {result['peak_heap_bytes'] / 1e6:.1f} MB")
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "packages": _package_versions(),
+        },
+        "config": {
+            "llm_latency_ms": llm_latency_ms,
+            "llm_jitter": llm_jitter,
+            "iteration_scale": iteration_scale,
+            "warmup": warmup,
+            "seed": seed,
+        },
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "results": results,
+    }
+
+
+def compare_reports(current: Dict, baseline: Dict) -> List[str]:
+    """Per-benchmark p50/p95 change vs a baseline report (positive = slower)"""
+    previous = {r["name"]: r for r in baseline.get("results", []) if "error" not in r}
+    lines = []
+    for result in current["results"]:
+        before = previous.get(result["name"])
+        if "error" in result or before is None:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms"):
+            if before[key]:
+                deltas.append(f"{key[:3]} {(result[key] - before[key]) / before[key] * 100:+.1f}%")
+        lines.append(f"  {result['name']:<24} {' | '.join(deltas)}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='ESG Report Generation System - Benchmarks',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Benchmarks:\n" + "\n".join(f"  {b.name:<24} {b.description}" for b in BENCHMARKS)
+    )
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Run only these benchmarks')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0,
+                        help='Median simulated LLM latency; 0 runs the LLM paths in mock/test mode')
+    parser.add_argument('--llm-jitter', type=float, default=0.0,
+                        help='Log-normal sigma of the simulated latency (0 = constant)')
+    parser.add_argument('--iterations-scale', type=float, default=1.0,
+                        help='Multiply every benchmark\'s default iteration count')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed warm-up iterations per benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for generated inputs and latency sampling')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='Result file (JSON)')
+    parser.add_argument('--compare', type=str, help='Baseline result file to compare against')
+    parser.add_argument('--verbose', action='store_true', help='Show pipeline output while timing')
+    args = parser.parse_args()
+
+    try:
+        report = run_suite(
+            names=args.only, llm_latency_ms=args.llm_latency_ms, llm_jitter=args.llm_jitter,
+            iteration_scale=args.iterations_scale, warmup=args.warmup, seed=args.seed, quiet=not args.verbose
+        )
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Results saved to: {output_path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} ({baseline.get('git_commit') or 'unknown commit'}):")
+        if baseline.get("config") != report["config"]:
+            print(f"  ⚠ Baseline used a different config: {baseline.get('config')}")
+        print("\n".join(compare_reports(report, baseline)) or "  (no common benchmarks)")
+
+    return 1 if any("error" in r for r in report["results"]) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
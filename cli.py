@@ -8,8 +8,11 @@ Usage:
 import argparse
 import json
 import sys
+import uuid
 from pathlib import Path
-from shared.engine import ReportEngine
+from shared.engine import ReportEngine, UsageLedger, get_artifact_store
+from shared.llm.hedging import get_hedge_policy
+from shared.llm.routing import get_router
 
 
 def main():
@@ -29,6 +32,9 @@ Examples:
   
   # Save output to file
   python cli.py --mode mock --module all --output report.json
+  
+  # Export the per-call LLM usage ledger (.csv, .jsonl or .json)
+  python cli.py --mode production --module all --usage-output usage.csv
         """
     )
     
@@ -58,6 +64,12 @@ Examples:
         help='Input JSON file path. If not specified, use default input data'
     )
     
+    parser.add_argument(
+        '--usage-output',
+        type=str,
+        help='Export the LLM usage ledger (tokens, latency, retries per call) to .csv, .jsonl or .json'
+    )
+    
     args = parser.parse_args()
     
     # Initialize engine
@@ -86,8 +98,13 @@ Examples:
     print(f"Module(s): {args.module}")
     print("-" * 50)
     
+    # 本次執行的產出物存放在 artifact store 的獨立會話中，結束時統一清理
+    session_id = f"cli-{uuid.uuid4()}"
+    
+    ledger = UsageLedger()
+    
     try:
-        results = engine.generate_all(input_data, modules)
+        results = engine.generate_all(input_data, modules, session_id=session_id, ledger=ledger)
         
         # Format output
         output = {
@@ -95,9 +112,13 @@ Examples:
             "modules": list(results.keys()),
             "results": results,
             "metadata": {
-                "input_data": input_data
+                "input_data": input_data,
+                "usage": ledger.summary(),
+                "routing": get_router().metrics()
             }
         }
+        if get_hedge_policy() is not None:
+            output["metadata"]["hedging"] = get_hedge_policy().metrics()
         
         # Output results
         if args.output:
@@ -118,6 +139,10 @@ Examples:
             else:
                 pages_count = len(result.get('pages', []))
                 print(f"  ✅ {module_name}: SUCCESS - {pages_count} pages generated")
+        print(f"  LLM usage: {ledger.format_summary()}")
+        
+        if args.usage_output:
+            print(f"  Usage ledger exported to: {ledger.export(args.usage_output)}")
         
         return 0
         
@@ -126,6 +151,8 @@ Examples:
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        get_artifact_store().drop_session(session_id)
 
 
 if __name__ == '__main__':
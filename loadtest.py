@@ -0,0 +1,426 @@
+"""
+Load Test Harness - server.py
+Drives the API with open-loop (Poisson) arrivals at one or more rates and
+reports per-endpoint latency histograms, percentiles, error rates and
+throughput, so the sustainable request rate of one instance can be tracked
+across releases.
+
+Usage:
+    # Start server.py + mock LLM backend in-process, step through arrival rates
+    python loadtest.py --rates 1 2 5 10 --duration 30
+
+    # Against a running server (started with ANTHROPIC_BASE_URL pointing at mock_server.py)
+    python loadtest.py --url http://127.0.0.1:8000 --rates 5
+
+    # Module / mode mix, SLO and comparison with a previous run
+    python loadtest.py --module-mix environment=0.5,company=0.3,governance=0.1,all=0.1 \\
+        --mode-mix mock=0.9,production=0.1 --slo-ms 2000 --output lt/new.json --compare lt/old.json
+
+Each arrival runs one user flow:
+    POST /api/generate → GET /api/sessions/{id}/artifacts → DELETE /api/sessions/{id}
+while GET /api/health is probed once per second to measure responsiveness
+under load.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+SCHEMA_VERSION = 1
+
+# 延遲直方圖桶上界（毫秒），最後一桶為 +inf
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+# ==================== Metrics ====================
+
+class EndpointStats:
+    """Latency samples, histogram and status counts for one endpoint"""
+
+    def __init__(self):
+        self.samples_ms: List[float] = []
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self.status_counts: Dict[str, int] = {}
+        self.errors = 0
+
+    def record(self, elapsed_ms: float, status: str, ok: bool):
+        self.samples_ms.append(elapsed_ms)
+        index = next((i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if elapsed_ms <= bound),
+                     len(HISTOGRAM_BUCKETS_MS))
+        self.histogram[index] += 1
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, duration_s: float) -> Dict:
+        ordered = sorted(self.samples_ms)
+        count = len(ordered)
+        result = {
+            "count": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / duration_s, 3) if duration_s else 0.0,
+            "status_counts": self.status_counts,
+            "histogram": {
+                **{f"le_{bound}ms": n for bound, n in zip(HISTOGRAM_BUCKETS_MS, self.histogram)},
+                "gt_max": self.histogram[-1],
+            },
+        }
+        if count:
+            result.update({
+                "p50_ms": round(_percentile(ordered, 50), 2),
+                "p90_ms": round(_percentile(ordered, 90), 2),
+                "p95_ms": round(_percentile(ordered, 95), 2),
+                "p99_ms": round(_percentile(ordered, 99), 2),
+                "max_ms": round(ordered[-1], 2),
+                "mean_ms": round(sum(ordered) / count, 2),
+            })
+        return result
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q / 100
+    lower, upper = math.floor(pos), math.ceil(pos)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """'environment=0.5,company=0.5' → normalized [(name, weight)]"""
+    items = []
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition("=")
+        if not name:
+            continue
+        items.append((name, float(weight) if weight else 1.0))
+    total = sum(w for _, w in items)
+    if not items or total <= 0:
+        raise ValueError(f"Invalid mix: '{spec}'")
+    return [(name, w / total) for name, w in items]
+
+
+def _pick(rng: random.Random, mix: List[Tuple[str, float]]) -> str:
+    roll, acc = rng.random(), 0.0
+    for name, weight in mix:
+        acc += weight
+        if roll < acc:
+            return name
+    return mix[-1][0]
+
+
+# ==================== Load generator ====================
+
+class LoadTest:
+    """Open-loop load generator for one server base URL"""
+
+    def __init__(self, base_url: str, module_mix: List[Tuple[str, float]], mode_mix: List[Tuple[str, float]],
+                 timeout_s: float = 120.0, seed: int = 0, max_in_flight: int = 1000):
+        self.base_url = base_url.rstrip("/")
+        self.module_mix = module_mix
+        self.mode_mix = mode_mix
+        self.timeout_s = timeout_s
+        self.max_in_flight = max_in_flight
+        self._rng = random.Random(seed)
+
+    async def _timed(self, client: httpx.AsyncClient, stats: Dict[str, EndpointStats], labels: Tuple[str, ...],
+                     method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """Send one request and record it under every label"""
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status, ok = str(response.status_code), response.status_code < 400
+        except httpx.TimeoutException:
+            response, status, ok = None, "timeout", False
+        except httpx.HTTPError as e:
+            response, status, ok = None, type(e).__name__, False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for label in labels:
+            stats.setdefault(label, EndpointStats()).record(elapsed_ms, status, ok)
+        return response
+
+    async def _user_flow(self, client: httpx.AsyncClient, stats: Dict[str, EndpointStats], module: str, mode: str):
+        session_id = f"load-{uuid.uuid4()}"
+        # generate 延遲同時記錄總計與依模組 / 模式細分
+        response = await self._timed(
+            client, stats, ("POST /api/generate", f"POST /api/generate [{module}/{mode}]"), "POST", "/api/generate",
+            json={"module": module, "mode": mode, "session_id": session_id,
+                  "input_data": {"company_name": "Load Test Co", "year": "2025"}}
+        )
+        if response is None or response.status_code >= 400:
+            return
+        await self._timed(client, stats, ("GET /api/sessions/{id}/artifacts",), "GET",
+                          f"/api/sessions/{session_id}/artifacts")
+        await self._timed(client, stats, ("DELETE /api/sessions/{id}",), "DELETE", f"/api/sessions/{session_id}")
+
+    async def _probe(self, client: httpx.AsyncClient, stats: Dict[str, EndpointStats], stop: asyncio.Event):
+        while not stop.is_set():
+            await self._timed(client, stats, ("GET /api/health",), "GET", "/api/health")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_stage(self, rate: float, duration_s: float) -> Dict:
+        """Poisson arrivals at `rate` per second for `duration_s`; waits for in-flight flows to finish"""
+        stats: Dict[str, EndpointStats] = {}
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=100)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout_s, limits=limits) as client:
+            stop = asyncio.Event()
+            probe = asyncio.create_task(self._probe(client, stats, stop))
+            tasks, dropped = [], 0
+            in_flight = lambda: sum(1 for t in tasks if not t.done())
+
+            start = time.perf_counter()
+            next_arrival = start
+            while True:
+                next_arrival += self._rng.expovariate(rate)
+                if next_arrival - start >= duration_s:
+                    break
+                await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+                if in_flight() >= self.max_in_flight:
+                    dropped += 1  # 客戶端併發上限：記為丟棄，不阻塞到達時程
+                    continue
+                module, mode = _pick(self._rng, self.module_mix), _pick(self._rng, self.mode_mix)
+                tasks.append(asyncio.create_task(self._user_flow(client, stats, module, mode)))
+            sent_window = time.perf_counter() - start
+
+            if tasks:
+                await asyncio.gather(*tasks)
+            stop.set()
+            await probe
+            elapsed = time.perf_counter() - start
+
+        generate = stats.get("POST /api/generate", EndpointStats())
+        return {
+            "target_rate_rps": rate,
+            "duration_s": round(sent_window, 3),
+            "drain_s": round(elapsed - sent_window, 3),
+            "flows_started": len(tasks),
+            "flows_dropped": dropped,
+            "achieved_rate_rps": round(len(generate.samples_ms) / elapsed, 3) if elapsed else 0.0,
+            "endpoints": {label: s.summary(elapsed) for label, s in sorted(stats.items())},
+        }
+
+
+# ==================== In-process target ====================
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class InProcessTarget:
+    """server.py app on a uvicorn thread, backed by an in-process mock LLM server"""
+
+    def __init__(self, mock_config=None):
+        self.mock_config = mock_config
+        self.mock = None
+        self._server = None
+        self._thread = None
+        self._saved_env: Dict[str, Optional[str]] = {}
+
+    def __enter__(self) -> str:
+        import uvicorn
+        from mock_server import MockLLMServer
+
+        self.mock = MockLLMServer(self.mock_config).start()
+        # server.py 內建立的 anthropic client 讀取環境變數，指向 mock 後端
+        for key, value in (("ANTHROPIC_BASE_URL", self.mock.base_url),
+                           ("ANTHROPIC_API_KEY", os.environ.get("ANTHROPIC_API_KEY") or "mock-key")):
+            self._saved_env[key] = os.environ.get(key)
+            os.environ[key] = value
+
+        from server import app
+        # server.py 在 Streamlit 之外執行，略過 "missing ScriptRunContext" 警告
+        logging.getLogger("streamlit").setLevel(logging.ERROR)
+        port = _free_port()
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, name="loadtest-server", daemon=True)
+        self._thread.start()
+        deadline = time.time() + 30
+        while not self._server.started:
+            if time.time() > deadline or not self._thread.is_alive():
+                raise RuntimeError("server.py failed to start")
+            time.sleep(0.05)
+        return f"http://127.0.0.1:{port}"
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=30)
+        if self.mock is not None:
+            self.mock.stop()
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        return False
+
+
+# ==================== Report ====================
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=Path(__file__).resolve().parent,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def max_sustained_rate(stages: List[Dict], slo_ms: float, max_error_rate: float) -> Optional[float]:
+    """Highest target rate whose generate p95 and error rate stay within the SLO (None if none do)"""
+    sustained = None
+    for stage in stages:
+        generate = stage["endpoints"].get("POST /api/generate")
+        if not generate or not generate.get("count"):
+            continue
+        ok = (generate["p95_ms"] <= slo_ms and generate["error_rate"] <= max_error_rate
+              and stage["flows_dropped"] == 0)
+        stage["within_slo"] = ok
+        if ok:
+            sustained = max(sustained or 0, stage["target_rate_rps"])
+    return sustained
+
+
+def compare_reports(current: Dict, baseline: Dict) -> List[str]:
+    """Per-stage / endpoint p95 and error-rate change vs a baseline report"""
+    previous = {stage["target_rate_rps"]: stage for stage in baseline.get("stages", [])}
+    lines = []
+    for stage in current["stages"]:
+        before = previous.get(stage["target_rate_rps"])
+        if before is None:
+            continue
+        for label, now in stage["endpoints"].items():
+            then = before["endpoints"].get(label)
+            if not then or not then.get("p95_ms") or not now.get("p95_ms"):
+                continue
+            delta = (now["p95_ms"] - then["p95_ms"]) / then["p95_ms"] * 100
+            lines.append(f"  {stage['target_rate_rps']:>6g} rps  {label:<48} p95 {delta:+7.1f}%  "
+                         f"errors {then['error_rate']:.2%} → {now['error_rate']:.2%}")
+    return lines
+
+
+def print_stage(stage: Dict):
+    print(f"  achieved {stage['achieved_rate_rps']:.2f} rps | flows {stage['flows_started']} "
+          f"(dropped {stage['flows_dropped']}) | drain {stage['drain_s']:.1f}s")
+    for label, s in stage["endpoints"].items():
+        if "[" in label or not s["count"]:
+            continue
+        print(f"    {label:<36} n={s['count']:<6} p50 {s['p50_ms']:>8.1f} ms  p95 {s['p95_ms']:>8.1f} ms  "
+              f"p99 {s['p99_ms']:>8.1f} ms  err {s['error_rate']:.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='ESG Report Generation System - Load test for server.py',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("Usage:", 1)[1]
+    )
+    parser.add_argument('--url', type=str, help='Target server base URL (default: start server.py in-process)')
+    parser.add_argument('--rates', type=float, nargs='+', default=[1.0, 2.0, 5.0],
+                        help='Arrival rates (user flows per second), one stage each')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of arrivals per stage')
+    parser.add_argument('--module-mix', default='environment=0.4,company=0.3,governance=0.2,all=0.1',
+                        help='Module weights, e.g. environment=0.5,company=0.5')
+    parser.add_argument('--mode-mix', default='mock=0.8,production=0.2',
+                        help='Mode weights, e.g. mock=0.9,production=0.1')
+    parser.add_argument('--slo-ms', type=float, default=2000.0, help='p95 latency SLO for POST /api/generate')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='Error-rate SLO for POST /api/generate')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Per-request timeout (seconds)')
+    parser.add_argument('--max-in-flight', type=int, default=1000, help='Client-side concurrent flow limit')
+    parser.add_argument('--mock-ttft-ms', type=float, default=300.0, help='In-process mock LLM time to first token')
+    parser.add_argument('--mock-tokens-per-second', type=float, default=80.0, help='In-process mock LLM token rate')
+    parser.add_argument('--mock-rate-429', type=float, default=0.0, help='In-process mock LLM 429 probability')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for arrivals and mixes')
+    parser.add_argument('--output', type=str, default='loadtest_results.json', help='Report file (JSON)')
+    parser.add_argument('--compare', type=str, help='Baseline report to compare against')
+    args = parser.parse_args()
+
+    try:
+        module_mix, mode_mix = parse_mix(args.module_mix), parse_mix(args.mode_mix)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    target = None
+    if args.url:
+        base_url = args.url
+    else:
+        from mock_server import MockLLMConfig
+        target = InProcessTarget(MockLLMConfig(
+            ttft_ms=args.mock_ttft_ms, tokens_per_second=args.mock_tokens_per_second,
+            rate_limit_rate=args.mock_rate_429, seed=args.seed
+        ))
+        base_url = target.__enter__()
+        print(f"Started server.py at {base_url} (mock LLM at {target.mock.base_url})")
+
+    stages = []
+    try:
+        load = LoadTest(base_url, module_mix, mode_mix, timeout_s=args.timeout, seed=args.seed,
+                        max_in_flight=args.max_in_flight)
+        for rate in args.rates:
+            print(f"\n▶ Stage {rate:g} flows/s for {args.duration:g}s...", flush=True)
+            stage = asyncio.run(load.run_stage(rate, args.duration))
+            stages.append(stage)
+            print_stage(stage)
+    finally:
+        mock_stats = target.mock.stats if target is not None else None
+        if target is not None:
+            target.__exit__(None, None, None)
+
+    report = {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()},
+        "config": {
+            "target": args.url or "in-process",
+            "rates": args.rates,
+            "duration_s": args.duration,
+            "module_mix": dict(module_mix),
+            "mode_mix": dict(mode_mix),
+            "slo_ms": args.slo_ms,
+            "max_error_rate": args.max_error_rate,
+            "seed": args.seed,
+        },
+        "stages": stages,
+        "max_sustained_rate_rps": max_sustained_rate(stages, args.slo_ms, args.max_error_rate),
+        "mock_llm_stats": mock_stats,
+    }
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nMax sustained rate within SLO (p95 ≤ {args.slo_ms:g} ms, errors ≤ {args.max_error_rate:.0%}): "
+          f"{report['max_sustained_rate_rps']}")
+    print(f"✅ Report saved to: {output_path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} ({baseline.get('git_commit') or 'unknown commit'}):")
+        print("\n".join(compare_reports(report, baseline)) or "  (no common stages)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
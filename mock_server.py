@@ -0,0 +1,488 @@
+"""
+Mock LLM Server - Anthropic Messages API stand-in
+Local HTTP server that speaks the Anthropic Messages API (including SSE
+streaming) for load, retry and concurrency testing without real API calls.
+
+Usage:
+    # Standalone (for load tests against server.py)
+    python mock_server.py --port 8090 --ttft-ms 400 --tokens-per-second 60 --rate-429 0.05
+    export ANTHROPIC_BASE_URL=http://127.0.0.1:8090
+
+    # In-process (tests / benchmarks)
+    with MockLLMServer(MockLLMConfig(ttft_ms=50)) as server, server.environ():
+        ...  # every anthropic.Anthropic() created here talks to the mock
+
+Responses are deterministic per prompt:
+    - TCFD table prompts ("|||" format) get the requested number of
+      "Category;detail ||| impact ||| action" lines
+    - "Write N-M words ..." prompts (ContentEngine) get prose of that length
+    - anything else gets a short paragraph
+
+Endpoints:
+    POST /v1/messages         Messages API (stream=true → SSE events)
+    GET  /v1/models           Configured models
+    GET  /_mock/stats         Request / fault counters
+    POST /_mock/reset         Reset counters
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# 預設接受的模型（各引擎使用的模型與 TCFD 備選列表）；其他模型回傳 404 not_found_error
+DEFAULT_MODELS = (
+    "claude-opus-4-20250514",
+    "claude-sonnet-4-20250514",
+    "claude-3-5-haiku-20241022",
+    "claude-3-5-sonnet-20241022",
+    "claude-3-5-sonnet-20240620",
+    "claude-3-opus-20240229",
+    "claude-3-sonnet-20240229",
+    "claude-3-haiku-20240307",
+)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+_VOCABULARY = (
+    "we", "our company", "emissions", "renewable energy", "climate risk", "supply chain", "efficiency",
+    "water stewardship", "carbon pricing", "governance", "targets", "transition", "resilience",
+    "investment", "monitoring", "disclosure", "stakeholders", "reduction", "circular economy",
+    "compliance", "innovation", "scope 2", "energy management", "low-carbon products", "training",
+)
+
+
+@dataclass
+class MockLLMConfig:
+    """
+    Mock server behaviour
+
+    Latency of one response = time to first token (sampled from the
+    distribution) + output tokens / tokens_per_second.
+    """
+    ttft_ms: float = 300.0                 # median / mean time to first token
+    latency_distribution: str = "lognormal"
+    latency_spread: float = 0.3            # lognormal sigma, or ± fraction for uniform
+    tokens_per_second: float = 80.0        # output token rate (0 = no generation delay)
+    rate_limit_rate: float = 0.0           # probability of 429 rate_limit_error
+    overload_rate: float = 0.0             # probability of 529 overloaded_error
+    retry_after_s: float = 1.0             # retry-after header on 429
+    models: Optional[Tuple[str, ...]] = DEFAULT_MODELS  # None = accept any model
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {LATENCY_DISTRIBUTIONS}")
+
+
+# ==================== Deterministic responses ====================
+
+def _rng_for(prompt: str) -> random.Random:
+    return random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_VOCABULARY) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _prose(rng: random.Random, words: int) -> str:
+    sentences, remaining = [], words
+    while remaining > 0:
+        n = min(remaining, rng.randint(8, 16))
+        sentences.append(_sentence(rng, n))
+        remaining -= n
+    return " ".join(sentences)
+
+
+def _tcfd_response(prompt: str, rng: random.Random) -> str:
+    """'|||'-separated table lines, one per requested line"""
+    count_match = re.search(r"Output exactly (\d+) lines", prompt)
+    count = int(count_match.group(1)) if count_match else 2
+    labels = dict(re.findall(r"^Line (\d+):\s*([^-(\n]+)", prompt, flags=re.MULTILINE))
+    lines = []
+    for i in range(1, count + 1):
+        label = labels.get(str(i), f"Item {i}").strip()
+        lines.append(
+            f"{label};{_prose(rng, 30)} ||| Financial Impact: ${rng.randint(100, 900)}K-{rng.randint(1, 3)}M annually. "
+            f"{_prose(rng, 15)} ||| Mitigation: {_prose(rng, 20)} Budget: ${rng.randint(100, 900)}K"
+        )
+    return "\n".join(lines)
+
+
+def generate_response(prompt: str) -> str:
+    """Deterministic TCFD / ContentEngine-shaped text for a prompt"""
+    rng = _rng_for(prompt)
+    if "|||" in prompt:
+        return _tcfd_response(prompt, rng)
+    words_match = re.search(r"(\d+)\s*-\s*(\d+)\s*words", prompt)
+    if words_match:
+        low, high = int(words_match.group(1)), int(words_match.group(2))
+        return _prose(rng, (low + high) // 2)
+    return _prose(rng, 40)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _prompt_text(messages: List[Dict]) -> str:
+    """Concatenated text of the request messages (string or content-block form)"""
+    parts = []
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+    return "\n".join(parts)
+
+
+# ==================== Server ====================
+
+class _MockState:
+    """Config, seeded RNG and counters shared by all handler threads"""
+
+    def __init__(self, config: MockLLMConfig):
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stats = {"requests": 0, "streams": 0, "ok": 0, "rate_limited": 0, "overloaded": 0,
+                          "not_found": 0, "bad_request": 0, "input_tokens": 0, "output_tokens": 0,
+                          "in_flight": 0, "max_in_flight": 0}
+
+    def count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+            if key == "in_flight":
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.stats)
+
+    def sample_ttft(self) -> float:
+        """Seconds to first token"""
+        cfg = self.config
+        with self._lock:
+            if cfg.latency_distribution == "fixed":
+                ms = cfg.ttft_ms
+            elif cfg.latency_distribution == "uniform":
+                ms = cfg.ttft_ms * self._rng.uniform(1 - cfg.latency_spread, 1 + cfg.latency_spread)
+            elif cfg.latency_distribution == "exponential":
+                ms = self._rng.expovariate(1 / cfg.ttft_ms) if cfg.ttft_ms > 0 else 0
+            else:
+                ms = cfg.ttft_ms * self._rng.lognormvariate(0, cfg.latency_spread)
+        return max(0.0, ms) / 1000
+
+    def sample_fault(self) -> Optional[str]:
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.config.rate_limit_rate:
+            return "rate_limit_error"
+        if roll < self.config.rate_limit_rate + self.config.overload_rate:
+            return "overloaded_error"
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockAnthropic/1.0"
+    # Headers and body are separate writes: without TCP_NODELAY a kept-alive
+    # connection stalls on delayed ACKs
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self) -> _MockState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ---- helpers ----
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.send_header("request-id", f"req_mock_{uuid.uuid4().hex[:20]}")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status: int, error_type: str, message: str, headers: Optional[Dict[str, str]] = None):
+        self._send_json(status, {"type": "error", "error": {"type": error_type, "message": message}}, headers)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_event(self, event: str, data: Dict):
+        self._write_chunk(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+
+    # ---- routes ----
+
+    def do_GET(self):
+        if self.path.startswith("/v1/models"):
+            models = self.state.config.models or ()
+            self._send_json(200, {"data": [{"type": "model", "id": m, "display_name": m} for m in models],
+                                  "has_more": False, "first_id": None, "last_id": None})
+        elif self.path == "/_mock/stats":
+            self._send_json(200, self.state.snapshot())
+        else:
+            self._send_error(404, "not_found_error", f"Not found: {self.path}")
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.path == "/_mock/reset":
+            self.state.reset()
+            self._send_json(200, {"ok": True})
+            return
+        if not self.path.startswith("/v1/messages"):
+            self._send_error(404, "not_found_error", f"Not found: {self.path}")
+            return
+
+        state = self.state
+        state.count("requests")
+        try:
+            request = json.loads(raw or b"{}")
+            model = request["model"]
+            max_tokens = int(request["max_tokens"])
+            messages = request["messages"]
+        except (ValueError, KeyError, TypeError) as e:
+            state.count("bad_request")
+            self._send_error(400, "invalid_request_error", f"Invalid request: {e}")
+            return
+
+        if state.config.models is not None and model not in state.config.models:
+            state.count("not_found")
+            self._send_error(404, "not_found_error", f"model: {model}")
+            return
+
+        fault = state.sample_fault()
+        if fault == "rate_limit_error":
+            state.count("rate_limited")
+            self._send_error(429, fault, "Number of request tokens has exceeded your per-minute rate limit",
+                             headers={"retry-after": f"{state.config.retry_after_s:g}"})
+            return
+        if fault == "overloaded_error":
+            state.count("overloaded")
+            self._send_error(529, fault, "Overloaded")
+            return
+
+        prompt = _prompt_text(messages)
+        text = generate_response(prompt)
+        stop_reason = "end_turn"
+        if estimate_tokens(text) > max_tokens:
+            text = text[:max_tokens * 4]
+            stop_reason = "max_tokens"
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        state.count("input_tokens", input_tokens)
+        state.count("output_tokens", output_tokens)
+
+        message = {
+            "id": f"msg_mock_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": 0},
+        }
+
+        state.count("in_flight")
+        try:
+            time.sleep(state.sample_ttft())
+            if request.get("stream"):
+                state.count("streams")
+                self._stream(message, text, stop_reason, output_tokens)
+            else:
+                rate = state.config.tokens_per_second
+                if rate > 0:
+                    time.sleep(output_tokens / rate)
+                message.update(content=[{"type": "text", "text": text}], stop_reason=stop_reason)
+                message["usage"]["output_tokens"] = output_tokens
+                self._send_json(200, message)
+            state.count("ok")
+        finally:
+            state.count("in_flight", -1)
+
+    def _stream(self, message: Dict, text: str, stop_reason: str, output_tokens: int):
+        """Anthropic SSE event sequence, paced at the configured token rate"""
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("cache-control", "no-cache")
+        self.send_header("transfer-encoding", "chunked")
+        self.send_header("request-id", f"req_mock_{uuid.uuid4().hex[:20]}")
+        self.end_headers()
+
+        self._send_event("message_start", {"type": "message_start", "message": dict(message, usage={
+            "input_tokens": message["usage"]["input_tokens"], "output_tokens": 1})})
+        self._send_event("content_block_start", {"type": "content_block_start", "index": 0,
+                                                 "content_block": {"type": "text", "text": ""}})
+        self._send_event("ping", {"type": "ping"})
+
+        rate = self.state.config.tokens_per_second
+        words = re.findall(r"\S+\s*", text)
+        for i in range(0, len(words), 4):
+            piece = "".join(words[i:i + 4])
+            if rate > 0:
+                time.sleep(estimate_tokens(piece) / rate)
+            self._send_event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                     "delta": {"type": "text_delta", "text": piece}})
+
+        self._send_event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._send_event("message_delta", {"type": "message_delta",
+                                           "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                                           "usage": {"output_tokens": output_tokens}})
+        self._send_event("message_stop", {"type": "message_stop"})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class MockLLMServer:
+    """
+    Anthropic-compatible mock server on a background thread
+
+    Usage:
+        with MockLLMServer(MockLLMConfig(ttft_ms=100, rate_limit_rate=0.1)) as server:
+            client = anthropic.Anthropic(api_key="test", base_url=server.base_url)
+    """
+
+    def __init__(self, config: Optional[MockLLMConfig] = None, host: str = "127.0.0.1", port: int = 0,
+                 verbose: bool = False):
+        """
+        Args:
+            config: Latency / fault behaviour
+            host: Bind address
+            port: Bind port (0 = pick a free port)
+            verbose: Log every request to stderr
+        """
+        self.config = config or MockLLMConfig()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.state = _MockState(self.config)
+        self._httpd.verbose = verbose
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> Dict:
+        return self._httpd.state.snapshot()
+
+    def reset_stats(self):
+        self._httpd.state.reset()
+
+    def start(self) -> "MockLLMServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm-server", daemon=True)
+            self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    @contextlib.contextmanager
+    def environ(self):
+        """Point anthropic clients created inside the block at this server (ANTHROPIC_BASE_URL)"""
+        previous = os.environ.get("ANTHROPIC_BASE_URL")
+        os.environ["ANTHROPIC_BASE_URL"] = self.base_url
+        try:
+            yield self
+        finally:
+            if previous is None:
+                os.environ.pop("ANTHROPIC_BASE_URL", None)
+            else:
+                os.environ["ANTHROPIC_BASE_URL"] = previous
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='ESG Report Generation System - Mock Anthropic API server',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Fast deterministic backend
+  python mock_server.py --port 8090 --ttft-ms 50 --tokens-per-second 0
+
+  # Realistic latency with 5% rate limiting and 1% overload
+  python mock_server.py --ttft-ms 600 --latency lognormal --spread 0.5 --rate-429 0.05 --rate-529 0.01
+
+  # Point the engines / server.py at it
+  ANTHROPIC_BASE_URL=http://127.0.0.1:8090 python server.py
+        """
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address')
+    parser.add_argument('--port', type=int, default=8090, help='Bind port')
+    parser.add_argument('--ttft-ms', type=float, default=300.0, help='Median / mean time to first token (ms)')
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='lognormal', help='Latency distribution')
+    parser.add_argument('--spread', type=float, default=0.3, help='Lognormal sigma, or ± fraction for uniform')
+    parser.add_argument('--tokens-per-second', type=float, default=80.0, help='Output token rate (0 = instant)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Probability of a 429 rate_limit_error')
+    parser.add_argument('--rate-529', type=float, default=0.0, help='Probability of a 529 overloaded_error')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='retry-after seconds sent with 429')
+    parser.add_argument('--models', nargs='+', help='Accepted model ids (others get 404 not_found_error)')
+    parser.add_argument('--any-model', action='store_true', help='Accept every model id')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for latency / fault sampling')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    config = MockLLMConfig(
+        ttft_ms=args.ttft_ms, latency_distribution=args.latency, latency_spread=args.spread,
+        tokens_per_second=args.tokens_per_second, rate_limit_rate=args.rate_429, overload_rate=args.rate_529,
+        retry_after_s=args.retry_after, models=None if args.any_model else tuple(args.models or DEFAULT_MODELS),
+        seed=args.seed
+    )
+    server = MockLLMServer(config, host=args.host, port=args.port, verbose=args.verbose)
+    print(f"Mock Anthropic API listening on {server.base_url}")
+    print(f"  export ANTHROPIC_BASE_URL={server.base_url}")
+    print(f"  config: {json.dumps(asdict(config))}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\nStats: {json.dumps(server.stats)}")
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,6 +14,8 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from shared.ui.sidebar_config import render_sidebar_config
+from shared.engine.path_manager import acquire_section_report, get_full_report_output_path, register_report, update_session_activity
+from shared.engine.report_merger import SECTION_ORDER, merge_report
 
 st.set_page_config(
     page_title=PAGE_TITLE,
@@ -31,16 +33,17 @@ st.divider()
 # Prerequisites
 st.subheader("Ready to Merge")
 
-col1, col2, col3 = st.columns(3)
+SECTION_LABELS = {'company': "Company", 'environment': "Environment", 'governance': "Governance"}
+section_handles = {step: acquire_section_report(step) for step in SECTION_ORDER}
 
-with col1:
-    st.success("✅ Company")
-    
-with col2:
-    st.success("✅ Environment")
-    
-with col3:
-    st.success("✅ Governance")
+for col, step in zip(st.columns(len(SECTION_ORDER)), SECTION_ORDER):
+    with col:
+        if section_handles[step] is not None:
+            st.success(f"✅ {SECTION_LABELS[step]}")
+        else:
+            st.warning(f"⚠️ {SECTION_LABELS[step]} (not generated)")
+
+available_sections = [(step, handle) for step, handle in section_handles.items() if handle is not None]
 
 st.divider()
 
@@ -54,38 +57,57 @@ Company → Environment → Governance & Social
 This will create a complete ESG report.
 """)
 
-if st.button("Merge Reports", type="primary", use_container_width=True):
+if st.button("Merge Reports", type="primary", use_container_width=True, disabled=not available_sections):
     with st.spinner("Merging reports..."):
-        progress = st.progress(0)
-        
-        st.info("Merging Company section...")
-        progress.progress(0.33)
-        
-        st.info("Merging Environment section...")
-        progress.progress(0.66)
-        
-        st.info("Merging Governance section...")
-        progress.progress(1.0)
-        
-        st.success("✅ Complete report merged successfully")
-        st.session_state.merge_done = True
+        try:
+            summary = merge_report(
+                [(step, handle.open()) for step, handle in available_sections],
+                get_full_report_output_path()
+            )
+            register_report('full_report', summary["output_path"])
+            update_session_activity()
+            st.session_state["merge_summary"] = summary
+            st.session_state.merge_done = True
+            st.success(f"✅ Complete report merged successfully ({summary['elapsed']:.1f}s)")
+        except Exception as e:
+            st.error(f"❌ Merge failed: {e}")
+
+for _, handle in available_sections:
+    handle.release()
 
 st.divider()
 
 # Statistics
-if st.session_state.get("merge_done"):
+summary = st.session_state.get("merge_summary")
+if st.session_state.get("merge_done") and summary:
     st.subheader("Report Statistics")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Pages", "53")
+        st.metric("Total Pages", summary["total_slides"])
         
     with col2:
-        st.metric("Sections", "3")
+        st.metric("Sections", len(summary["sections"]))
         
     with col3:
-        st.metric("Status", "✅ Complete")
+        st.metric("File Size", f"{summary['file_size'] / 1024 / 1024:.1f} MB")
+        
+    with col4:
+        st.metric("Media Reused", summary["media_reused"])
+    
+    st.caption(" · ".join(f"{SECTION_LABELS.get(name, name)}: {count} pages" for name, count in summary["sections"]))
+    
+    full_report = acquire_section_report('full_report')
+    if full_report is not None:
+        with full_report:
+            st.download_button(
+                "Download Complete Report",
+                data=full_report.read_bytes(),
+                file_name=full_report.info.name,
+                mime=full_report.info.media_type,
+                use_container_width=True
+            )
 
 st.divider()
 
@@ -6,13 +6,24 @@ Usage:
     # API docs at http://localhost:8000/docs
 """
 import argparse
+import json
 import os
-from typing import Dict, Any, Optional, List
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+import re
+import uuid
+from email.utils import formatdate
+from typing import Dict, Any, Optional, List, Tuple
+from urllib.parse import quote
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
-from shared.engine import ReportEngine
+from shared.engine import (
+    ReportEngine, UsageLedger, ArtifactQuotaError, InvalidSessionIdError, get_artifact_store, validate_session_id
+)
+from shared.engine.session_cleanup import get_session_reaper
+from shared.llm.hedging import get_hedge_policy
+from shared.llm.routing import get_router
+from shared.llm.circuit_breaker import all_breakers
 
 
 app = FastAPI(
@@ -27,6 +38,7 @@ class GenerateRequest(BaseModel):
     module: str  # environment, company, governance, or "all"
     mode: Optional[str] = "mock"  # mock, llm-test, production
     input_data: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None  # artifact session; a new one is created when omitted
 
 
 class GenerateResponse(BaseModel):
@@ -36,6 +48,8 @@ class GenerateResponse(BaseModel):
     module: str
     result: Dict[str, Any]
     message: Optional[str] = None
+    session_id: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None  # LLM usage summary (totals, by_module / by_table / by_page)
 
 
 @app.get("/")
@@ -48,6 +62,8 @@ async def root():
             "generate": "/api/generate",
             "modules": "/api/modules",
             "health": "/api/health",
+            "artifacts": "/api/sessions/{session_id}/artifacts",
+            "llm_metrics": "/api/metrics/llm",
             "docs": "/docs"
         }
     }
@@ -59,6 +75,17 @@ async def health_check():
     return {"status": "healthy", "service": "ESG Report API"}
 
 
+@app.get("/api/metrics/llm")
+async def llm_metrics():
+    """LLM metrics: request hedging, model routing (quality-retry rate per tier) and circuit breaker states"""
+    policy = get_hedge_policy()
+    return {
+        "hedging": policy.metrics() if policy is not None else None,
+        "routing": get_router().metrics(),
+        "circuit_breakers": all_breakers()
+    }
+
+
 @app.get("/api/modules")
 async def get_modules():
     """Get available modules"""
@@ -105,8 +132,15 @@ async def generate_report(request: GenerateRequest):
                 )
             modules = [request.module]
         
-        # Generate reports
-        results = engine.generate_all(input_data, modules)
+        # Generate reports (results are kept as artifacts of the session)
+        session_id = _require_session_id(request.session_id) if request.session_id else str(uuid.uuid4())
+        ledger = UsageLedger()
+        results = await engine.generate_all_async(input_data, modules, session_id=session_id, ledger=ledger)
+        get_session_reaper().touch(session_id)
+        
+        # Full per-call ledger is kept as a session artifact for export
+        usage = ledger.to_dict()
+        get_artifact_store().put(session_id, "usage.json", json.dumps(usage, ensure_ascii=False).encode("utf-8"))
         
         # Format response
         if request.module == "all":
@@ -115,7 +149,9 @@ async def generate_report(request: GenerateRequest):
                 mode=request.mode,
                 module="all",
                 result=results,
-                message=f"Generated reports for {len(results)} module(s)"
+                message=f"Generated reports for {len(results)} module(s)",
+                session_id=session_id,
+                usage=usage["summary"]
             )
         else:
             if request.module in results and "error" in results[request.module]:
@@ -129,11 +165,15 @@ async def generate_report(request: GenerateRequest):
                 mode=request.mode,
                 module=request.module,
                 result=results.get(request.module, {}),
-                message="Report generated successfully"
+                message="Report generated successfully",
+                session_id=session_id,
+                usage=usage["summary"]
             )
             
     except HTTPException:
         raise
+    except ArtifactQuotaError as e:
+        raise HTTPException(status_code=507, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -151,6 +191,146 @@ async def generate_module_get(module: str, mode: str = "mock"):
     return await generate_report(request)
 
 
+def _require_session_id(session_id: str) -> str:
+    """Client-supplied session id, or 400 when it is not a safe directory name"""
+    try:
+        return validate_session_id(session_id)
+    except InvalidSessionIdError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/sessions/{session_id}/artifacts")
+async def list_artifacts(session_id: str):
+    """List the artifacts stored for a session"""
+    artifacts = get_artifact_store().list(_require_session_id(session_id))
+    return {
+        "session_id": session_id,
+        "artifacts": [
+            {**info.to_dict(), "url": f"/api/sessions/{session_id}/artifacts/{quote(info.name)}"}
+            for info in artifacts
+        ]
+    }
+
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, "*" matches any)"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) of a single "bytes=" range, inclusive
+
+    Returns None for headers that are ignored (multiple ranges, other units);
+    raises ValueError when the range cannot be satisfied.
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        raise ValueError(header)
+    if not first:
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if size == 0 or start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class _ArtifactResponse(StreamingResponse):
+    """
+    Streams a byte range of an artifact and releases its handle when the response ends
+
+    The release lives in __call__ rather than in the body iterator, so it also runs
+    when the client disconnects before the body is iterated at all.
+    """
+
+    def __init__(self, handle, start: int, end: int, **kwargs):
+        super().__init__(handle.iter_bytes(start, end), **kwargs)
+        self.handle = handle
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.handle.release()
+
+
+@app.api_route("/api/sessions/{session_id}/artifacts/{name}", methods=["GET", "HEAD"])
+def download_artifact(session_id: str, name: str, request: Request):
+    """
+    Download an artifact (PPTX deck, module JSON, usage ledger)
+
+    Streams the bytes in chunks. Supports single-range requests (206 / 416) and
+    strong ETags (content SHA-256): If-None-Match returns 304, If-Range falls back
+    to the full content when the artifact changed.
+    """
+    store = get_artifact_store()
+    handle = store.acquire(_require_session_id(session_id), name)
+    if handle is None:
+        raise HTTPException(status_code=404, detail=f"Artifact not found: {session_id}/{name}")
+    get_session_reaper().touch(session_id)
+
+    info = handle.info
+    headers = {
+        "ETag": info.etag,
+        "Last-Modified": formatdate(info.created_at, usegmt=True),
+        "Cache-Control": "private, no-cache",
+        "Accept-Ranges": "bytes",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), info.etag):
+        handle.release()
+        return Response(status_code=304, headers=headers)
+
+    start, end, status = 0, info.size - 1, 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == info.etag):
+        try:
+            byte_range = _parse_range(range_header, info.size)
+        except ValueError:
+            handle.release()
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{info.size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(name)}"
+    if request.method == "HEAD" or info.size == 0:
+        handle.release()
+        return Response(status_code=status, headers=headers, media_type=info.media_type)
+
+    return _ArtifactResponse(handle, start, end, status_code=status, headers=headers, media_type=info.media_type)
+
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Release a session's artifacts (memory and disk)"""
+    _require_session_id(session_id)
+    get_artifact_store().drop_session(session_id)
+    get_session_reaper().forget(session_id)
+    return {"session_id": session_id, "deleted": True}
+
+
+@app.on_event("shutdown")
+def close_artifact_store():
+    """Deterministic cleanup of all artifacts on shutdown"""
+    get_session_reaper().stop()
+    get_artifact_store().close()
+
+
 def main():
     parser = argparse.ArgumentParser(description='ESG Report Generation API Server')
     parser.add_argument(
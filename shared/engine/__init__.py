@@ -1 +1,16 @@
 """Engine 核心模組"""
+from .report_engine import ReportEngine
+from .artifact_store import (
+    ArtifactStore, ArtifactHandle, ArtifactInfo, ArtifactQuotaError, InvalidSessionIdError,
+    get_artifact_store, validate_session_id
+)
+from .run_manifest import ArtifactRef, RunManifest
+from .usage_ledger import UsageLedger, UsageRecord
+
+__all__ = [
+    'ReportEngine',
+    'ArtifactStore', 'ArtifactHandle', 'ArtifactInfo', 'ArtifactQuotaError', 'InvalidSessionIdError',
+    'get_artifact_store', 'validate_session_id',
+    'ArtifactRef', 'RunManifest',
+    'UsageLedger', 'UsageRecord',
+]
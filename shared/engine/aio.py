@@ -0,0 +1,89 @@
+"""
+Async LLM Runtime
+非同步生成路徑的共用設施：
+- llm_semaphore(): 每個 event loop 一個 semaphore，限制同時進行中的 LLM 呼叫數
+- run_sync(): 同步 API 的薄包裝，在背景 event loop 上執行 coroutine（保留呼叫端的
+  contextvars：usage ledger 標籤、tracing span）
+
+Configuration:
+    ESG_LLM_MAX_CONCURRENCY=64       # in-flight LLM calls per event loop
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import threading
+import weakref
+from typing import Any, Awaitable, Optional
+
+MAX_CONCURRENCY = int(os.getenv("ESG_LLM_MAX_CONCURRENCY", "64"))
+
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def llm_semaphore() -> asyncio.Semaphore:
+    """Semaphore shared by every LLM call on the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return semaphore
+
+
+class _LoopThread:
+    """Long-lived event loop on a daemon thread (keeps pooled async clients warm)"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="llm-event-loop", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+
+_loop_thread: Optional[_LoopThread] = None
+_loop_lock = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop used by the sync wrappers"""
+    global _loop_thread
+    if _loop_thread is None:
+        with _loop_lock:
+            if _loop_thread is None:
+                _loop_thread = _LoopThread()
+    return _loop_thread.loop
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine from synchronous code and return its result
+
+    The coroutine runs on the background loop inside a copy of the caller's
+    context. Safe to call from threads that have their own running loop (FastAPI
+    handlers, Streamlit); must not be called from a coroutine on the background loop.
+    """
+    loop = background_loop()
+    if threading.current_thread() is _loop_thread.thread:
+        coro.close()
+        raise RuntimeError("run_sync() called on the LLM event loop; await the coroutine instead")
+
+    ctx = contextvars.copy_context()
+    result: concurrent.futures.Future = concurrent.futures.Future()
+
+    def transfer(task: asyncio.Task):
+        if task.cancelled():
+            result.cancel()
+        elif task.exception() is not None:
+            result.set_exception(task.exception())
+        else:
+            result.set_result(task.result())
+
+    def start():
+        task = ctx.run(loop.create_task, coro)
+        task.add_done_callback(transfer)
+
+    loop.call_soon_threadsafe(start)
+    return result.result()
@@ -0,0 +1,467 @@
+"""
+Artifact Store
+會話產出物（PPTX / JSON）的統一存放：記憶體優先、全域預算、LRU 溢寫到磁碟
+
+    - 每個產出物以 (session_id, name) 識別，name 使用 OUTPUT_FILENAMES 的標準檔名
+    - 所有會話共用一個記憶體預算；超出時最久未使用的產出物溢寫到
+      {temp}/sustainability_reports/{session_id}/{name}（即原本的會話目錄）
+    - 每個會話有容量上限（超出時拋出 ArtifactQuotaError）
+    - session_id 必須是安全的目錄名稱（SESSION_ID_PATTERN），會話目錄必定位於根目錄之內
+    - 讀取透過引用計數的 ArtifactHandle；drop_session() 會立即刪除未被持有的產出物，
+      仍被持有者在最後一個 handle 釋放時刪除（不再留下臨時檔案）
+
+Usage:
+    store = get_artifact_store()
+    store.put(session_id, "TCFD_table.pptx", data)
+    with store.acquire(session_id, "TCFD_table.pptx") as handle:
+        prs = Presentation(handle.open())
+"""
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from .output_config import USE_TEMP_DIR, SESSIONS_DIR, get_temp_base_dir
+
+MB = 1024 * 1024
+
+# 全域記憶體預算與每會話容量上限（可用環境變數覆寫）
+ARTIFACT_MEMORY_BUDGET = int(os.getenv("ARTIFACT_MEMORY_BUDGET_MB", "256")) * MB
+ARTIFACT_SESSION_QUOTA = int(os.getenv("ARTIFACT_SESSION_QUOTA_MB", "100")) * MB
+
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+_MEDIA_TYPES = {".pptx": PPTX_MEDIA_TYPE, ".json": "application/json"}
+_CHUNK_SIZE = 1024 * 1024
+
+
+# Session ids become directory names under the store root
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ArtifactQuotaError(Exception):
+    """A session exceeded its artifact quota"""
+
+
+class InvalidSessionIdError(ValueError):
+    """A session id that is not a safe directory name"""
+
+
+def validate_session_id(session_id: str) -> str:
+    """
+    Return session_id if it matches SESSION_ID_PATTERN
+
+    Raises:
+        InvalidSessionIdError: Empty, too long, or contains path characters
+    """
+    if not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id):
+        raise InvalidSessionIdError(f"Invalid session id: {session_id!r}")
+    return session_id
+
+
+def contained_session_dir(root: Path, session_id: str) -> Path:
+    """
+    Directory of a session, guaranteed to be a direct child of root
+
+    Raises:
+        InvalidSessionIdError: Invalid id, or the path resolves outside root
+    """
+    path = Path(root) / validate_session_id(session_id)
+    if path.resolve().parent != Path(root).resolve():
+        raise InvalidSessionIdError(f"Session directory escapes {root}: {session_id!r}")
+    return path
+
+
+def guess_media_type(name: str) -> str:
+    """Media type from the artifact file name"""
+    suffix = Path(name).suffix.lower()
+    return _MEDIA_TYPES.get(suffix) or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+@dataclass(frozen=True)
+class ArtifactInfo:
+    """Immutable description of a stored artifact"""
+    session_id: str
+    name: str
+    media_type: str
+    size: int
+    sha256: str
+    created_at: float
+
+    @property
+    def artifact_id(self) -> str:
+        return f"{self.session_id}/{self.name}"
+
+    @property
+    def etag(self) -> str:
+        """Strong HTTP entity tag (content hash)"""
+        return f'"{self.sha256}"'
+
+    def to_dict(self) -> Dict:
+        return {"artifact_id": self.artifact_id, **asdict(self)}
+
+
+class _Entry:
+    __slots__ = ("info", "data", "path", "refs", "doomed")
+
+    def __init__(self, info: ArtifactInfo, data: Optional[bytes], path: Optional[Path]):
+        self.info = info
+        self.data = data      # 記憶體中的內容（已溢寫則為 None）
+        self.path = path      # 磁碟上的檔案（尚未寫出則為 None）
+        self.refs = 0
+        self.doomed = False
+
+
+class ArtifactHandle:
+    """
+    Reference-counted read access to one artifact
+
+    The artifact is not deleted while a handle is held. Release explicitly or
+    use the handle as a context manager.
+    """
+
+    def __init__(self, store: "ArtifactStore", entry: _Entry):
+        self._store = store
+        self._entry = entry
+        self.info = entry.info
+        self._released = False
+
+    def read_bytes(self) -> bytes:
+        """Whole artifact content"""
+        data, path = self._store._locate(self._entry)
+        if data is not None:
+            return data
+        return path.read_bytes()
+
+    def open(self) -> BinaryIO:
+        """Binary stream over the artifact (memory or disk)"""
+        data, path = self._store._locate(self._entry)
+        if data is not None:
+            return io.BytesIO(data)
+        return open(path, "rb")
+
+    def iter_bytes(self, start: int = 0, end: Optional[int] = None, chunk_size: int = _CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Yield the byte range [start, end] (inclusive; end=None = to the last byte) in chunks
+
+        In-memory artifacts are sliced without copying the whole content; spilled
+        ones are read from disk chunk by chunk.
+        """
+        end = self.info.size - 1 if end is None else min(end, self.info.size - 1)
+        data, path = self._store._locate(self._entry)
+        if data is not None:
+            view = memoryview(data)
+            for offset in range(start, end + 1, chunk_size):
+                yield bytes(view[offset:min(offset + chunk_size, end + 1)])
+            return
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def path(self) -> Path:
+        """Path of the artifact on disk (writes it out if it only lives in memory)"""
+        return self._store._materialize(self._entry)
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._store._release(self._entry)
+
+    def __enter__(self) -> "ArtifactHandle":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def __del__(self):
+        # 保險：未釋放的 handle 被回收時仍會釋放引用
+        try:
+            self.release()
+        except Exception:
+            pass
+
+
+class ArtifactStore:
+    """Process-wide artifact store with a shared memory budget and per-session quotas"""
+
+    def __init__(
+        self,
+        root: Optional[Union[str, Path]] = None,
+        memory_budget: int = ARTIFACT_MEMORY_BUDGET,
+        session_quota: int = ARTIFACT_SESSION_QUOTA
+    ):
+        """
+        Args:
+            root: Spill directory root (default: the session output root)
+            memory_budget: Bytes kept in memory across all sessions
+            session_quota: Maximum bytes per session
+        """
+        self._root = Path(root) if root else None
+        self.memory_budget = memory_budget
+        self.session_quota = session_quota
+
+        self._lock = threading.RLock()
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._lru: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()  # 只含記憶體中的產出物
+        self._memory_used = 0
+        self._session_bytes: Dict[str, int] = {}
+        self._doomed = set()  # 已刪除但仍被 handle 持有的產出物
+        self.stats = {"puts": 0, "hits_memory": 0, "hits_disk": 0, "spills": 0, "deleted": 0}
+
+    @property
+    def root(self) -> Path:
+        if self._root is None:
+            self._root = get_temp_base_dir() if USE_TEMP_DIR else SESSIONS_DIR
+        return self._root
+
+    def session_dir(self, session_id: str) -> Path:
+        """Session directory under the store root (InvalidSessionIdError if it would escape it)"""
+        return contained_session_dir(self.root, session_id)
+
+    # ---- 寫入 ----
+
+    def put(self, session_id: str, name: str, data: bytes, media_type: Optional[str] = None) -> ArtifactInfo:
+        """
+        Store artifact bytes (replaces an existing artifact with the same name)
+
+        Raises:
+            ArtifactQuotaError: The session would exceed its quota
+            InvalidSessionIdError: session_id is not a safe directory name
+        """
+        validate_session_id(session_id)
+        data = bytes(data)
+        info = ArtifactInfo(
+            session_id=session_id, name=name,
+            media_type=media_type or guess_media_type(name),
+            size=len(data), sha256=hashlib.sha256(data).hexdigest(), created_at=time.time()
+        )
+        with self._lock:
+            self._check_quota(session_id, name, info.size)
+            self._remove(session_id, name, delete_file=True)
+            entry = _Entry(info, data, None)
+            self._add(entry)
+            if info.size > self.memory_budget:
+                self._spill(entry)
+            else:
+                self._lru[(session_id, name)] = entry
+                self._memory_used += info.size
+                self._enforce_budget()
+            self.stats["puts"] += 1
+        return info
+
+    def put_file(
+        self,
+        session_id: str,
+        name: str,
+        path: Union[str, Path],
+        media_type: Optional[str] = None,
+        move: bool = False
+    ) -> ArtifactInfo:
+        """
+        Register an artifact that already exists on disk (not loaded into memory)
+
+        A file already at its store location is adopted in place; otherwise it is
+        copied (or moved when `move=True`) into the session directory.
+        """
+        path = Path(path)
+        target = self.session_dir(session_id) / name
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                h.update(chunk)
+        info = ArtifactInfo(
+            session_id=session_id, name=name,
+            media_type=media_type or guess_media_type(name),
+            size=path.stat().st_size, sha256=h.hexdigest(), created_at=time.time()
+        )
+        with self._lock:
+            self._check_quota(session_id, name, info.size)
+            in_place = path.resolve() == target.resolve()
+            self._remove(session_id, name, delete_file=not in_place)
+            if not in_place:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if move:
+                    os.replace(path, target)
+                else:
+                    shutil.copyfile(path, target)
+            self._add(_Entry(info, None, target))
+            self.stats["puts"] += 1
+        return info
+
+    # ---- 讀取 ----
+
+    def acquire(self, session_id: str, name: str) -> Optional[ArtifactHandle]:
+        """Reference-counted handle to an artifact (None if absent)"""
+        with self._lock:
+            entry = self._entries.get((session_id, name))
+            if entry is None:
+                return None
+            entry.refs += 1
+            return ArtifactHandle(self, entry)
+
+    def info(self, session_id: str, name: str) -> Optional[ArtifactInfo]:
+        with self._lock:
+            entry = self._entries.get((session_id, name))
+            return entry.info if entry is not None else None
+
+    def list(self, session_id: str) -> List[ArtifactInfo]:
+        with self._lock:
+            return [e.info for (sid, _), e in self._entries.items() if sid == session_id]
+
+    def usage(self) -> Dict:
+        """Memory / per-session usage snapshot"""
+        with self._lock:
+            return {
+                "memory_used": self._memory_used,
+                "memory_budget": self.memory_budget,
+                "artifacts": len(self._entries),
+                "sessions": dict(self._session_bytes),
+                **self.stats
+            }
+
+    # ---- 清理 ----
+
+    def delete(self, session_id: str, name: str):
+        with self._lock:
+            self._remove(session_id, name, delete_file=True)
+
+    def drop_session(self, session_id: str):
+        """Delete every artifact of a session and its directory (held artifacts go on release)"""
+        session_dir = self.session_dir(session_id)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == session_id]:
+                self._remove(*key, delete_file=True)
+            self._session_bytes.pop(session_id, None)
+            if not self._has_files(session_id):
+                shutil.rmtree(session_dir, ignore_errors=True)
+
+    def close(self):
+        """Drop all sessions (process shutdown)"""
+        with self._lock:
+            for session_id in {k[0] for k in self._entries}:
+                self.drop_session(session_id)
+
+    # ---- 內部 ----
+
+    def _check_quota(self, session_id: str, name: str, size: int):
+        current = self._session_bytes.get(session_id, 0)
+        existing = self._entries.get((session_id, name))
+        if existing is not None:
+            current -= existing.info.size
+        if current + size > self.session_quota:
+            raise ArtifactQuotaError(
+                f"Session {session_id} artifact quota exceeded: "
+                f"{(current + size) / MB:.1f} MB > {self.session_quota / MB:.0f} MB"
+            )
+
+    def _add(self, entry: _Entry):
+        info = entry.info
+        self._entries[(info.session_id, info.name)] = entry
+        self._session_bytes[info.session_id] = self._session_bytes.get(info.session_id, 0) + info.size
+
+    def _remove(self, session_id: str, name: str, delete_file: bool):
+        entry = self._entries.pop((session_id, name), None)
+        if entry is None:
+            return
+        self._session_bytes[session_id] = self._session_bytes.get(session_id, 0) - entry.info.size
+        if self._lru.pop((session_id, name), None) is not None:
+            self._memory_used -= entry.info.size
+        if not delete_file:
+            entry.path = None
+        if entry.refs > 0:
+            # 仍被持有：保留內容，最後一個 handle 釋放時刪除
+            entry.doomed = True
+            self._doomed.add(entry)
+            return
+        self._discard(entry)
+
+    def _release(self, entry: _Entry):
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs > 0 or not entry.doomed:
+                return
+            self._doomed.discard(entry)
+            self._discard(entry)
+            session_id = entry.info.session_id
+            if session_id not in self._session_bytes and not self._has_files(session_id):
+                shutil.rmtree(self.session_dir(session_id), ignore_errors=True)
+
+    def _discard(self, entry: _Entry):
+        """Free a removed entry's memory and file (unless a newer artifact now owns the path)"""
+        entry.data = None
+        live = self._entries.get((entry.info.session_id, entry.info.name))
+        if entry.path is not None and not (live is not None and live.path == entry.path):
+            try:
+                entry.path.unlink(missing_ok=True)
+            except OSError as e:
+                print(f"Warning: Failed to delete artifact {entry.path}: {e}")
+        self.stats["deleted"] += 1
+
+    def _has_files(self, session_id: str) -> bool:
+        return any(k[0] == session_id for k in self._entries) or \
+            any(e.info.session_id == session_id for e in self._doomed)
+
+    def _locate(self, entry: _Entry) -> Tuple[Optional[bytes], Optional[Path]]:
+        with self._lock:
+            key = (entry.info.session_id, entry.info.name)
+            if entry.data is not None:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                self.stats["hits_memory"] += 1
+                return entry.data, None
+            self.stats["hits_disk"] += 1
+            return None, entry.path
+
+    def _materialize(self, entry: _Entry) -> Path:
+        with self._lock:
+            if entry.path is None:
+                entry.path = self._write(entry)
+            return entry.path
+
+    def _write(self, entry: _Entry) -> Path:
+        target = self.session_dir(entry.info.session_id) / entry.info.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(entry.data)
+        os.replace(tmp, target)
+        return target
+
+    def _spill(self, entry: _Entry):
+        """Move an in-memory artifact to disk"""
+        if entry.path is None:
+            entry.path = self._write(entry)
+        entry.data = None
+        self.stats["spills"] += 1
+
+    def _enforce_budget(self):
+        while self._memory_used > self.memory_budget and self._lru:
+            _, entry = self._lru.popitem(last=False)
+            self._memory_used -= entry.info.size
+            self._spill(entry)
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Process-wide artifact store shared by pages, CLI and server"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArtifactStore()
+    return _store
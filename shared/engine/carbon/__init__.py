@@ -4,20 +4,32 @@ Carbon Emission Calculation Module
 from .emission_calc import (
     Inputs,
     estimate,
+    estimate_batch,
+    resolve_factors,
     GRID_EMISSION_FACTORS,
     REGION_ELECTRICITY_PRICES,
     quick_estimate_from_monthly_bill,
     detailed_estimate
 )
+from .factor_registry import EmissionFactor, EmissionFactorRegistry, get_registry
+from .scenarios import Scenario, DEFAULT_SCENARIOS, project_scenarios, scenario_targets
 from .calculator_component import render_calculator
 
 __all__ = [
     'Inputs',
     'estimate',
+    'estimate_batch',
+    'resolve_factors',
     'GRID_EMISSION_FACTORS',
     'REGION_ELECTRICITY_PRICES',
+    'EmissionFactor',
+    'EmissionFactorRegistry',
+    'get_registry',
+    'Scenario',
+    'DEFAULT_SCENARIOS',
+    'project_scenarios',
+    'scenario_targets',
     'quick_estimate_from_monthly_bill',
     'detailed_estimate',
     'render_calculator'
 ]
-
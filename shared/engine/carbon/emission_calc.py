@@ -10,60 +10,36 @@ Version: 1.0 (English)
 """
 
 from dataclasses import dataclass
-from typing import Optional, Literal
+from typing import Dict, List, Literal, Optional, Tuple
+
+from .factor_registry import (
+    EmissionFactorRegistry,
+    get_registry,
+    GRID_ELECTRICITY,
+    GASOLINE,
+    DIESEL,
+    WATER,
+    WASTE
+)
 
 # === Regional Emission Factors ===
-GRID_EMISSION_FACTORS = {
-    "TW": 0.495,   # Taiwan (2024)
-    "US": 0.386,   # United States (average 2024)
-    "EU": 0.295,   # European Union (average 2024)
-    "CN": 0.581,   # China (2024)
-    "JP": 0.441,   # Japan (2024)
-}
+# Loaded once from the versioned factor data file (see factor_registry.py).
+# Kept as flat dicts/constants for UI components and backward compatibility.
+_REGISTRY = get_registry()
+GRID_EMISSION_FACTORS = _REGISTRY.grid_factors_by_region()
 
 # === Regional Electricity Prices (for estimation) ===
-REGION_ELECTRICITY_PRICES = {
-    "TW": {
-        "price": 4.4,           # NTD/kWh
-        "currency": "NTD",
-        "symbol": "NT$",
-        "note": "Taiwan average commercial electricity rate (considering tiered pricing)"
-    },
-    "US": {
-        "price": 0.12,          # USD/kWh
-        "currency": "USD",
-        "symbol": "$",
-        "note": "US average commercial electricity rate"
-    },
-    "EU": {
-        "price": 0.25,          # EUR/kWh
-        "currency": "EUR",
-        "symbol": "€",
-        "note": "EU average commercial electricity rate"
-    },
-    "CN": {
-        "price": 0.8,           # CNY/kWh
-        "currency": "CNY",
-        "symbol": "¥",
-        "note": "China average commercial electricity rate"
-    },
-    "JP": {
-        "price": 25,            # JPY/kWh
-        "currency": "JPY",
-        "symbol": "¥",
-        "note": "Japan average commercial electricity rate"
-    }
-}
+REGION_ELECTRICITY_PRICES = _REGISTRY.electricity_prices()
 
 # Fuel emission factors (universal)
-EF_GASOLINE = 2.3  # kg CO2/L
-EF_DIESEL = 2.6    # kg CO2/L
+EF_GASOLINE = _REGISTRY.value(GASOLINE, "*")  # kg CO2/L
+EF_DIESEL = _REGISTRY.value(DIESEL, "*")      # kg CO2/L
 DEFAULT_CAR_KM_PER_YEAR = 15000
 DEFAULT_CAR_KM_PER_L = 10
 CAR_T_CO2E_PER_YEAR = (DEFAULT_CAR_KM_PER_YEAR / DEFAULT_CAR_KM_PER_L) * EF_GASOLINE / 1000  # ~3.45 tCO2e/year
 BIKE_EQ = 0.5  # Motorcycle equivalent to car
-EF_WATER_T_PER_M3 = 0.0004  # Water consumption
-EF_WASTE_T_PER_TON = 0.33   # Waste generation
+EF_WATER_T_PER_M3 = _REGISTRY.value(WATER, "*")  # Water consumption
+EF_WASTE_T_PER_TON = _REGISTRY.value(WASTE, "*")  # Waste generation
 
 
 @dataclass
@@ -72,7 +48,9 @@ class Inputs:
     Input parameters for carbon emission estimation
     
     Attributes:
-        region: Geographic region for grid emission factor (TW/US/EU/CN/JP)
+        region: Geographic region for grid emission factor (TW/US/EU/CN/JP, or any region in the factor registry)
+        sub_region: Optional sub-region / grid code (falls back to the regional factor)
+        year: Reporting year for factor lookup (None = latest available)
         mode: Calculation mode - "quick" or "detail"
         monthly_bill_ntd: Monthly electricity bill (NTD)
         price_per_kwh_ntd: Price per kWh (NTD)
@@ -88,7 +66,9 @@ class Inputs:
         waste_ton_year: Annual waste generation (tons)
         use_rule_of_thumb: Use simplified 10% rule for Scope 1 estimation
     """
-    region: Literal["TW", "US", "EU", "CN", "JP"] = "TW"
+    region: str = "TW"
+    sub_region: Optional[str] = None
+    year: Optional[int] = None
     mode: Literal["quick", "detail"] = "quick"
     monthly_bill_ntd: Optional[float] = None
     price_per_kwh_ntd: float = 4.4
@@ -105,7 +85,7 @@ class Inputs:
     use_rule_of_thumb: bool = False
 
 
-def compute_scope2(annual_kwh, monthly_bill, price_per_kwh, region="TW"):
+def compute_scope2(annual_kwh, monthly_bill, price_per_kwh, region="TW", ef_grid=None):
     """
     Calculate Scope 2 emissions (Purchased Electricity)
     
@@ -114,11 +94,13 @@ def compute_scope2(annual_kwh, monthly_bill, price_per_kwh, region="TW"):
         monthly_bill: Monthly electricity bill (NTD)
         price_per_kwh: Price per kWh (NTD)
         region: Geographic region (TW/US/EU/CN/JP)
+        ef_grid: Resolved grid factor (kg CO2/kWh); looked up by region if omitted
     
     Returns:
         Scope 2 emissions in tCO2e
     """
-    ef_grid = GRID_EMISSION_FACTORS.get(region, GRID_EMISSION_FACTORS["TW"])
+    if ef_grid is None:
+        ef_grid = GRID_EMISSION_FACTORS.get(region, GRID_EMISSION_FACTORS["TW"])
     
     if annual_kwh:
         return annual_kwh * ef_grid / 1000
@@ -128,7 +110,7 @@ def compute_scope2(annual_kwh, monthly_bill, price_per_kwh, region="TW"):
     return 0.0
 
 
-def compute_scope1_vehicle(car, mc, gas_liters, diesel_liters):
+def compute_scope1_vehicle(car, mc, gas_liters, diesel_liters, ef_gasoline=EF_GASOLINE, ef_diesel=EF_DIESEL):
     """
     Calculate Scope 1 emissions from vehicles
     
@@ -137,16 +119,19 @@ def compute_scope1_vehicle(car, mc, gas_liters, diesel_liters):
         mc: Number of motorcycles
         gas_liters: Annual gasoline consumption (liters)
         diesel_liters: Annual diesel consumption (liters)
+        ef_gasoline: Gasoline factor (kg CO2/L)
+        ef_diesel: Diesel factor (kg CO2/L)
     
     Returns:
         Vehicle emissions in tCO2e
     """
     if gas_liters or diesel_liters:
-        return (gas_liters or 0) * EF_GASOLINE / 1000 + (diesel_liters or 0) * EF_DIESEL / 1000
+        return (gas_liters or 0) * ef_gasoline / 1000 + (diesel_liters or 0) * ef_diesel / 1000
     
     # Use vehicle count estimation
     car_equiv = car + mc * BIKE_EQ
-    return car_equiv * CAR_T_CO2E_PER_YEAR
+    car_t_co2e = (DEFAULT_CAR_KM_PER_YEAR / DEFAULT_CAR_KM_PER_L) * ef_gasoline / 1000
+    return car_equiv * car_t_co2e
 
 
 def compute_scope1_refrigerant(leak_kg, gwp):
@@ -163,26 +148,55 @@ def compute_scope1_refrigerant(leak_kg, gwp):
     return leak_kg * gwp / 1000
 
 
-def compute_minor_scope3(water, waste):
+def compute_minor_scope3(water, waste, ef_water=EF_WATER_T_PER_M3, ef_waste=EF_WASTE_T_PER_TON):
     """
     Calculate minor Scope 3 emissions (water and waste)
     
     Args:
         water: Annual water consumption (m³)
         waste: Annual waste generation (tons)
+        ef_water: Water factor (tCO2e/m³)
+        ef_waste: Waste factor (tCO2e/ton)
     
     Returns:
         Minor Scope 3 emissions in tCO2e
     """
-    return water * EF_WATER_T_PER_M3 + waste * EF_WASTE_T_PER_TON
+    return water * ef_water + waste * ef_waste
+
+
+def resolve_factors(
+    region: str,
+    sub_region: Optional[str] = None,
+    year: Optional[int] = None,
+    registry: Optional[EmissionFactorRegistry] = None
+) -> Dict:
+    """
+    Resolve every factor used by estimate() for one region / sub-region / year
+    
+    Args:
+        region: Region code
+        sub_region: Optional sub-region / grid code
+        year: Reporting year (None = latest available)
+        registry: Factor registry (defaults to the process-wide registry)
+    
+    Returns:
+        Dictionary of factor type -> EmissionFactor
+    """
+    registry = registry or _REGISTRY
+    return {
+        factor_type: registry.resolve(factor_type, region, sub_region, year)
+        for factor_type in (GRID_ELECTRICITY, GASOLINE, DIESEL, WATER, WASTE)
+    }
 
 
-def estimate(inputs: Inputs):
+def estimate(inputs: Inputs, registry: Optional[EmissionFactorRegistry] = None, factors: Optional[Dict] = None):
     """
     Main estimation function for carbon emissions
     
     Args:
         inputs: Inputs dataclass with all parameters
+        registry: Factor registry (defaults to the process-wide registry)
+        factors: Pre-resolved factors from resolve_factors() (skips the lookup)
     
     Returns:
         Dictionary containing:
@@ -196,19 +210,27 @@ def estimate(inputs: Inputs):
         - Share_Percent: Percentage breakdown
         - Region: Selected region
         - Grid_EF: Grid emission factor used (kg CO2/kWh)
+        - Factor_Version: Version of the factor data file applied
+        - Factor_Resolution: Factor type -> record key actually used (region/sub_region/year)
     """
+    registry = registry or _REGISTRY
+    if factors is None:
+        factors = resolve_factors(inputs.region, inputs.sub_region, inputs.year, registry)
+
     # Get grid emission factor for selected region
-    ef_grid = GRID_EMISSION_FACTORS.get(inputs.region, GRID_EMISSION_FACTORS["TW"])
+    ef_grid = factors[GRID_ELECTRICITY].value
     
     # Calculate Scope 2 (Electricity)
-    s2 = compute_scope2(inputs.annual_kwh, inputs.monthly_bill_ntd, inputs.price_per_kwh_ntd, inputs.region)
+    s2 = compute_scope2(inputs.annual_kwh, inputs.monthly_bill_ntd, inputs.price_per_kwh_ntd, inputs.region, ef_grid=ef_grid)
     
     # Calculate Scope 1 (Vehicles)
     s1v = compute_scope1_vehicle(
         inputs.car_count, 
         inputs.motorcycles, 
         inputs.gasoline_liters_year, 
-        inputs.diesel_liters_year
+        inputs.diesel_liters_year,
+        ef_gasoline=factors[GASOLINE].value,
+        ef_diesel=factors[DIESEL].value
     )
     
     # Calculate Scope 1 (Refrigerant)
@@ -233,7 +255,12 @@ def estimate(inputs: Inputs):
     share_s1r = s1r / total * 100 if total else 0
     
     # Calculate minor Scope 3 if requested
-    s3_minor = compute_minor_scope3(inputs.water_m3_year, inputs.waste_ton_year) if inputs.include_scope3 else 0
+    s3_minor = compute_minor_scope3(
+        inputs.water_m3_year,
+        inputs.waste_ton_year,
+        ef_water=factors[WATER].value,
+        ef_waste=factors[WASTE].value
+    ) if inputs.include_scope3 else 0
 
     # Total including Scope 3
     total_with_s3 = total + s3_minor
@@ -252,10 +279,36 @@ def estimate(inputs: Inputs):
             "Refrigerant": round(share_s1r, 1)
         },
         "Region": inputs.region,
-        "Grid_EF": ef_grid
+        "Grid_EF": ef_grid,
+        "Factor_Version": registry.version,
+        "Factor_Resolution": {factor_type: factor.key for factor_type, factor in factors.items()}
     }
 
 
+def estimate_batch(inputs_list: List[Inputs], registry: Optional[EmissionFactorRegistry] = None) -> List[Dict]:
+    """
+    Estimate many inputs, resolving each (region, sub_region, year) factor set only once
+    
+    Args:
+        inputs_list: List of Inputs
+        registry: Factor registry (defaults to the process-wide registry)
+    
+    Returns:
+        List of estimate() results in input order
+    """
+    registry = registry or _REGISTRY
+    factor_sets: Dict[Tuple[str, Optional[str], Optional[int]], Dict] = {}
+    results = []
+    for inputs in inputs_list:
+        key = (inputs.region, inputs.sub_region, inputs.year)
+        factors = factor_sets.get(key)
+        if factors is None:
+            factors = resolve_factors(inputs.region, inputs.sub_region, inputs.year, registry)
+            factor_sets[key] = factors
+        results.append(estimate(inputs, registry=registry, factors=factors))
+    return results
+
+
 # === Helper Functions for UI Integration ===
 
 def quick_estimate_from_monthly_bill(monthly_bill_ntd: float, car_count: int = 0, motorcycles: int = 0, region: str = "TW"):
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Emission Factor Registry
+------------------------
+Versioned emission factors loaded from a data file and indexed once at startup.
+
+Factors are keyed by (region, sub_region, year, factor_type). Lookups never scan:
+every step of the fallback chain is a single dict access.
+
+Fallback chain for a lookup of (region, sub_region, year, factor_type):
+    1. (region, sub_region)  - nearest year at or before `year`
+    2. (region, None)        - regional average
+    3. ("*", None)           - global / universal factor
+    4. (default_region, None)
+Within each step a missing year resolves to the closest earlier year; years
+before the first published year use the earliest record, and `year=None`
+uses the latest record.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_FACTORS_PATH = Path(__file__).parent / "data" / "emission_factors.json"
+GLOBAL_REGION = "*"
+
+# Factor types used by the estimation engine
+GRID_ELECTRICITY = "grid_electricity"
+GASOLINE = "gasoline"
+DIESEL = "diesel"
+WATER = "water"
+WASTE = "waste"
+
+
+@dataclass(frozen=True)
+class EmissionFactor:
+    """
+    A single resolved emission factor
+
+    Attributes:
+        region: Region code the record was published for ("*" = global)
+        sub_region: Sub-region / grid code (None = regional average)
+        year: Publication year of the factor
+        factor_type: Factor type (grid_electricity, gasoline, diesel, water, waste)
+        value: Factor value
+        unit: Unit of the value
+        source: Human-readable source description
+        version: Version of the data file the factor came from
+    """
+    region: str
+    sub_region: Optional[str]
+    year: int
+    factor_type: str
+    value: float
+    unit: str
+    source: str
+    version: str
+
+    @property
+    def key(self) -> str:
+        """Compact identifier recorded in estimation results"""
+        parts = [self.region]
+        if self.sub_region:
+            parts.append(self.sub_region)
+        parts.append(str(self.year))
+        return "/".join(parts)
+
+
+class EmissionFactorRegistry:
+    """Indexed, read-only view over a versioned emission factor data file"""
+
+    def __init__(self, data: Dict[str, Any]):
+        """
+        Build lookup indexes from parsed factor data
+
+        Args:
+            data: Parsed content of an emission factor data file
+        """
+        self.version = str(data.get("version", "unversioned"))
+        self.default_region = data.get("default_region", "TW")
+
+        # (region, sub_region, factor_type) -> {year: factor}, densely filled so that
+        # "nearest earlier year" is a plain dict hit
+        self._by_year: Dict[Tuple[str, Optional[str], str], Dict[int, EmissionFactor]] = {}
+        # (region, sub_region, factor_type) -> (earliest, latest)
+        self._bounds: Dict[Tuple[str, Optional[str], str], Tuple[EmissionFactor, EmissionFactor]] = {}
+
+        grouped: Dict[Tuple[str, Optional[str], str], Dict[int, EmissionFactor]] = {}
+        for record in data.get("factors", []):
+            factor = EmissionFactor(
+                region=record["region"],
+                sub_region=record.get("sub_region") or None,
+                year=int(record["year"]),
+                factor_type=record["type"],
+                value=float(record["value"]),
+                unit=record.get("unit", ""),
+                source=record.get("source", ""),
+                version=self.version
+            )
+            grouped.setdefault((factor.region, factor.sub_region, factor.factor_type), {})[factor.year] = factor
+
+        for key, by_year in grouped.items():
+            years = sorted(by_year)
+            dense = {}
+            current = by_year[years[0]]
+            for year in range(years[0], years[-1] + 1):
+                current = by_year.get(year, current)
+                dense[year] = current
+            self._by_year[key] = dense
+            self._bounds[key] = (by_year[years[0]], by_year[years[-1]])
+
+        self._prices: Dict[str, Dict[str, Any]] = {}
+        for record in data.get("electricity_prices", []):
+            price = dict(record)
+            region = price.pop("region")
+            self._prices[region] = price
+
+    @classmethod
+    def from_file(cls, path: Path) -> "EmissionFactorRegistry":
+        """Load registry from a JSON data file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _lookup(self, key: Tuple[str, Optional[str], str], year: Optional[int]) -> Optional[EmissionFactor]:
+        bounds = self._bounds.get(key)
+        if bounds is None:
+            return None
+        earliest, latest = bounds
+        if year is None or year >= latest.year:
+            return latest
+        if year <= earliest.year:
+            return earliest
+        return self._by_year[key][year]
+
+    def _chain(self, region: str, sub_region: Optional[str]) -> Iterable[Tuple[str, Optional[str]]]:
+        if sub_region:
+            yield region, sub_region
+        yield region, None
+        yield GLOBAL_REGION, None
+        if region != self.default_region:
+            yield self.default_region, None
+
+    def resolve(
+        self,
+        factor_type: str,
+        region: str,
+        sub_region: Optional[str] = None,
+        year: Optional[int] = None
+    ) -> EmissionFactor:
+        """
+        Resolve a factor through the fallback chain
+
+        Args:
+            factor_type: Factor type (e.g. "grid_electricity")
+            region: Region code (e.g. "TW")
+            sub_region: Optional sub-region / grid code
+            year: Reporting year (None = latest available)
+
+        Returns:
+            Resolved EmissionFactor
+
+        Raises:
+            KeyError: If no record exists anywhere in the chain
+        """
+        for chain_region, chain_sub in self._chain(region, sub_region):
+            factor = self._lookup((chain_region, chain_sub, factor_type), year)
+            if factor is not None:
+                return factor
+        raise KeyError(f"No '{factor_type}' emission factor for region={region}, sub_region={sub_region}, year={year}")
+
+    def value(self, factor_type: str, region: str, sub_region: Optional[str] = None, year: Optional[int] = None) -> float:
+        """Resolve a factor and return its numeric value"""
+        return self.resolve(factor_type, region, sub_region, year).value
+
+    def regions(self, factor_type: str = GRID_ELECTRICITY) -> List[str]:
+        """List region codes with a regional (non sub-region) record for a factor type"""
+        return sorted(
+            region for (region, sub_region, ftype) in self._bounds
+            if ftype == factor_type and sub_region is None and region != GLOBAL_REGION
+        )
+
+    def grid_factors_by_region(self, year: Optional[int] = None) -> Dict[str, float]:
+        """Regional grid emission factors (kg CO2e/kWh) as a flat dict"""
+        return {region: self.value(GRID_ELECTRICITY, region, year=year) for region in self.regions(GRID_ELECTRICITY)}
+
+    def electricity_price(self, region: str) -> Dict[str, Any]:
+        """Reference electricity price for a region (falls back to the default region)"""
+        return self._prices.get(region) or self._prices[self.default_region]
+
+    def electricity_prices(self) -> Dict[str, Dict[str, Any]]:
+        """Reference electricity prices for all regions"""
+        return {region: dict(price) for region, price in self._prices.items()}
+
+
+_registry_lock = threading.Lock()
+_registries: Dict[str, EmissionFactorRegistry] = {}
+
+
+def get_registry(path: Optional[str] = None) -> EmissionFactorRegistry:
+    """
+    Get the process-wide registry for a data file (loaded and indexed once)
+
+    Args:
+        path: Data file path. Defaults to EMISSION_FACTORS_PATH env var, then the bundled file.
+
+    Returns:
+        EmissionFactorRegistry instance
+    """
+    path = str(path or os.getenv("EMISSION_FACTORS_PATH") or DEFAULT_FACTORS_PATH)
+    registry = _registries.get(path)
+    if registry is None:
+        with _registry_lock:
+            registry = _registries.get(path)
+            if registry is None:
+                registry = EmissionFactorRegistry.from_file(Path(path))
+                _registries[path] = registry
+    return registry
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Decarbonization Scenario Engine
+-------------------------------
+Deterministic Scope 1 + 2 projections from an estimate() baseline to 2050.
+
+Each scenario combines three annual trajectories:
+    - grid decarbonization (Scope 2 emission factor decline, down to a residual floor)
+    - energy efficiency (activity reduction applied to both scopes)
+    - fuel switching / fleet electrification (Scope 1 decline)
+
+The full scenario x year grid is computed in one vectorized NumPy pass, so a
+sweep over many scenarios costs the same as a single projection.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+TARGET_YEAR = 2050
+MILESTONE_YEARS = (2030, 2040, 2050)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    A decarbonization trajectory
+
+    Attributes:
+        name: Scenario label shown in reports
+        grid_decline: Annual decline of the grid emission factor (0.05 = 5%/year)
+        grid_floor: Residual share of the base grid factor that never decarbonizes
+        efficiency: Annual energy-efficiency gain applied to Scope 1 and Scope 2 activity
+        fuel_switch: Annual Scope 1 decline from electrification / fuel switching
+    """
+    name: str
+    grid_decline: float
+    grid_floor: float
+    efficiency: float
+    fuel_switch: float
+
+
+DEFAULT_SCENARIOS: Sequence[Scenario] = (
+    Scenario("Current Policies", grid_decline=0.015, grid_floor=0.40, efficiency=0.005, fuel_switch=0.005),
+    Scenario("Stated Policies", grid_decline=0.035, grid_floor=0.20, efficiency=0.010, fuel_switch=0.020),
+    Scenario("Net Zero 2050", grid_decline=0.090, grid_floor=0.02, efficiency=0.020, fuel_switch=0.080),
+)
+
+
+@dataclass(frozen=True)
+class ScenarioProjection:
+    """
+    Result grid of a scenario sweep (rows = scenarios, columns = years)
+
+    Attributes:
+        scenarios: Scenarios in row order
+        years: Projection years, shape (Y,)
+        scope1: Scope 1 emissions (tCO2e), shape (S, Y)
+        scope2: Scope 2 emissions (tCO2e), shape (S, Y)
+        total: Scope 1 + 2 emissions (tCO2e), shape (S, Y)
+    """
+    scenarios: Sequence[Scenario]
+    years: np.ndarray
+    scope1: np.ndarray
+    scope2: np.ndarray
+    total: np.ndarray
+
+    @property
+    def base_total(self) -> float:
+        """Baseline Scope 1 + 2 emissions (tCO2e)"""
+        return float(self.total[0, 0]) if self.total.size else 0.0
+
+    def at(self, year: int) -> np.ndarray:
+        """Total emissions of every scenario in a given year, shape (S,)"""
+        idx = int(np.clip(year - self.years[0], 0, len(self.years) - 1))
+        return self.total[:, idx]
+
+    def milestones(self, years: Sequence[int] = MILESTONE_YEARS) -> List[Dict[str, Any]]:
+        """
+        Summarize each scenario at milestone years
+
+        Every requested year is always present; years at or before the base year
+        are clamped to the baseline (0% reduction), later ones to the last projected year.
+
+        Returns:
+            List of dicts (one per scenario) with name, base_year, base_tco2e and
+            per-milestone tco2e / reduction_pct
+        """
+        years = [int(y) for y in years] or [int(self.years[-1])]
+        base = self.base_total
+        idx = np.clip(np.asarray(years) - self.years[0], 0, len(self.years) - 1)
+        totals = self.total[:, idx]
+        reductions = (1 - totals / base) * 100 if base else np.zeros_like(totals)
+
+        summary = []
+        for row, scenario in enumerate(self.scenarios):
+            summary.append({
+                "name": scenario.name,
+                "base_year": int(self.years[0]),
+                "base_tco2e": round(base, 1),
+                "milestones": {
+                    int(year): {
+                        "tco2e": round(float(totals[row, col]), 1),
+                        "reduction_pct": round(float(reductions[row, col]), 1)
+                    }
+                    for col, year in enumerate(years)
+                }
+            })
+        return summary
+
+
+def project_scenarios(
+    scope1: float,
+    scope2: float,
+    base_year: int,
+    target_year: int = TARGET_YEAR,
+    scenarios: Optional[Sequence[Scenario]] = None
+) -> ScenarioProjection:
+    """
+    Project Scope 1 and Scope 2 emissions under several scenarios
+
+    Args:
+        scope1: Baseline Scope 1 emissions (tCO2e)
+        scope2: Baseline Scope 2 emissions (tCO2e)
+        base_year: Baseline year (year of the estimate)
+        target_year: Last projected year (inclusive)
+        scenarios: Scenarios to sweep (defaults to DEFAULT_SCENARIOS)
+
+    Returns:
+        ScenarioProjection with (scenario x year) arrays
+    """
+    scenarios = tuple(scenarios or DEFAULT_SCENARIOS)
+    years = np.arange(base_year, max(target_year, base_year) + 1)
+    t = (years - base_year)[np.newaxis, :]                      # (1, Y)
+
+    params = np.array(
+        [[s.grid_decline, s.grid_floor, s.efficiency, s.fuel_switch] for s in scenarios],
+        dtype=float
+    ).reshape(len(scenarios), 4)
+    grid_decline, grid_floor, efficiency, fuel_switch = (params[:, i:i + 1] for i in range(4))  # (S, 1)
+
+    efficiency_curve = (1 - efficiency) ** t                    # (S, Y)
+    grid_curve = grid_floor + (1 - grid_floor) * (1 - grid_decline) ** t
+    fuel_curve = (1 - fuel_switch) ** t
+
+    s1 = scope1 * fuel_curve * efficiency_curve
+    s2 = scope2 * grid_curve * efficiency_curve
+    return ScenarioProjection(scenarios=scenarios, years=years, scope1=s1, scope2=s2, total=s1 + s2)
+
+
+def baseline_year(carbon_emission: Dict[str, Any]) -> int:
+    """Baseline year of a carbon_emission record (calculation date, else current year)"""
+    if carbon_emission.get("base_year"):
+        return int(carbon_emission["base_year"])
+    calculation_date = carbon_emission.get("calculation_date")
+    if calculation_date:
+        try:
+            return datetime.fromisoformat(str(calculation_date)).year
+        except ValueError:
+            pass
+    return datetime.now().year
+
+
+def scenario_targets(
+    carbon_emission: Dict[str, Any],
+    scenarios: Optional[Sequence[Scenario]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Milestone targets for a carbon_emission session record
+
+    Args:
+        carbon_emission: Dict with scope1 / scope2 (tCO2e), as stored by the calculator
+        scenarios: Scenarios to sweep (defaults to DEFAULT_SCENARIOS)
+
+    Returns:
+        Output of ScenarioProjection.milestones()
+    """
+    projection = project_scenarios(
+        float(carbon_emission.get("scope1") or 0),
+        float(carbon_emission.get("scope2") or 0),
+        baseline_year(carbon_emission),
+        scenarios=scenarios
+    )
+    return projection.milestones()
+
+
+def format_scenario_context(targets: List[Dict[str, Any]]) -> str:
+    """
+    Render milestone targets as compact prompt lines
+
+    Example:
+        Net Zero 2050: 2030 812.4 tCO2e (-38.2%); 2040 ...; 2050 ...
+    """
+    lines = []
+    for target in targets:
+        points = "; ".join(
+            f"{year} {m['tco2e']} tCO2e (-{m['reduction_pct']}%)"
+            for year, m in target["milestones"].items()
+        )
+        lines.append(f"- {target['name']}: {points}")
+    return "\n".join(lines)
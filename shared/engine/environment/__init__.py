@@ -1 +1,4 @@
 """Environment 引擎模組"""
+from .generator import EnvironmentGenerator
+
+__all__ = ['EnvironmentGenerator']
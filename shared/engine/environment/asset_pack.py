@@ -0,0 +1,251 @@
+"""
+ESG Report Generator - Environment Image Asset Pack
+
+The pack is built automatically on first use (and rebuilt when a source image
+changes). It can also be built ahead of time, e.g. in a Docker image:
+    python asset_pack.py            # writes assets/environment_assets.pack
+    python asset_pack.py --check    # verify the pack matches the source images
+
+Each image listed in ENVIRONMENT_IMAGE_MAPPING is downsampled to its placed size
+on the slide (IMAGE_PLACEMENTS, inches) at ASSET_PACK_DPI and recompressed
+(JPEG for opaque images, optimized PNG otherwise). All images go into one file:
+
+    MAGIC (8 bytes) | index length (uint32, little-endian) | JSON index | blobs
+
+Index offsets are relative to the start of the blob section.
+
+At runtime the pack is memory-mapped once per process; nothing is decoded or
+re-encoded while building a deck (python-pptx copies each image blob once into
+its picture part). Without Pillow, or if the pack cannot be written, images fall
+back to the original PNGs in assets/.
+"""
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+from config import (
+    ASSETS_PATH, ENVIRONMENT_IMAGE_MAPPING, IMAGE_PLACEMENTS,
+    ASSET_PACK_PATH, ASSET_PACK_DPI, ASSET_PACK_JPEG_QUALITY
+)
+
+MAGIC = b"ESGPACK1"
+_HEADER = struct.Struct("<8sI")
+
+
+class AssetPack:
+    """Read-only, memory-mapped view over an asset pack file"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        magic, index_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not an asset pack: {self.path}")
+        index_start = _HEADER.size
+        self.index = json.loads(bytes(self._mmap[index_start:index_start + index_len]).decode("utf-8"))
+        self._data_start = index_start + index_len
+        self._view = memoryview(self._mmap)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def get(self, name):
+        """Return the packed image as a memoryview slice of the mapping (None if not packed)"""
+        entry = self.index.get(name)
+        if entry is None:
+            return None
+        start = self._data_start + entry["offset"]
+        return self._view[start:start + entry["length"]]
+
+    def open(self, name):
+        """Return a binary stream for python-pptx add_picture (copies the blob; None if not packed)"""
+        view = self.get(name)
+        return io.BytesIO(view) if view is not None else None
+
+    def close(self):
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+_pack = None
+_pack_loaded = False
+_pack_lock = threading.Lock()
+
+
+def get_asset_pack():
+    """
+    Get the process-wide asset pack (built if missing or stale, mapped on first use)
+
+    Returns:
+        AssetPack, or None if the pack cannot be built or read
+    """
+    global _pack, _pack_loaded
+    if not _pack_loaded:
+        with _pack_lock:
+            if not _pack_loaded:
+                _pack = _load_or_build_pack()
+                _pack_loaded = True
+    return _pack
+
+
+def _load_or_build_pack():
+    """Map the pack, (re)building it first when it is missing or out of date"""
+    pack = None
+    if os.path.exists(ASSET_PACK_PATH):
+        try:
+            pack = AssetPack(ASSET_PACK_PATH)
+        except Exception as e:
+            print(f"  ⚠ Asset pack unreadable, rebuilding: {e}")
+    if pack is not None:
+        stale = _stale_entries(pack)
+        if not stale:
+            print(f"  ✓ Asset pack loaded: {len(pack.index)} images")
+            return pack
+        print(f"  ⚠ Asset pack is stale ({', '.join(stale)}), rebuilding")
+        pack.close()
+
+    try:
+        build_asset_pack()
+        pack = AssetPack(ASSET_PACK_PATH)
+    except ImportError:
+        print("  ⚠ Pillow not installed, using original images (pip install Pillow)")
+        return None
+    except Exception as e:
+        print(f"  ⚠ Asset pack build failed, using original images: {e}")
+        return None
+    print(f"  ✓ Asset pack loaded: {len(pack.index)} images")
+    return pack
+
+
+def _source_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _optimize_image(source_path, box_inches, dpi, jpeg_quality):
+    """Downsample an image to its placed size and recompress it"""
+    from PIL import Image  # build-time only dependency
+
+    with Image.open(source_path) as im:
+        target = (round(box_inches[0] * dpi), round(box_inches[1] * dpi))
+        # Images are stretched to fill their box, so resizing to the box matches what is displayed.
+        # Never upscale.
+        size = (min(im.width, target[0]), min(im.height, target[1]))
+
+        opaque = im.mode in ("RGB", "L") or (im.mode == "RGBA" and im.getchannel("A").getextrema()[0] == 255)
+        im = im.convert("RGB" if opaque else "RGBA")
+        if size != im.size:
+            im = im.resize(size, Image.LANCZOS)
+
+        out = io.BytesIO()
+        if opaque:
+            im.save(out, format="JPEG", quality=jpeg_quality, optimize=True, progressive=True)
+            content_type = "image/jpeg"
+        else:
+            im.save(out, format="PNG", optimize=True)
+            content_type = "image/png"
+        return out.getvalue(), content_type, im.size
+
+
+def build_asset_pack(output_path=ASSET_PACK_PATH, dpi=ASSET_PACK_DPI, jpeg_quality=ASSET_PACK_JPEG_QUALITY):
+    """
+    Build the asset pack from ENVIRONMENT_IMAGE_MAPPING
+
+    Returns:
+        Path of the written pack
+    """
+    index = {}
+    blobs = []
+    offset = 0
+    for key, image_name in ENVIRONMENT_IMAGE_MAPPING.items():
+        source_path = os.path.join(ASSETS_PATH, image_name)
+        if not os.path.exists(source_path):
+            print(f"  ⚠ Skipped (not found): {image_name}")
+            continue
+        box = IMAGE_PLACEMENTS.get(key)
+        if box is None:
+            print(f"  ⚠ Skipped (no placement size): {image_name}")
+            continue
+
+        blob, content_type, size = _optimize_image(source_path, box, dpi, jpeg_quality)
+        index[image_name] = {
+            "offset": offset,
+            "length": len(blob),
+            "content_type": content_type,
+            "width_px": size[0],
+            "height_px": size[1],
+            "source_sha256": _source_sha256(source_path)
+        }
+        blobs.append(blob)
+        offset += len(blob)
+        print(f"  ✓ {image_name}: {os.path.getsize(source_path) / 1024:.0f} KB -> {len(blob) / 1024:.0f} KB ({size[0]}x{size[1]})")
+
+    index_bytes = json.dumps(index, sort_keys=True).encode("utf-8")
+
+    output_path = Path(output_path)
+    tmp_path = output_path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")  # concurrent builders
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(index_bytes)))
+        f.write(index_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, output_path)
+    print(f"✓ Asset pack written: {output_path} ({output_path.stat().st_size / 1024:.0f} KB)")
+    return output_path
+
+
+def _packable_images():
+    """Mapped images that exist in assets/ and have a placement size"""
+    return [
+        image_name for key, image_name in ENVIRONMENT_IMAGE_MAPPING.items()
+        if key in IMAGE_PLACEMENTS and os.path.exists(os.path.join(ASSETS_PATH, image_name))
+    ]
+
+
+def _stale_entries(pack):
+    """Images whose source changed, disappeared, or is not packed yet"""
+    stale = []
+    for image_name, entry in pack.index.items():
+        source_path = os.path.join(ASSETS_PATH, image_name)
+        if not os.path.exists(source_path) or _source_sha256(source_path) != entry["source_sha256"]:
+            stale.append(image_name)
+    stale.extend(name for name in _packable_images() if name not in pack.index)
+    return stale
+
+
+def check_asset_pack(path=ASSET_PACK_PATH):
+    """Return names of packed images whose source file changed (or is missing / not packed)"""
+    pack = AssetPack(path)
+    try:
+        return _stale_entries(pack)
+    finally:
+        pack.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--check" in sys.argv:
+        stale = check_asset_pack()
+        if stale:
+            print(f"✗ Asset pack is stale: {', '.join(stale)}")
+            sys.exit(1)
+        print("✓ Asset pack is up to date")
+    else:
+        build_asset_pack()
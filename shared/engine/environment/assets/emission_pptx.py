@@ -2,23 +2,50 @@
 Emission Engine - PPTX Version
 Outputs:
 1. Emission Table PPTX
-2. Pie Chart Image
+2. Pie Chart (native PowerPoint chart, or cached PNG image)
 """
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION, XL_LABEL_POSITION
 from pptx.oxml.xmlchemy import OxmlElement
 from pptx.oxml.ns import qn
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # 使用非互動式後端
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+
+# Project root (for shared.engine utilities)
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from shared.engine.tracing import span
 
 # Output Directory
 OUTPUT_DIR = Path(__file__).parent.parent / "output"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Rendered chart cache (PNG fallback), keyed by hash of data + style; least recently
+# used renders beyond CHART_CACHE_MAX_ENTRIES are pruned
+CHART_CACHE_DIR = OUTPUT_DIR / "chart_cache"
+CHART_CACHE_MAX_ENTRIES = int(os.getenv("ESG_CHART_CACHE_MAX_ENTRIES", "64"))
+_render_lock = threading.Lock()  # matplotlib global state is not thread-safe
+
+# ============ Pie Chart Style ============
+PIE_CHART_STYLE = {
+    "labels": ["Scope 1 (Direct)", "Scope 2 (Purchased Electricity)", "Scope 3 (Other Indirect)"],
+    "colors": ["6BA292", "007A3D", "C1C1C1"],
+    "title": "Greenhouse Gas Emission Distribution (tCO₂e)",
+    "font": "Microsoft JhengHei",
+    "dpi": 300
+}
+
 # ============ Default Emission Data ============
 DEFAULT_EMISSION_DATA = {
     "data_year": "2024",
@@ -40,46 +67,120 @@ DEFAULT_EMISSION_DATA = {
     "total": 153.45
 }
 
-# Dynamic Data (can be set externally)
-EMISSION_DATA = DEFAULT_EMISSION_DATA.copy()
 
-def set_emission_data(data):
-    """Set dynamic emission data (passed from Emission Engine)"""
-    global EMISSION_DATA
-    if data:
+@dataclass(frozen=True)
+class EmissionData:
+    """Immutable emission figures for one report (tCO₂e)"""
+    data_year: str = "2024"
+    unit: str = "tCO₂e"
+    scope1_gasoline: float = 0.0
+    scope1_refrigerant: float = 0.0
+    scope1_subtotal: float = 0.0
+    scope2_electricity: float = 0.0
+    scope2_subtotal: float = 0.0
+    scope3_subtotal: float = 0.0
+    total: float = 0.0
+
+    def content_key(self) -> str:
+        """Stable hash of the figures (names per-data output files)"""
+        payload = json.dumps(asdict(self), sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def from_dict(cls, data: Optional[Mapping[str, Any]]) -> "EmissionData":
+        """
+        Build from a flat Emission Engine dict
+        (scope1 / gasoline / refrigerant / scope2 / electricity / scope3 / total / data_year)
+        """
+        if not data:
+            return DEFAULT_EMISSION
         # Get detailed data (prefer gasoline/refrigerant, otherwise split scope1 equally)
         s1_total = data.get("scope1", 0)
-        s1_gasoline = data.get("gasoline", s1_total * 0.5)
-        s1_refrigerant = data.get("refrigerant", s1_total * 0.5)
-        
         s2_total = data.get("scope2", 0)
-        s2_electricity = data.get("electricity", s2_total)
-        
-        total = data.get("total", s1_total + s2_total)
-        
-        EMISSION_DATA = {
-            "data_year": data.get("data_year", "2024"),
-            "unit": "tCO₂e",
-            "scope1": {
-                "gasoline": s1_gasoline,
-                "refrigerant": s1_refrigerant,
-                "subtotal": s1_total
-            },
-            "scope2": {
-                "electricity": s2_electricity,
-                "subtotal": s2_total
-            },
-            "scope3": {
-                "goods_services": 0.00,
-                "transportation": 0.00,
-                "subtotal": data.get("scope3", 0)
-            },
-            "total": total
-        }
+        return cls(
+            data_year=str(data.get("data_year", "2024")),
+            scope1_gasoline=data.get("gasoline", s1_total * 0.5),
+            scope1_refrigerant=data.get("refrigerant", s1_total * 0.5),
+            scope1_subtotal=s1_total,
+            scope2_electricity=data.get("electricity", s2_total),
+            scope2_subtotal=s2_total,
+            scope3_subtotal=data.get("scope3", 0),
+            total=data.get("total", s1_total + s2_total)
+        )
+
+    @classmethod
+    def from_nested(cls, data: Mapping[str, Any]) -> "EmissionData":
+        """Build from the nested layout of DEFAULT_EMISSION_DATA"""
+        return cls(
+            data_year=str(data["data_year"]),
+            unit=data.get("unit", "tCO₂e"),
+            scope1_gasoline=data["scope1"]["gasoline"],
+            scope1_refrigerant=data["scope1"]["refrigerant"],
+            scope1_subtotal=data["scope1"]["subtotal"],
+            scope2_electricity=data["scope2"]["electricity"],
+            scope2_subtotal=data["scope2"]["subtotal"],
+            scope3_subtotal=data["scope3"]["subtotal"],
+            total=data["total"]
+        )
+
+
+DEFAULT_EMISSION = EmissionData.from_nested(DEFAULT_EMISSION_DATA)
+
+
+@dataclass(frozen=True)
+class RenderContext:
+    """
+    Everything one report needs to draw emission assets
+
+    Passed explicitly to every drawing function so concurrent builds in one
+    process never share mutable state.
+    """
+    emission: EmissionData = DEFAULT_EMISSION
+    chart_style: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType(PIE_CHART_STYLE))
+    output_dir: Path = OUTPUT_DIR
+
+
+# Process-wide fallback used when no context is passed (legacy callers only)
+_default_context = RenderContext()
+
+
+def set_emission_data(data):
+    """
+    Set process-wide default emission data (legacy)
+
+    Not safe for concurrent reports; pass a RenderContext to the drawing
+    functions instead.
+    """
+    global _default_context
+    if data:
+        emission = EmissionData.from_dict(data)
+        _default_context = RenderContext(emission=emission)
         print(f"  ✓ Dynamic emission data loaded:")
-        print(f"    Scope 1: {s1_total:.2f} t (Gasoline {s1_gasoline:.2f}, Refrigerant {s1_refrigerant:.2f})")
-        print(f"    Scope 2: {s2_total:.2f} t")
-        print(f"    Total Emissions: {total:.2f} tCO₂e")
+        print(f"    Scope 1: {emission.scope1_subtotal:.2f} t (Gasoline {emission.scope1_gasoline:.2f}, Refrigerant {emission.scope1_refrigerant:.2f})")
+        print(f"    Scope 2: {emission.scope2_subtotal:.2f} t")
+        print(f"    Total Emissions: {emission.total:.2f} tCO₂e")
+
+
+def _context(ctx: Optional[RenderContext]) -> RenderContext:
+    return ctx if ctx is not None else _default_context
+
+
+def _table_rows(emission: EmissionData):
+    """Emission inventory rows shared by the full-page and half-slide tables"""
+    total = emission.total
+    # Calculate percentage
+    s2_percent = (emission.scope2_subtotal / total * 100) if total > 0 else 0
+    return [
+        ["Scope 1", "Gasoline (Company Vehicles)", f"{emission.scope1_gasoline:.2f}", "Estimate"],
+        ["", "Refrigerant (R-410A)", f"{emission.scope1_refrigerant:.2f}", "Maintenance Estimate"],
+        ["Subtotal", "", f"{emission.scope1_subtotal:.2f}", ""],
+        ["Scope 2", "Purchased Electricity", f"{emission.scope2_electricity:.2f}", f"{s2_percent:.1f}% of Total"],
+        ["Subtotal", "", f"{emission.scope2_subtotal:.2f}", ""],
+        ["Scope 3", "Purchased Goods & Services", "0.00", "Not Included"],
+        ["", "Transportation", "0.00", "Not Included"],
+        ["Subtotal", "", f"{emission.scope3_subtotal:.2f}", ""],
+        ["Total", "", f"{total:.2f}", "100%"],
+    ]
 
 
 def set_cell_fill(cell, hex_color):
@@ -93,8 +194,16 @@ def set_cell_fill(cell, hex_color):
     tcPr.append(solidFill)
 
 
-def create_emission_table_pptx(output_path=None):
-    """Create emission table PPTX (16:9)"""
+def create_emission_table_pptx(output_path=None, ctx: Optional[RenderContext] = None):
+    """
+    Create emission table PPTX (16:9)
+
+    Without output_path the file is named from the emission data hash, so
+    concurrent builds with different data never overwrite each other's table
+    (least recently written tables beyond CHART_CACHE_MAX_ENTRIES are pruned).
+    """
+    ctx = _context(ctx)
+    emission = ctx.emission
     prs = Presentation()
     # 16:9 standard presentation size: 13.333" x 7.5"
     prs.slide_width = Inches(13.333)
@@ -116,7 +225,7 @@ def create_emission_table_pptx(output_path=None):
     subtitle_box = slide.shapes.add_textbox(Inches(0.3), Inches(0.8), Inches(12), Inches(0.4))
     tf2 = subtitle_box.text_frame
     p2 = tf2.paragraphs[0]
-    p2.text = f"Data Year: {EMISSION_DATA['data_year']} | Unit: {EMISSION_DATA['unit']}"
+    p2.text = f"Data Year: {emission.data_year} | Unit: {emission.unit}"
     p2.font.size = Pt(14)
     p2.font.name = 'Microsoft JhengHei'
     p2.alignment = PP_ALIGN.CENTER
@@ -146,29 +255,8 @@ def create_emission_table_pptx(output_path=None):
         p.alignment = PP_ALIGN.CENTER
         cell.vertical_anchor = MSO_ANCHOR.MIDDLE
     
-    # Data rows (using dynamic data)
-    s1_gas = EMISSION_DATA["scope1"]["gasoline"]
-    s1_ref = EMISSION_DATA["scope1"]["refrigerant"]
-    s1_sub = EMISSION_DATA["scope1"]["subtotal"]
-    s2_elec = EMISSION_DATA["scope2"]["electricity"]
-    s2_sub = EMISSION_DATA["scope2"]["subtotal"]
-    s3_sub = EMISSION_DATA["scope3"]["subtotal"]
-    total = EMISSION_DATA["total"]
-    
-    # Calculate percentage
-    s2_percent = (s2_sub / total * 100) if total > 0 else 0
-    
-    data_rows = [
-        ["Scope 1", "Gasoline (Company Vehicles)", f"{s1_gas:.2f}", "Estimate"],
-        ["", "Refrigerant (R-410A)", f"{s1_ref:.2f}", "Maintenance Estimate"],
-        ["Subtotal", "", f"{s1_sub:.2f}", ""],
-        ["Scope 2", "Purchased Electricity", f"{s2_elec:.2f}", f"{s2_percent:.1f}% of Total"],
-        ["Subtotal", "", f"{s2_sub:.2f}", ""],
-        ["Scope 3", "Purchased Goods & Services", "0.00", "Not Included"],
-        ["", "Transportation", "0.00", "Not Included"],
-        ["Subtotal", "", f"{s3_sub:.2f}", ""],
-        ["Total", "", f"{total:.2f}", "100%"],
-    ]
+    # Data rows (using report emission data)
+    data_rows = _table_rows(emission)
     
     for row_idx, row_data in enumerate(data_rows, start=1):
         for col_idx, value in enumerate(row_data):
@@ -186,37 +274,133 @@ def create_emission_table_pptx(output_path=None):
                 if row_data[0] == "Total":
                     set_cell_fill(cell, "E8F5E9")  # Light green
     
-    # Save
-    if output_path is None:
-        output_path = OUTPUT_DIR / "emission_table.pptx"
-    
-    prs.save(str(output_path))
+    # Save (temp name first so a concurrent reader never sees a partial file)
+    hashed_name = output_path is None
+    if hashed_name:
+        output_path = Path(ctx.output_dir) / f"emission_table_{emission.content_key()}.pptx"
+    
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f"{output_path.stem}.{os.getpid()}-{threading.get_ident()}.tmp.pptx")
+    prs.save(str(tmp_path))
+    tmp_path.replace(output_path)
+    if hashed_name:
+        _prune_chart_cache(ctx.output_dir, max(CHART_CACHE_MAX_ENTRIES, 1), pattern="emission_table_*.pptx")
     print(f"✓ Emission table saved: {output_path}")
     
     return output_path
 
 
-def create_emission_pie_chart(output_path=None):
-    """Create emission pie chart"""
+def _pie_values(emission: EmissionData):
+    """Scope 1/2/3 subtotals used by both pie chart renderers"""
+    return [emission.scope1_subtotal, emission.scope2_subtotal, emission.scope3_subtotal]
+
+
+def add_emission_pie_chart_on_slide(slide, left, top, width, height, ctx: Optional[RenderContext] = None):
+    """
+    Add Scope 1/2/3 pie as a native (vector) PowerPoint chart
+    
+    Args:
+        slide: Target slide
+        left, top, width, height: Chart frame position (EMU / Inches)
+        ctx: Render context (emission data + chart style)
+    
+    Returns:
+        Chart graphic frame shape
+    """
+    ctx = _context(ctx)
+    style = ctx.chart_style
+    values = _pie_values(ctx.emission)
+    
+    chart_data = CategoryChartData(number_format='0.00')
+    chart_data.categories = style["labels"]
+    chart_data.add_series("Emissions (tCO₂e)", values)
+    
+    frame = slide.shapes.add_chart(XL_CHART_TYPE.PIE, left, top, width, height, chart_data)
+    chart = frame.chart
+    
+    chart.has_title = True
+    chart.chart_title.text_frame.text = style["title"]
+    title_font = chart.chart_title.text_frame.paragraphs[0].font
+    title_font.size = Pt(14)
+    title_font.bold = True
+    title_font.name = style["font"]
+    
+    chart.has_legend = True
+    chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+    chart.legend.include_in_layout = False
+    chart.legend.font.size = Pt(10)
+    chart.legend.font.name = style["font"]
+    
+    plot = chart.plots[0]
+    for point, color in zip(plot.series[0].points, style["colors"]):
+        point.format.fill.solid()
+        point.format.fill.fore_color.rgb = RGBColor.from_string(color)
+    
+    plot.has_data_labels = True
+    labels = plot.data_labels
+    labels.show_percentage = True
+    labels.show_value = True
+    labels.show_category_name = False
+    labels.number_format = '0.00" t"'
+    labels.number_format_is_linked = False
+    labels.position = XL_LABEL_POSITION.BEST_FIT
+    labels.font.size = Pt(10)
+    labels.font.bold = True
+    
+    print("  ✓ Native emission pie chart inserted")
+    return frame
+
+
+def _chart_cache_key(values, style):
+    """Stable hash of chart data + style"""
+    payload = json.dumps({"values": [round(v, 6) for v in values], "style": style}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _prune_chart_cache(cache_dir, max_entries, pattern="emission_pie_*.png"):
+    """Delete the least recently used cached files beyond max_entries (mtime = last use)"""
+    entries = []
+    for path in Path(cache_dir).glob(pattern):
+        if ".tmp." in path.name:
+            continue
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    if len(entries) <= max_entries:
+        return 0
+    entries.sort()
+    removed = 0
+    for _, path in entries[:len(entries) - max_entries]:
+        try:
+            path.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _render_pie_png(cached_path, scope1, scope2, scope3, style):
+    """Render the pie chart PNG with matplotlib (imported lazily)"""
+    import matplotlib
+    from matplotlib.figure import Figure  # Figure API: no pyplot global figure state
+
     # Set Chinese font
-    plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'SimHei', 'Arial']
-    plt.rcParams['axes.unicode_minus'] = False
-    
-    scope1 = EMISSION_DATA["scope1"]["subtotal"]
-    scope2 = EMISSION_DATA["scope2"]["subtotal"]
-    scope3 = EMISSION_DATA["scope3"]["subtotal"]
-    
-    labels = ["Scope 1\n(Direct)", "Scope 2\n(Purchased Electricity)", "Scope 3\n(Other Indirect)"]
+    matplotlib.rcParams['font.sans-serif'] = [style["font"], 'SimHei', 'Arial']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+
+    labels = [label.replace(" (", "\n(") for label in style["labels"]]
     sizes = [scope1, scope2, scope3]
-    colors = ["#6BA292", "#007A3D", "#C1C1C1"]
+    colors = [f"#{color}" for color in style["colors"]]
     explode = (0, 0.05, 0)  # Highlight Scope 2
-    
+
     # Avoid issues with 0 values
     if sum(sizes) == 0:
         sizes = [1, 1, 1]
-    
-    fig, ax = plt.subplots(figsize=(8, 6), dpi=150)
-    
+
+    fig = Figure(figsize=(8, 6), dpi=150)
+    ax = fig.subplots()
+
     wedges, texts, autotexts = ax.pie(
         sizes,
         labels=labels,
@@ -226,29 +410,61 @@ def create_emission_pie_chart(output_path=None):
         explode=explode,
         textprops={"fontsize": 11, "fontweight": "bold"}
     )
-    
-    ax.set_title("Greenhouse Gas Emission Distribution (tCO₂e)", fontsize=16, fontweight='bold', pad=20)
+
+    ax.set_title(style["title"], fontsize=16, fontweight='bold', pad=20)
     ax.axis('equal')
-    
+
     # Legend
     ax.legend(wedges, [f"Scope 1: {scope1:.2f} t", f"Scope 2: {scope2:.2f} t", f"Scope 3: {scope3:.2f} t"],
               title="Emissions", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
-    
-    plt.tight_layout()
+
+    fig.tight_layout()
+
+    # Write to a temp name first so concurrent readers never see a partial PNG
+    tmp_path = cached_path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp.png")
+    fig.savefig(str(tmp_path), bbox_inches="tight", dpi=style["dpi"], facecolor='white')
+    tmp_path.replace(cached_path)
+    print(f"✓ Pie chart rendered: {cached_path.name}")
+
+
+def create_emission_pie_chart(output_path=None, ctx: Optional[RenderContext] = None):
+    """
+    Create emission pie chart image (raster fallback)
+    
+    Rendered PNGs are cached by a hash of data + style (LRU, at most
+    CHART_CACHE_MAX_ENTRIES files); matplotlib is only imported on a cache miss.
+    """
+    ctx = _context(ctx)
+    style = dict(ctx.chart_style)
+    scope1, scope2, scope3 = _pie_values(ctx.emission)
+    
+    CHART_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cached_path = CHART_CACHE_DIR / f"emission_pie_{_chart_cache_key([scope1, scope2, scope3], style)}.png"
+    
+    with span("environment.render.pie_chart") as chart_span, _render_lock:
+        try:
+            os.utime(cached_path)  # mark as recently used
+            cache_hit = True
+        except FileNotFoundError:
+            cache_hit = False
+        chart_span.set("cache_hit", cache_hit)
+        if cache_hit:
+            print(f"✓ Pie chart cache hit: {cached_path.name}")
+        else:
+            _render_pie_png(cached_path, scope1, scope2, scope3, style)
+            _prune_chart_cache(CHART_CACHE_DIR, max(CHART_CACHE_MAX_ENTRIES, 1))
     
     if output_path is None:
-        output_path = OUTPUT_DIR / "emission_pie_chart.png"
-    
-    plt.savefig(str(output_path), bbox_inches="tight", dpi=300, facecolor='white')
-    plt.close()
+        return cached_path
     
+    shutil.copyfile(cached_path, output_path)
     print(f"✓ Pie chart saved: {output_path}")
-    
     return output_path
 
 
-def create_emission_table_on_slide_right(slide):
+def create_emission_table_on_slide_right(slide, ctx: Optional[RenderContext] = None):
     """Create emission table on right half of slide (reduced 50% width, right-aligned)"""
+    emission = _context(ctx).emission
     # 16:9 width
     slide_w = 13.333
     
@@ -283,29 +499,8 @@ def create_emission_table_on_slide_right(slide):
         p.alignment = PP_ALIGN.CENTER
         cell.vertical_anchor = MSO_ANCHOR.MIDDLE
     
-    # Data rows (using dynamic data)
-    s1_gas = EMISSION_DATA["scope1"]["gasoline"]
-    s1_ref = EMISSION_DATA["scope1"]["refrigerant"]
-    s1_sub = EMISSION_DATA["scope1"]["subtotal"]
-    s2_elec = EMISSION_DATA["scope2"]["electricity"]
-    s2_sub = EMISSION_DATA["scope2"]["subtotal"]
-    s3_sub = EMISSION_DATA["scope3"]["subtotal"]
-    total = EMISSION_DATA["total"]
-    
-    # Calculate percentage
-    s2_percent = (s2_sub / total * 100) if total > 0 else 0
-    
-    data_rows = [
-        ["Scope 1", "Gasoline (Company Vehicles)", f"{s1_gas:.2f}", "Estimate"],
-        ["", "Refrigerant (R-410A)", f"{s1_ref:.2f}", "Maintenance Estimate"],
-        ["Subtotal", "", f"{s1_sub:.2f}", ""],
-        ["Scope 2", "Purchased Electricity", f"{s2_elec:.2f}", f"{s2_percent:.1f}% of Total"],
-        ["Subtotal", "", f"{s2_sub:.2f}", ""],
-        ["Scope 3", "Purchased Goods & Services", "0.00", "Not Included"],
-        ["", "Transportation", "0.00", "Not Included"],
-        ["Subtotal", "", f"{s3_sub:.2f}", ""],
-        ["Total", "", f"{total:.2f}", "100%"],
-    ]
+    # Data rows (using report emission data)
+    data_rows = _table_rows(emission)
     
     for row_idx, row_data in enumerate(data_rows, start=1):
         for col_idx, value in enumerate(row_data):
@@ -326,11 +521,11 @@ def create_emission_table_on_slide_right(slide):
     print("  ✓ Emission table inserted (right half, reduced 50%)")
 
 
-def generate_all():
+def generate_all(ctx: Optional[RenderContext] = None):
     """Generate all emission-related files"""
     print("\n[Generating Emission Engine Output]")
-    table_path = create_emission_table_pptx()
-    chart_path = create_emission_pie_chart()
+    table_path = create_emission_table_pptx(ctx=ctx)
+    chart_path = create_emission_pie_chart(ctx=ctx)
     
     return {
         "table_pptx": table_path,
@@ -18,7 +18,8 @@ ENVIRONMENT_CONFIG = {
     'layout': '16:9',  # Changed to 16:9 aspect ratio
     'font_family': 'Microsoft JhengHei',
     'font_size': 10,  # Small font
-    'table_split': '50_50'  # 50% left and right
+    'table_split': '50_50',  # 50% left and right
+    'emission_chart': 'native'  # 'native' = PowerPoint chart part, 'image' = cached matplotlib PNG
 }
 
 # Detailed Configuration for Each Page
@@ -135,6 +136,12 @@ PAGE_CONFIGS = {
     }
 }
 
+# Pages replaced by the inserted TCFD PPTX (their content_method is never rendered)
+TCFD_INSERTED_PAGES = ('page_3', 'page_4', 'page_5', 'page_6', 'page_7', 'page_8', 'page_9')
+
+# Maximum concurrent LLM calls when prefetching chapter texts
+CONTENT_PREFETCH_WORKERS = 6
+
 # Page Order
 PAGE_ORDER = ['cover', 'page_1', 'page_2', 'page_3', 'page_4', 'page_5', 'page_6', 
               'page_7', 'page_8', 'page_9', 'page_10', 'page_11', 'page_12', 
@@ -154,6 +161,25 @@ ENVIRONMENT_IMAGE_MAPPING = {
     'ecowork': 'picture4-9ecowork.png'
 }
 
+# Placed size of each image on its slide (width, height in inches), used by the asset pack build
+IMAGE_PLACEMENTS = {
+    'cover': (9.0, 5.5),
+    'sustainability_panel': (6.0, 5.5),
+    'policy': (6.0, 5.5),
+    'tcfd_matrix': (6.0, 5.5),
+    'ghg_pie': (6.0, 5.5),
+    'ghg_bar': (6.0, 5.5),
+    'plant': (9.0, 5.5),
+    'water': (6.0, 5.5),
+    'waste': (6.0, 5.5),
+    'ecowork': (9.0, 5.5)
+}
+
+# Pre-optimized image asset pack (built by asset_pack.py on first use)
+ASSET_PACK_PATH = str(pathlib.Path(ASSETS_PATH) / "environment_assets.pack")
+ASSET_PACK_DPI = 150  # Target resolution at placed size
+ASSET_PACK_JPEG_QUALITY = 85
+
 # TCFD Table Mapping (all .py files are in assets folder)
 TCFD_TABLES = {
     'transformation_risk': 'tcfd_table_01_transformation_risk.py',
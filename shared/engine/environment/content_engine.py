@@ -1,7 +1,12 @@
 """
 ESG Report Generator - Content Generation Engine (Environment Chapter)
 """
+import asyncio
 import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
 
 # Try to import anthropic, but don't fail if not available (for test mode)
 try:
@@ -11,7 +16,22 @@ except ImportError:
     ANTHROPIC_AVAILABLE = False
     print("  ⚠ Warning: anthropic module not available. Test mode will be used.")
 
-from config import ANTHROPIC_API_KEY, CLAUDE_MODEL
+from config import ANTHROPIC_API_KEY, CLAUDE_MODEL, CONTENT_PREFETCH_WORKERS
+# Project root (for shared.engine utilities)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from shared.engine.aio import run_sync
+from shared.engine.tracing import span
+from shared.engine.usage_ledger import current_labels, mark_degraded, record_call, usage_labels
+if ANTHROPIC_AVAILABLE:
+    from shared.llm.claude_client import get_pooled_client, get_pooled_async_client
+    from shared.llm.hedging import create_message_async
+    from shared.llm.routing import get_router, is_too_short
+
+@dataclass(frozen=True)
+class TextRequest:
+    """Prompt built by a _prompt_* method, sent by generate_* (sync) or text_async()"""
+    prompt: str
+    max_tokens: int
 
 
 class ContentEngine:
@@ -23,10 +43,11 @@ class ContentEngine:
         
         # Use provided API Key, otherwise use config's
         actual_api_key = api_key or ANTHROPIC_API_KEY
+        self.api_key = actual_api_key
         
         if not test_mode and actual_api_key and ANTHROPIC_AVAILABLE:
             try:
-                self.client = anthropic.Anthropic(api_key=actual_api_key)
+                self.client = get_pooled_client(actual_api_key)
                 print(f"  ✓ ContentEngine initialized (API Key: {actual_api_key[:10]}...)")
             except Exception as e:
                 print(f"  ✗ ContentEngine initialization failed: {e}")
@@ -99,8 +120,8 @@ Please adjust the description tone and recommended amounts based on this size.
         
         return cleaned_text
 
-    def generate(self, prompt, max_tokens=1000):
-        """Call Claude API and clean output"""
+    def _offline_text(self):
+        """Placeholder text when no API call can be made (None when the client is ready)"""
         # Test mode: return placeholder text
         if self.test_mode:
             return "[Test Mode] This is where LLM-generated content will appear. During actual execution, professional ESG report content will be generated by Claude API. Our company is committed to sustainable development and actively implements environmental protection policies."
@@ -112,35 +133,154 @@ Please adjust the description tone and recommended amounts based on this size.
             error_msg = "[Content Generation Failed: API Key not provided or client not initialized]"
             print(f"✗ {error_msg}")
             return error_msg
+        return None
+
+    def generate(self, prompt, max_tokens=1000):
+        """Call Claude API and clean output (sync wrapper of generate_async)"""
+        offline = self._offline_text()
+        if offline is not None:
+            return offline
+        return run_sync(self.generate_async(prompt, max_tokens))
+
+    async def generate_async(self, prompt, max_tokens=1000):
+        """Call Claude API (AsyncAnthropic) and clean output"""
+        offline = self._offline_text()
+        if offline is not None:
+            return offline
         
+        # Model tier from the routing table; prose well short of the requested
+        # length is retried once on the escalated tier (if there is a higher one)
+        router = get_router()
+        tier = router.tier_for(current_labels().get("prompt"))
         try:
-            message = self.client.messages.create(
-                model=CLAUDE_MODEL,
-                max_tokens=max_tokens,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
-            # ✅ Clean output before returning
-            raw_text = message.content[0].text
-            cleaned_text = self._clean_llm_output(raw_text)
-            return cleaned_text
+            text = await self._call_model_async(router.model_for_tier(tier), prompt, max_tokens)
+            if is_too_short(prompt, text) and router.can_escalate(tier):
+                router.record(tier, quality_retry=True)
+                tier = router.escalate(tier)
+                text = await self._call_model_async(router.model_for_tier(tier), prompt, max_tokens)
+            router.record(tier)
+            return text
         except Exception as e:
+            mark_degraded(type(e).__name__)
             error_msg = f"[Content Generation Failed: {e}]"
             print(f"✗ Claude API Error: {e}")
             print(f"  ⚠ Falling back to test mode placeholder text")
             return "[Test Mode] API call failed. This is placeholder text for testing purposes."
 
+    async def _call_model_async(self, model, prompt, max_tokens):
+        """One API call (falls back to CLAUDE_MODEL if the routed model is unavailable); returns cleaned text"""
+        client = get_pooled_async_client(self.api_key)
+        started = time.perf_counter()
+        models = list(dict.fromkeys([model, CLAUDE_MODEL]))
+        for attempt, model_name in enumerate(models):
+            try:
+                with span("llm.call", provider="anthropic", model=model_name, max_tokens=max_tokens,
+                          prompt_chars=len(prompt)) as llm_span:
+                    message = await create_message_async(
+                        client, current_labels().get("prompt"),
+                        model=model_name,
+                        max_tokens=max_tokens,
+                        messages=[{
+                            "role": "user",
+                            "content": prompt
+                        }]
+                    )
+                    usage = getattr(message, "usage", None)
+                    if usage is not None:
+                        llm_span.set_attributes(input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+            except Exception as e:
+                if attempt + 1 < len(models) and ("not_found_error" in str(e) or "404" in str(e)):
+                    continue
+                record_call(model_name, time.perf_counter() - started, retries=attempt, error=e)
+                raise
+            record_call(model_name, time.perf_counter() - started, message, retries=attempt)
+            # ✅ Clean output before returning
+            return self._clean_llm_output(message.content[0].text)
+
+    async def text_async(self, method_name, config, *args):
+        """
+        Async version of a generate_* method: builds its prompt with the matching
+        _prompt_* method, then awaits generate_async
+        
+        Example:
+            text = await engine.text_async("generate_water_management", config)
+        """
+        builder = getattr(self, "_prompt_" + method_name.removeprefix("generate_"))
+        request = builder(config, *args)
+        return await self.generate_async(request.prompt, max_tokens=request.max_tokens)
+
+    def prefetch(self, calls, config, max_workers=CONTENT_PREFETCH_WORKERS, pages=None):
+        """
+        Run generate_* methods concurrently (bounded) ahead of slide layout
+        
+        Args:
+            calls: List of (method_name, extra_args) tuples, e.g. ("generate_water_management", ())
+            config: Chapter config passed as the first argument of every method
+            max_workers: Maximum concurrent API calls
+            pages: Optional dict of method_name -> page key (usage ledger labels)
+        
+        Returns:
+            Dict of (method_name, extra_args) -> generated text
+        """
+        calls = list(dict.fromkeys(calls))
+        if not calls:
+            return {}
+        
+        # Test mode returns placeholders instantly; no need for the event loop
+        if self.test_mode:
+            with span("content.prefetch", calls=len(calls), test_mode=True):
+                results = {}
+                for method_name, extra_args in calls:
+                    with span("content.generate", method=method_name), \
+                            usage_labels(prompt=method_name, page=(pages or {}).get(method_name)):
+                        results[(method_name, extra_args)] = getattr(self, method_name)(config, *extra_args)
+                return results
+        return run_sync(self.prefetch_async(calls, config, max_workers=max_workers, pages=pages))
+
+    async def prefetch_async(self, calls, config, max_workers=CONTENT_PREFETCH_WORKERS, pages=None):
+        """Async version of prefetch (same arguments and result)"""
+        calls = list(dict.fromkeys(calls))
+        if not calls:
+            return {}
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+        
+        async def run(call):
+            method_name, extra_args = call
+            async with semaphore:
+                with span("content.generate", method=method_name), \
+                        usage_labels(prompt=method_name, page=(pages or {}).get(method_name)):
+                    return await self.text_async(method_name, config, *extra_args)
+        
+        results = {}
+        with span("content.prefetch", calls=len(calls), max_workers=max_workers) as prefetch_span:
+            outcomes = await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+            for call, outcome in zip(calls, outcomes):
+                if isinstance(outcome, Exception):
+                    # Leave it out; the layout pass will generate it inline
+                    print(f"  ⚠ Prefetch failed for {call[0]}: {outcome}")
+                else:
+                    results[call] = outcome
+            prefetch_span.set("completed", len(results))
+        print(f"  ✓ Prefetched {len(results)}/{len(calls)} texts (max {max_workers} concurrent)")
+        return results
+
     # ==================== Environment Chapter Content Generation Methods ====================
 
     def generate_environmental_cover(self, config):
         """Environmental Chapter Cover Introduction - 50-70 words (for right text box)"""
+        request = self._prompt_environmental_cover(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_environmental_cover(self, config):
         prompt = """Write 50-70 words for the ESG report environmental chapter introduction, including: climate change challenges, corporate environmental responsibility, sustainability commitments, and TCFD establishment. Use a professional and warm tone. Use "we" and "our company" instead of third-person expressions like "this company" or "the enterprise". Keep it concise and impactful."""
-        return self.generate(prompt, max_tokens=300)
+        return TextRequest(prompt, max_tokens=300)
 
     def generate_sustainability_committee(self, config):
         """Sustainability Committee Organizational Structure Description - 140-160 words (including company size)"""
+        request = self._prompt_sustainability_committee(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_sustainability_committee(self, config):
         company_context = self._get_company_context()
         # Get annual revenue information (including Arabic numerals)
         revenue_display = self.company_profile.get("revenue_display", "Unknown")
@@ -148,15 +288,23 @@ Please adjust the description tone and recommended amounts based on this size.
 Our company's annual revenue is approximately {revenue_display}.
 {company_context}
 Please adjust the description based on company size. For example, small and medium-sized enterprises can emphasize "streamlined and efficient organizational structure," while medium-sized enterprises can emphasize "comprehensive cross-departmental collaboration"."""
-        return self.generate(prompt, max_tokens=600)
+        return TextRequest(prompt, max_tokens=600)
 
     def generate_policy_description(self, config):
         """Environmental Policy Four Dimensions Description - 140-160 words"""
+        request = self._prompt_policy_description(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_policy_description(self, config):
         prompt = """Write 140-160 words describing the environmental policy four dimensions pie chart, including: policy formulation philosophy, discussion of four-dimensional risk monitoring, risk definition, significance and importance of risk assessment and response, and overall environmental strategy. Use first-person expressions like "we" and "our company"."""
-        return self.generate(prompt, max_tokens=600)
+        return TextRequest(prompt, max_tokens=600)
 
     def generate_tcfd_financial_disclosure(self, config):
         """4.3 TCFD Climate-Related Financial Disclosure Description - 140-160 words"""
+        request = self._prompt_tcfd_financial_disclosure(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_tcfd_financial_disclosure(self, config):
         company_context = self._get_company_context()
         prompt = f"""Write 140-160 words for the ESG report describing TCFD climate-related financial disclosure, including:
 1. TCFD framework introduction and importance
@@ -167,25 +315,41 @@ Please adjust the description based on company size. For example, small and medi
 Use a professional tone, use first-person expressions like "our company" and "we".
 {company_context}
 Please adjust the description based on company size. For example, small and medium-sized enterprises can emphasize "gradually establishing TCFD management mechanisms," while medium-sized enterprises can emphasize "comprehensive TCFD risk assessment system"."""
-        return self.generate(prompt, max_tokens=600)
+        return TextRequest(prompt, max_tokens=600)
 
     def generate_tcfd_matrix_analysis(self, config):
         """TCFD Risk Matrix Analysis - 140-160 words"""
+        request = self._prompt_tcfd_matrix_analysis(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_tcfd_matrix_analysis(self, config):
         prompt = """Write 140-160 words of detailed description for the TCFD risk matrix diagram, including: purpose and significance of the matrix diagram including rising market customer preference for sustainable products, which is a brand premium opportunity; B2B customers' increasing ESG requirements leading to more collaboration and supply chain integration opportunities; impact severity and probability assessment criteria such as cost pressures, climate change leading to increased energy costs, carbon tax impacts, etc.; priority judgment mechanisms, and risk management strategies. Use first-person expressions like "we" and "our company"."""
-        return self.generate(prompt, max_tokens=600)
+        return TextRequest(prompt, max_tokens=600)
 
     def generate_ghg_calculation_method(self, config):
         """Carbon Emission Calculation Method Description - 140-160 words"""
+        request = self._prompt_ghg_calculation_method(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_ghg_calculation_method(self, config):
         prompt = """Write 140-160 words describing the carbon emission data table, including: definitions of the three greenhouse gas scopes, GHG Protocol calculation standards, estimation methods for each scope, data collection where electricity consumption multiplied by industry coefficients accounts for over 90% of total carbon emissions, and should comply with GRI requirements. Use first-person expressions like "we" and "our company"."""
-        return self.generate(prompt, max_tokens=600)
+        return TextRequest(prompt, max_tokens=600)
 
     def generate_electricity_policy(self, config):
         """Electricity Usage and Energy Conservation Policy - 140-160 words"""
+        request = self._prompt_electricity_policy(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_electricity_policy(self, config):
         prompt = """Write 140-160 words describing electricity usage and energy conservation policy, including: importance of electricity in carbon emissions, general energy-saving measures, energy management policies, and strategies for improving electricity usage efficiency. Use first-person expressions like "we" and "our company"."""
-        return self.generate(prompt, max_tokens=600)
+        return TextRequest(prompt, max_tokens=600)
 
     def generate_energy_efficiency_measures(self, config):
         """Energy Efficiency Measures Description - 140-160 words (including investment budget recommendations)"""
+        request = self._prompt_energy_efficiency_measures(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_energy_efficiency_measures(self, config):
         company_context = self._get_company_context()
         
         # Get specific budget figures and annual revenue information (including Arabic numerals)
@@ -196,30 +360,50 @@ Please adjust the description based on company size. For example, small and medi
 Our company's annual revenue is approximately {revenue_display}.
 {company_context}
 Please mention specific investment plans in the text, for example, "Our company plans to invest approximately {budget_display} in energy-saving equipment updates," and explain expected benefits (such as energy-saving rate, investment payback period). Ensure recommended amounts are appropriate for company size."""
-        return self.generate(prompt, max_tokens=600)
+        return TextRequest(prompt, max_tokens=600)
 
     def generate_green_planting_program(self, config):
         """Green Planting Program Description - 50-70 words (for right text box)"""
+        request = self._prompt_green_planting_program(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_green_planting_program(self, config):
         prompt = """Write 50-70 words describing the green planting program, including: SDGs biodiversity goals, importance of ecological diversity, forest adoption and restoration plans, and benefits of green factory planting. Use first-person expressions like "we" and "our company". Keep it concise and impactful."""
-        return self.generate(prompt, max_tokens=300)
+        return TextRequest(prompt, max_tokens=300)
 
     def generate_water_management(self, config):
         """Water Resource Management Description - 140-160 words"""
+        request = self._prompt_water_management(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_water_management(self, config):
         prompt = """Write 140-160 words describing water resource management, including: importance of water resource environmental protection, water conservation plan measures, water usage efficiency improvement, and water resource recycling strategies. Use first-person expressions like "we" and "our company"."""
-        return self.generate(prompt, max_tokens=600)
+        return TextRequest(prompt, max_tokens=600)
 
     def generate_waste_management(self, config):
         """Waste Management Description - 140-160 words"""
+        request = self._prompt_waste_management(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_waste_management(self, config):
         prompt = """Write 140-160 words describing waste management, including: waste classification and treatment, circular economy concepts, waste reduction measures, and resource recycling and reuse processes. Use first-person expressions like "we" and "our company"."""
-        return self.generate(prompt, max_tokens=600)
+        return TextRequest(prompt, max_tokens=600)
 
     def generate_environmental_education(self, config):
         """Environmental Education and Cooperation Description - 50-70 words (for right text box)"""
+        request = self._prompt_environmental_education(config)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_environmental_education(self, config):
         prompt = """Write 50-70 words describing environmental education and cooperation, including: student education camp activities, employee family day environmental advocacy, wetland ecology recording plans, and community environmental cooperation projects. Use first-person expressions like "we" and "our company". Keep it concise and impactful."""
-        return self.generate(prompt, max_tokens=300)
+        return TextRequest(prompt, max_tokens=300)
 
     def generate_sasb_analysis(self, config, industry, sasb_code, sasb_name):
         """SASB Industry Classification Analysis - 150-170 words"""
+        request = self._prompt_sasb_analysis(config, industry, sasb_code, sasb_name)
+        return self.generate(request.prompt, max_tokens=request.max_tokens)
+
+    def _prompt_sasb_analysis(self, config, industry, sasb_code, sasb_name):
         company_context = self._get_company_context()
         revenue_display = self.company_profile.get("revenue_display", "Unknown")
         
@@ -240,4 +424,4 @@ From an ESG expert's perspective, for the "{industry}" industry (SASB Classifica
 Please clearly list 5 recommendations and explain why these issues are particularly important for the "{industry}" industry.
 
 Use a professional tone, use first-person expressions like "we" and "our company". Keep it concise within 150-170 words."""
-        return self.generate(prompt, max_tokens=600)
\ No newline at end of file
+        return TextRequest(prompt, max_tokens=600)
\ No newline at end of file
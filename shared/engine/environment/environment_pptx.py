@@ -9,22 +9,38 @@ from pptx.enum.shapes import MSO_SHAPE
 from pathlib import Path
 import os
 import glob
-import copy
 from lxml import etree
 
-from config import ENVIRONMENT_CONFIG, ENVIRONMENT_IMAGE_MAPPING, TCFD_TABLES, ASSETS_PATH
+from config import (
+    ENVIRONMENT_CONFIG, ENVIRONMENT_IMAGE_MAPPING, TCFD_TABLES, ASSETS_PATH,
+    PAGE_CONFIGS, PAGE_ORDER, TCFD_INSERTED_PAGES
+)
 from content_engine import ContentEngine
+from asset_pack import get_asset_pack
 
 # 加入 assets 路徑
 import sys
 sys.path.insert(0, str(Path(__file__).parent / "assets"))
 # Note: TCFD_main_pptx no longer needed - we insert TCFD PPTX file directly
 try:
-    from emission_pptx import create_emission_table_on_slide_right
+    from emission_pptx import (
+        EmissionData, RenderContext, generate_all as generate_emission_outputs,
+        create_emission_table_on_slide_right, add_emission_pie_chart_on_slide
+    )
 except ImportError:
     print("  ⚠ Warning: emission_pptx module not found, emission table may not work")
+    EmissionData = RenderContext = generate_emission_outputs = None
     create_emission_table_on_slide_right = None
+    add_emission_pie_chart_on_slide = None
 sys.path.append(ASSETS_PATH)
+# Project root (for shared.engine utilities)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from shared.engine.pptx_writer import write_pptx
+from shared.engine.slide_graft import SlideGrafter
+from shared.engine.run_manifest import ArtifactRef, RunManifest, TCFD_DECK, EMISSION_TABLE, EMISSION_PIE, ENVIRONMENT_DECK
+from shared.engine.path_manager import session_run_manifest
+from shared.engine.tracing import span, traced
+from shared.engine.usage_ledger import degraded_reasons, metered, usage_labels
 
 # ============ SASB 產業映射 ============
 SASB_MAP = {
@@ -104,7 +120,7 @@ EMISSION_OUTPUT_PATH = Path(__file__).parent / "output"
 class EnvironmentPPTXEngine:
     """Environment Chapter PPTX Report Generation Engine"""
 
-    def __init__(self, template_path=None, test_mode=False, emission_data=None, industry="企業", tcfd_output_folder=None, emission_output_folder=None, company_profile=None, api_key=None):
+    def __init__(self, template_path=None, test_mode=False, emission_data=None, industry="企業", tcfd_output_folder=None, emission_output_folder=None, company_profile=None, api_key=None, chart_mode=None, manifest=None):
         """
         Initialize engine
         template_path: Template file path (optional, defaults to handdrawppt.pptx in assets)
@@ -115,11 +131,19 @@ class EnvironmentPPTXEngine:
         emission_output_folder: Emission output folder path (from Step 2)
         company_profile: Company size information dict (from Step 2)
         api_key: Claude API Key
+        chart_mode: 'native' (PowerPoint chart) or 'image' (PNG); defaults to ENVIRONMENT_CONFIG['emission_chart']
+        manifest: RunManifest of this run (defaults to the Streamlit session's manifest, else
+                  a fresh one per engine); TCFD / emission inputs are resolved from it, directories
+                  are only searched as an unrecorded fallback when it has no entry (with a warning)
         """
         self.emission_data = emission_data or {}
+        self.chart_mode = chart_mode or ENVIRONMENT_CONFIG.get('emission_chart', 'native')
+        # Request-scoped, immutable emission data for the table / pie chart (no module globals)
+        self.render_context = RenderContext(emission=EmissionData.from_dict(self.emission_data)) if RenderContext else None
         self.industry = industry
         self.tcfd_output_folder = tcfd_output_folder  # Step 1 的 TCFD 輸出路徑
         self.emission_output_folder = emission_output_folder  # Step 2 的 Emission 輸出路徑
+        self.manifest = manifest if manifest is not None else (session_run_manifest() or RunManifest())
         self.company_profile = company_profile or {}
         self.api_key = api_key
         
@@ -170,6 +194,7 @@ class EnvironmentPPTXEngine:
         else:
             print(f"  ⚠ EnvironmentPPTXEngine did not receive API Key")
         
+        self.texts = {}  # (content_method, extra_args) -> text, filled by prefetch_texts()
         self.content_engine = ContentEngine(
             test_mode=test_mode, 
             company_profile=self.company_profile,
@@ -188,6 +213,37 @@ class EnvironmentPPTXEngine:
         self.primary_color = RGBColor(26, 58, 46)  # 深綠色
         self.secondary_color = RGBColor(74, 124, 89)  # 淺綠色
 
+    def _text_calls(self):
+        """All LLM text requests this chapter needs, from PAGE_CONFIGS plus the SASB page"""
+        calls = [
+            (PAGE_CONFIGS[page]['content_method'], ())
+            for page in PAGE_ORDER
+            if page not in TCFD_INSERTED_PAGES and PAGE_CONFIGS.get(page, {}).get('content_method')
+        ]
+        sasb_code, sasb_name = get_sasb(self.industry)
+        calls.append(('generate_sasb_analysis', (self.industry, sasb_code, sasb_name)))
+        return calls
+
+    def _text_pages(self):
+        """content_method -> page key (labels for the usage ledger)"""
+        pages = {cfg['content_method']: page for page, cfg in PAGE_CONFIGS.items() if cfg.get('content_method')}
+        pages['generate_sasb_analysis'] = 'sasb'
+        return pages
+
+    @traced("environment.prefetch")
+    def prefetch_texts(self):
+        """Generate every chapter text concurrently before layout"""
+        print("\n[Prefetching Chapter Texts]")
+        self.texts = self.content_engine.prefetch(self._text_calls(), self.config, pages=self._text_pages())
+
+    def _text(self, method_name, *extra_args):
+        """Prefetched text for a content method (generated inline if missing)"""
+        text = self.texts.get((method_name, extra_args))
+        if text is None:
+            with usage_labels(prompt=method_name, page=self._text_pages().get(method_name)):
+                text = getattr(self.content_engine, method_name)(self.config, *extra_args)
+        return text
+
     def _get_blank_layout(self):
         """Get blank layout"""
         # Prefer index 6 (standard blank layout)
@@ -287,7 +343,15 @@ class EnvironmentPPTXEngine:
         return text_box
 
     def _add_image(self, slide, image_name, left, top, width=None, height=None):
-        """Add image to slide (from assets folder)"""
+        """Add image to slide (from asset pack, falling back to assets folder)"""
+        pack = get_asset_pack()
+        if pack is not None and image_name in pack:
+            try:
+                pic = slide.shapes.add_picture(pack.open(image_name), left, top, width, height)
+                print(f"  ✓ Image inserted (pack): {image_name}")
+                return pic
+            except Exception as e:
+                print(f"  ⚠ Packed image insertion failed, using original: {image_name} - {e}")
         image_path = os.path.join(ASSETS_PATH, image_name)
         return self._add_image_full_path(slide, image_path, left, top, width, height)
 
@@ -398,11 +462,12 @@ class EnvironmentPPTXEngine:
 
     # ==================== 各章節生成方法 ====================
 
+    @traced("environment.render.cover")
     def generate_cover_page(self):
         """Generate cover page"""
         print("\n[Generating Cover Page]")
         
-        cover_text = self.content_engine.generate_environmental_cover(self.config)
+        cover_text = self._text('generate_environmental_cover')
         # Custom layout: left image 50% wider, right text 60% narrower (40% of original width)
         slide = self._add_slide()
         self._add_title(slide, "Chapter 4 Environmental Sustainability")
@@ -426,12 +491,13 @@ class EnvironmentPPTXEngine:
         
         print("✓ Cover page completed")
 
+    @traced("environment.render.policy")
     def generate_policy_pages(self):
         """Generate 4.1-4.2 Environmental Policy Pages"""
         print("\n[Generating Environmental Policy Pages]")
         
         # Page 1: 4.1 Environmental Policy and Management Framework
-        sustainability_text = self.content_engine.generate_sustainability_committee(self.config)
+        sustainability_text = self._text('generate_sustainability_committee')
         self._create_left_image_right_text_slide(
             "4.1 Environmental Policy and Management Framework",
             ENVIRONMENT_IMAGE_MAPPING['sustainability_panel'],
@@ -439,7 +505,7 @@ class EnvironmentPPTXEngine:
         )
         
         # Page 2: 4.2 Four Dimensions of Environmental Policy
-        policy_text = self.content_engine.generate_policy_description(self.config)
+        policy_text = self._text('generate_policy_description')
         self._create_left_text_right_image_slide(
             "4.2 Four Dimensions of Environmental Policy",
             policy_text,
@@ -501,88 +567,74 @@ class EnvironmentPPTXEngine:
         print(f"  ✗ TCFD file not found in any search path")
         return None
 
+    def _resolve_tcfd_deck(self):
+        """TCFD deck from the run manifest (directory search only as a fallback, never recorded)"""
+        ref = self.manifest.resolve(TCFD_DECK)
+        if ref:
+            print(f"  ✓ TCFD deck from run manifest: {ref.artifact_id} (sha256 {ref.sha256[:12]})")
+            return ref
+        print("  ⚠ TCFD deck not recorded in run manifest, falling back to directory search")
+        tcfd_file = self._find_latest_tcfd_file()
+        return ArtifactRef.from_file(TCFD_DECK, tcfd_file, step="tcfd") if tcfd_file else None
+
     def _copy_slide_from_pptx(self, source_pptx_path):
-        """Copy slide content from another PPTX"""
+        """Copy slide content from another PPTX (slides are grafted onto the blank layout)"""
         try:
             source_prs = Presentation(source_pptx_path)
-            
-            for source_slide in source_prs.slides:
-                # Add blank slide
-                new_slide = self._add_slide()
-                
-                # Copy all shapes
-                for shape in source_slide.shapes:
-                    try:
-                        # Copy shape XML
-                        el = shape.element
-                        new_el = copy.deepcopy(el)
-                        new_slide.shapes._spTree.insert_element_before(new_el, 'p:extLst')
-                    except Exception as e:
-                        print(f"    ⚠ Warning when copying shape: {e}")
-                
+            blank_layout = self._get_blank_layout()
+            for new_slide in SlideGrafter(self.prs).graft(source_prs, layout_resolver=lambda _layout: blank_layout):
+                self._add_watermark(new_slide)
             return True
         except Exception as e:
             print(f"  ✗ Slide copy failed: {e}")
             return False
 
-    def _insert_tcfd_pptx(self, pptx_path, title):
-        """Insert all slides from TCFD PPTX file (should contain 7 pages)"""
+    def _insert_tcfd_pptx(self, tcfd_ref, title):
+        """
+        Graft all slides from the TCFD deck (should contain 7 pages)
+        
+        Returns:
+            Number of inserted slides (0 on failure)
+        """
         try:
-            source_prs = Presentation(pptx_path)
-            slide_count = len(source_prs.slides)
+            with tcfd_ref.open() as stream:
+                source_prs = Presentation(stream)
             
-            print(f"  ℹ TCFD file contains {slide_count} slides")
+            # Move slide parts (with media) into this deck, onto our blank layout
+            blank_layout = self._get_blank_layout()
+            grafted = SlideGrafter(self.prs).graft(source_prs, layout_resolver=lambda _layout: blank_layout)
             
-            for idx, source_slide in enumerate(source_prs.slides):
-                # Add blank slide (using template's white background)
-                new_slide = self._add_slide()
-                
-                # Don't copy background, keep new slide's white background
+            for new_slide in grafted:
                 # Explicitly set background to white (ensure it's not black)
                 try:
                     new_slide.background.fill.solid()
                     new_slide.background.fill.fore_color.rgb = RGBColor(255, 255, 255)  # White
                 except:
                     pass
-                
-                # Copy all shapes (but not background)
-                for shape in source_slide.shapes:
-                    try:
-                        el = shape.element
-                        new_el = copy.deepcopy(el)
-                        new_slide.shapes._spTree.insert_element_before(new_el, 'p:extLst')
-                    except Exception as e:
-                        # If copy fails, try other methods
-                        pass
-                
-            print(f"  ✓ Inserted {slide_count} slides from {title}: {os.path.basename(pptx_path)}")
-            return True
+                self._add_watermark(new_slide)
+            
+            print(f"  ✓ Inserted {len(grafted)} slides from {title}: {tcfd_ref.artifact_id}")
+            return len(grafted)
         except Exception as e:
             print(f"  ✗ Insertion failed {title}: {e}")
-            return False
+            return 0
 
+    @traced("environment.tcfd_graft")
     def generate_tcfd_pages(self):
         """Generate TCFD pages (inserted from TCFD Generator - single PPTX file with 7 pages)"""
         print("\n[Generating TCFD Pages]")
         print("  Pages 5-11: Inserting TCFD PPTX file (7 pages)")
         
-        # Find TCFD PPTX file (single file containing 7 pages)
-        tcfd_file = self._find_latest_tcfd_file()
+        # Resolve the TCFD deck (single file containing 7 pages)
+        tcfd_ref = self._resolve_tcfd_deck()
         
-        if tcfd_file and os.path.exists(tcfd_file):
-            # Insert all slides from the TCFD PPTX file (should be 7 pages)
-            print(f"  ✓ Inserting TCFD slides from: {os.path.basename(tcfd_file)}")
-            self._insert_tcfd_pptx(tcfd_file, "TCFD 7 Pages")
+        if tcfd_ref:
+            # Insert all slides from the TCFD deck (should be 7 pages)
+            slide_count = self._insert_tcfd_pptx(tcfd_ref, "TCFD 7 Pages")
             
             # Verify slide count
-            try:
-                source_prs = Presentation(tcfd_file)
-                slide_count = len(source_prs.slides)
-                print(f"  ✓ TCFD file contains {slide_count} slides")
-                if slide_count != 7:
-                    print(f"  ⚠ Warning: Expected 7 slides, but found {slide_count} slides")
-            except Exception as e:
-                print(f"  ⚠ Could not verify slide count: {e}")
+            if slide_count and slide_count != 7:
+                print(f"  ⚠ Warning: Expected 7 slides, but found {slide_count} slides")
         else:
             # If file not found, create placeholder pages
             print(f"  ⚠ TCFD file not found, creating placeholder pages")
@@ -608,6 +660,7 @@ class EnvironmentPPTXEngine:
         
         print("✓ TCFD pages completed (Pages 5-11: 7 pages from single PPTX file)")
 
+    @traced("environment.render.sasb")
     def generate_sasb_page(self):
         """Generate SASB Industry Classification page (Page 12)"""
         print("\n[Generating SASB Page]")
@@ -621,12 +674,7 @@ class EnvironmentPPTXEngine:
         sasb_code, sasb_name = get_sasb(self.industry)
         
         # Left side: LLM-generated analysis text (150-170 words)
-        sasb_analysis_text = self.content_engine.generate_sasb_analysis(
-            self.config, 
-            self.industry, 
-            sasb_code, 
-            sasb_name
-        )
+        sasb_analysis_text = self._text('generate_sasb_analysis', self.industry, sasb_code, sasb_name)
         self._add_text_box(sasb_slide, sasb_analysis_text,
                           left=LEFT_CONTENT_LEFT, 
                           top=CONTENT_TOP, 
@@ -742,62 +790,83 @@ class EnvironmentPPTXEngine:
         
         print(f"  ✓ SASB table inserted (Code: {sasb_code}, Category: {sasb_name}, Current Classification: {current_category_prefix})")
 
+    @traced("environment.emission_outputs")
     def _generate_emission_outputs(self):
-        """Get emission outputs (prefer using Step 2 generated files)"""
+        """
+        Get emission outputs: run manifest first (only refs recorded for this report's
+        emission data), then (fallback, with a warning, not recorded) the Step 2 output
+        folder, else render them and record them under the emission data key
         
-        # Prefer using Step 2 provided output folder
-        if self.emission_output_folder and os.path.exists(self.emission_output_folder):
-            print(f"  ✓ Using Step 2 Emission output: {self.emission_output_folder}")
+        Returns:
+            Dict with "table_pptx" / "pie_chart" paths, or None
+        """
+        results = {}
+        emission_key = self._emission_key()
+        for key, kind in (("table_pptx", EMISSION_TABLE), ("pie_chart", EMISSION_PIE)):
+            ref = self.manifest.resolve(kind, key=emission_key) if emission_key else None
+            if ref:
+                results[key] = str(ref.local_path())
+                print(f"  ✓ {kind} from run manifest: {ref.artifact_id}")
+        if not results and self.emission_output_folder and os.path.exists(self.emission_output_folder):
+            print(f"  ⚠ Emission outputs not recorded in run manifest, searching Step 2 output: {self.emission_output_folder}")
             
             # Find table and pie chart files
             table_files = glob.glob(os.path.join(self.emission_output_folder, "Emission_Table_*.pptx"))
             pie_files = glob.glob(os.path.join(self.emission_output_folder, "Emission_PieChart*.png"))
             
-            results = {}
             if table_files:
                 results["table_pptx"] = max(table_files, key=os.path.getmtime)
                 print(f"  ✓ Found table: {os.path.basename(results['table_pptx'])}")
             if pie_files:
                 results["pie_chart"] = max(pie_files, key=os.path.getmtime)
                 print(f"  ✓ Found pie chart: {os.path.basename(results['pie_chart'])}")
-            
-            if results:
-                return results
+        
+        if results:
+            return results
         
         # Fallback: call engine to regenerate
         try:
-            print("  ℹ Step 2 output not found, regenerating...")
-            from emission_pptx import generate_all
-            results = generate_all()
+            print("  ℹ Emission outputs not recorded, regenerating...")
+            results = generate_emission_outputs(ctx=self.render_context)
+            self._record_emission_outputs(results)
             return results
         except Exception as e:
             print(f"  ⚠ Emission engine error: {e}")
             return None
 
+    def _emission_key(self):
+        """Key of this report's emission data (None when the emission engine is unavailable)"""
+        return self.render_context.emission.content_key() if self.render_context else None
+
+    def _record_emission_outputs(self, results):
+        """Record rendered emission table / pie chart files under the emission data key"""
+        emission_key = self._emission_key()
+        if not emission_key:
+            return
+        for key, kind in (("table_pptx", EMISSION_TABLE), ("pie_chart", EMISSION_PIE)):
+            if results.get(key):
+                self.manifest.record(ArtifactRef.from_file(kind, results[key], step="emission", key=emission_key))
+
+    @traced("environment.render.ghg")
     def generate_ghg_pages(self):
         """Generate Greenhouse Gas Emission Management Pages"""
         print("\n[Generating GHG Management Pages]")
         print("  Pages 13-15: GHG Management")
         
-        # Set emission data from step1 emission engine BEFORE generating table
-        # This ensures the table uses the calculated results from step1
+        # Table and chart draw from self.render_context (emission data from step1)
         if self.emission_data:
-            try:
-                from assets.emission_pptx import set_emission_data
-                set_emission_data(self.emission_data)
-                print(f"  ✓ Emission data loaded from step1: Total {self.emission_data.get('total', 0):.2f} tCO₂e")
-            except Exception as e:
-                print(f"  ⚠ Unable to load emission data: {e}")
+            print(f"  ✓ Emission data loaded from step1: Total {self.render_context.emission.total:.2f} tCO₂e")
         
-        # First generate emission engine outputs
-        emission_results = self._generate_emission_outputs()
+        # Native chart is built directly from emission data; only the image mode needs rendered outputs
+        use_native_chart = self.chart_mode == 'native' and add_emission_pie_chart_on_slide is not None
+        emission_results = None if use_native_chart else self._generate_emission_outputs()
         
         # Page 13: 4.5 Carbon Inventory Table (left text right table)
         section_slide = self._add_slide()
         self._add_title(section_slide, "4.5 Carbon Inventory Table")
         
         # Left side: Text description
-        ghg_text = self.content_engine.generate_ghg_calculation_method(self.config)
+        ghg_text = self._text('generate_ghg_calculation_method')
         self._add_text_box(section_slide, ghg_text,
                           left=LEFT_CONTENT_LEFT, 
                           top=CONTENT_TOP, 
@@ -806,12 +875,25 @@ class EnvironmentPPTXEngine:
                           font_size=Pt(12))
         
         # Right side: Emission table (reduced 50%, right-aligned)
-        # This will use the emission_data set above from step1
-        create_emission_table_on_slide_right(section_slide)
+        create_emission_table_on_slide_right(section_slide, ctx=self.render_context)
         
         # Page 14: Electricity Usage and Energy Conservation Policy (using emission pie chart)
-        electricity_text = self.content_engine.generate_electricity_policy(self.config)
-        if emission_results and "pie_chart" in emission_results:
+        electricity_text = self._text('generate_electricity_policy')
+        if use_native_chart:
+            slide = self._add_slide()
+            self._add_title(slide, "Electricity Usage and Energy Conservation Policy")
+            add_emission_pie_chart_on_slide(slide,
+                                            left=LEFT_CONTENT_LEFT,
+                                            top=CONTENT_TOP,
+                                            width=CONTENT_WIDTH,
+                                            height=CONTENT_HEIGHT,
+                                            ctx=self.render_context)
+            self._add_text_box(slide, electricity_text,
+                              left=RIGHT_CONTENT_LEFT,
+                              top=CONTENT_TOP,
+                              width=CONTENT_WIDTH,
+                              height=CONTENT_HEIGHT)
+        elif emission_results and "pie_chart" in emission_results:
             # Use emission-generated pie chart
             pie_chart_path = emission_results["pie_chart"]
             self._create_left_image_right_text_slide_full_path(
@@ -828,7 +910,7 @@ class EnvironmentPPTXEngine:
             )
         
         # Page 15: Energy Efficiency Measures
-        efficiency_text = self.content_engine.generate_energy_efficiency_measures(self.config)
+        efficiency_text = self._text('generate_energy_efficiency_measures')
         self._create_left_text_right_image_slide(
             "Energy Efficiency Measures",
             efficiency_text,
@@ -837,13 +919,14 @@ class EnvironmentPPTXEngine:
         
         print("✓ GHG management pages completed (Pages 13-15)")
 
+    @traced("environment.render.management")
     def generate_environmental_management_pages(self):
         """Generate Environmental Management Pages"""
         print("\n[Generating Environmental Management Pages]")
         print("  Pages 16-19: Environmental Management")
         
         # Page 16: 4.6 Green Planting (custom layout: left image 50% wider, right text 40% width)
-        plant_text = self.content_engine.generate_green_planting_program(self.config)
+        plant_text = self._text('generate_green_planting_program')
         slide = self._add_slide()
         self._add_title(slide, "4.6 Green Planting")
         
@@ -865,7 +948,7 @@ class EnvironmentPPTXEngine:
                           height=CONTENT_HEIGHT)
         
         # Page 17: 4.7 Water Resource Management
-        water_text = self.content_engine.generate_water_management(self.config)
+        water_text = self._text('generate_water_management')
         self._create_left_text_right_image_slide(
             "4.7 Water Resource Management",
             water_text,
@@ -873,7 +956,7 @@ class EnvironmentPPTXEngine:
         )
         
         # Page 18: 4.8 Waste Management
-        waste_text = self.content_engine.generate_waste_management(self.config)
+        waste_text = self._text('generate_waste_management')
         self._create_left_text_right_image_slide(
             "4.8 Waste Management",
             waste_text,
@@ -881,7 +964,7 @@ class EnvironmentPPTXEngine:
         )
         
         # Page 19: 4.9 Environmental Education and Cooperation (custom layout: left image 50% wider, right text 40% width)
-        education_text = self.content_engine.generate_environmental_education(self.config)
+        education_text = self._text('generate_environmental_education')
         slide = self._add_slide()
         self._add_title(slide, "4.9 Environmental Education and Cooperation")
         
@@ -904,6 +987,8 @@ class EnvironmentPPTXEngine:
         
         print("✓ Environmental management pages completed (Pages 16-19)")
 
+    @traced("environment.build")
+    @metered("environment")
     def generate(self):
         """Generate complete Environment Chapter PPTX report"""
         print("\n" + "="*50)
@@ -911,13 +996,8 @@ class EnvironmentPPTXEngine:
         print(f"Industry: {self.industry}")
         print("="*50)
         
-        # Set dynamic emission data
-        if self.emission_data:
-            try:
-                from assets.emission_pptx import set_emission_data
-                set_emission_data(self.emission_data)
-            except Exception as e:
-                print(f"  ⚠ Unable to load dynamic emission data: {e}")
+        # Fetch all LLM texts concurrently, then lay out slides
+        self.prefetch_texts()
         
         # Generate pages in order:
         # Page 1: Cover
@@ -937,6 +1017,13 @@ class EnvironmentPPTXEngine:
         self.generate_ghg_pages()
         self.generate_environmental_management_pages()
         
+        # Texts replaced by placeholders (LLM unavailable): flag the deck as degraded
+        degraded = degraded_reasons()
+        if degraded:
+            self.prs.core_properties.keywords = "degraded"
+            self.prs.core_properties.comments = f"DEGRADED: LLM unavailable, placeholder text used ({', '.join(degraded)})"
+            print(f"  ⚠ Degraded report: {sum(degraded.values())} text(s) are placeholders ({', '.join(degraded)})")
+        
         print("\n" + "="*50)
         print("PPTX Report Generation Completed!")
         print(f"Total {len(self.prs.slides)} slides")
@@ -945,9 +1032,11 @@ class EnvironmentPPTXEngine:
         return self.prs
 
     def save(self, filename):
-        """Save PPTX file"""
-        self.prs.save(filename)
+        """Save PPTX file (streamed, media stored as-is; recorded in the run manifest as the environment deck)"""
+        with span("environment.save", slides=len(self.prs.slides)) as save_span:
+            save_span.set("bytes", write_pptx(self.prs, filename))
         print(f"✓ Saved: {filename}")
+        return self.manifest.record(ArtifactRef.from_file(ENVIRONMENT_DECK, filename, step="environment"))
 
 
 # For testing
@@ -0,0 +1,106 @@
+"""
+Environment Report Generator
+"""
+from typing import Dict, Any
+from shared.interfaces import ModuleInterface
+from shared.mode_manager import ModeManager
+
+
+class EnvironmentGenerator(ModuleInterface):
+    """Generate Environment section report"""
+    
+    def __init__(self):
+        self.module_name = "environment"
+    
+    def get_module_name(self) -> str:
+        return self.module_name
+    
+    def generate(self, input_data: Dict[str, Any], mode_manager: ModeManager) -> Dict[str, Any]:
+        """
+        Generate environment report
+        
+        Args:
+            input_data: Input data (company name, etc.)
+            mode_manager: ModeManager instance
+        
+        Returns:
+            Dictionary with generated report content
+        """
+        if mode_manager.should_use_llm(self.module_name):
+            return self._generate_with_llm(input_data, mode_manager)
+        else:
+            return self._generate_with_mock(input_data, mode_manager)
+    
+    def _generate_with_llm(self, input_data: Dict[str, Any], mode_manager: ModeManager) -> Dict[str, Any]:
+        """Generate report using LLM"""
+        api_key = mode_manager.get_api_key()
+        if not api_key:
+            raise ValueError("API key required for LLM mode")
+        
+        # Placeholder for LLM implementation
+        return {
+            "module": "environment",
+            "pages": [],
+            "content": "LLM generation not yet implemented",
+            "mode": "llm"
+        }
+    
+    def _generate_with_mock(self, input_data: Dict[str, Any], mode_manager: ModeManager) -> Dict[str, Any]:
+        """Generate report using mock data"""
+        mock_data = mode_manager.load_mock_data(self.module_name)
+        if mock_data is None:
+            mock_data = self._get_default_mock_data()
+        
+        # Merge with input data (e.g., company name)
+        company_name = input_data.get("company_name", "Company")
+        
+        result = {
+            "module": "environment",
+            "mode": "mock",
+            "pages": mock_data.get("pages", []),
+            "content": mock_data.get("content", {}),
+            "metadata": {
+                "company_name": company_name,
+                "generated_at": "2025-12-18",
+                "input_data_keys": list(input_data.keys())
+            }
+        }
+        
+        return result
+    
+    def _get_default_mock_data(self) -> Dict[str, Any]:
+        """Get default mock data if file doesn't exist"""
+        return {
+            "pages": [
+                {
+                    "page_number": 1,
+                    "title": "Environment Report Cover",
+                    "content": "Environment Sustainability Report"
+                },
+                {
+                    "page_number": 2,
+                    "title": "Executive Summary",
+                    "content": "Key environmental indicators and achievements"
+                },
+                {
+                    "page_number": 3,
+                    "title": "Environmental Risk Analysis",
+                    "content": "Main environmental risks and impacts"
+                },
+                {
+                    "page_number": 4,
+                    "title": "Emission Management",
+                    "content": "Scope 1 and Scope 2 emissions"
+                },
+                {
+                    "page_number": 5,
+                    "title": "Improvement Recommendations",
+                    "content": "Environmental optimization suggestions"
+                }
+            ],
+            "content": {
+                "overview": "Mock environment report content",
+                "emissions": {"scope1": "N/A", "scope2": "N/A"},
+                "recommendations": ["Improve energy efficiency", "Expand renewable energy"]
+            }
+        }
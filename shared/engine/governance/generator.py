@@ -1,8 +1,6 @@
 """
 Governance Report Generator
 """
-import json
-import os
 from typing import Dict, Any
 from shared.interfaces import ModuleInterface
 from shared.mode_manager import ModeManager
@@ -49,12 +47,8 @@ class GovernanceGenerator(ModuleInterface):
     
     def _generate_with_mock(self, input_data: Dict[str, Any], mode_manager: ModeManager) -> Dict[str, Any]:
         """Generate report using mock data"""
-        mock_path = mode_manager.get_mock_data_path(self.module_name)
-        
-        if os.path.exists(mock_path):
-            with open(mock_path, 'r', encoding='utf-8') as f:
-                mock_data = json.load(f)
-        else:
+        mock_data = mode_manager.load_mock_data(self.module_name)
+        if mock_data is None:
             mock_data = self._get_default_mock_data()
         
         result = {
@@ -5,6 +5,11 @@
 from pathlib import Path
 import os
 from .output_config import get_step_output_dir, OUTPUT_FILENAMES
+from .artifact_store import get_artifact_store
+from .run_manifest import ArtifactRef, RunManifest, STEP_KINDS
+from .tracing import diagnostic, diagnostics_enabled
+
+_process_manifest = None  # 非 Streamlit 環境的 RunManifest
 
 # 延遲導入 streamlit，避免在非 Streamlit 環境中出錯
 def _get_streamlit():
@@ -17,69 +22,30 @@ def _get_streamlit():
 
 def get_tcfd_report_path() -> Path | None:
     """
-    獲取 TCFD 報告路徑（內存優先方案）
-    優先順序：session_state bytes > session_state 路徑 > 標準路徑
+    獲取 TCFD 報告路徑
+    優先順序：artifact store > session_state 路徑 > 標準路徑
     
-    如果從 session_state bytes 獲取，會創建臨時文件並返回路徑
+    artifact store 中僅存在於記憶體的報告會寫到會話目錄（不再建立臨時文件）
     """
-    import tempfile
-    st = _get_streamlit()
-    
-    # 優先從 session_state 獲取 bytes（內存儲存）
-    if st is not None:
-        try:
-            # 方案1: 從 session_state 獲取 bytes
-            if "tcfd_report_bytes" in st.session_state:
-                file_bytes = st.session_state["tcfd_report_bytes"]
-                print(f"[DEBUG] 從 session_state 讀取 TCFD 報告 bytes: {len(file_bytes)} bytes")
-                
-                # 創建臨時文件
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pptx')
-                temp_file.write(file_bytes)
-                temp_file.close()
-                
-                temp_path = Path(temp_file.name)
-                print(f"[DEBUG] 創建臨時文件: {temp_path}")
-                return temp_path
-            
-            # 方案2: 從 session_state 獲取路徑
-            if path := st.session_state.get("tcfd_report_file"):
-                path_obj = Path(path)
-                if path_obj.exists():
-                    print(f"[DEBUG] 從 session_state 路徑讀取: {path_obj}")
-                    return path_obj
-        except Exception as e:
-            # session_state 訪問失敗，繼續使用標準路徑
-            print(f"Warning: Failed to access session_state: {e}")
-    
-    # 方案3: 從標準輸出目錄查找（兩層結構）
-    try:
-        session_dir = get_step_output_dir('tcfd')  # 現在直接返回會話目錄
-        tcfd_file = session_dir / OUTPUT_FILENAMES['tcfd']
-        if tcfd_file.exists():
-            print(f"[DEBUG] 從標準路徑讀取: {tcfd_file}")
-            return tcfd_file
-    except Exception as e:
-        print(f"Warning: Failed to get standard output path: {e}")
-    
-    return None
+    handle = acquire_section_report('tcfd')
+    if handle is None:
+        return None
+    with handle:
+        return handle.path()
 
 def get_tcfd_output_path() -> Path:
     """獲取 TCFD 報告輸出路徑（兩層結構：output/{session_id}/TCFD_table.pptx）"""
     try:
-        print("[DIAGNOSIS] ========== 路徑診斷開始 ==========")
-        print("[DEBUG] Getting TCFD output path...")
         session_dir = get_step_output_dir('tcfd')  # 現在直接返回會話目錄
-        print(f"[DIAGNOSIS] Session directory: {session_dir}")
-        print(f"[DIAGNOSIS] Session directory (absolute): {session_dir.resolve()}")
-        print(f"[DIAGNOSIS] Session directory 是否存在: {session_dir.exists()}")
-        print(f"[DIAGNOSIS] Session directory 是否可寫: {os.access(session_dir.parent, os.W_OK) if session_dir.parent.exists() else False}")
         output_path = session_dir / OUTPUT_FILENAMES['tcfd']
-        print(f"[DIAGNOSIS] Output path: {output_path}")
-        print(f"[DIAGNOSIS] Output path (absolute): {output_path.resolve()}")
-        print(f"[DIAGNOSIS] Output path 父目錄是否存在: {output_path.parent.exists()}")
-        print(f"[DIAGNOSIS] Output path 父目錄是否可寫: {os.access(output_path.parent, os.W_OK) if output_path.parent.exists() else False}")
-        print("[DIAGNOSIS] ========== 路徑診斷結束 ==========")
+        if diagnostics_enabled():
+            diagnostic("[DIAGNOSIS] ========== 路徑診斷開始 ==========")
+            diagnostic(f"[DIAGNOSIS] Session directory (absolute): {session_dir.resolve()}")
+            diagnostic(f"[DIAGNOSIS] Session directory 是否存在: {session_dir.exists()}")
+            diagnostic(f"[DIAGNOSIS] Session directory 是否可寫: {os.access(session_dir.parent, os.W_OK) if session_dir.parent.exists() else False}")
+            diagnostic(f"[DIAGNOSIS] Output path (absolute): {output_path.resolve()}")
+            diagnostic(f"[DIAGNOSIS] Output path 父目錄是否可寫: {os.access(output_path.parent, os.W_OK) if output_path.parent.exists() else False}")
+            diagnostic("[DIAGNOSIS] ========== 路徑診斷結束 ==========")
         return output_path
     except Exception as e:
         error_msg = f"[ERROR] Failed to get TCFD output path: {str(e)}"
@@ -101,19 +67,16 @@ def get_tcfd_output_path() -> Path:
 def get_environment_output_path() -> Path:
     """獲取 Environment 報告輸出路徑（兩層結構：output/{session_id}/Environment_report.pptx）"""
     try:
-        print("[DIAGNOSIS] ========== Environment 路徑診斷開始 ==========")
-        print("[DEBUG] Getting Environment output path...")
         session_dir = get_step_output_dir('environment')  # 現在直接返回會話目錄
-        print(f"[DIAGNOSIS] Session directory: {session_dir}")
-        print(f"[DIAGNOSIS] Session directory (absolute): {session_dir.resolve()}")
-        print(f"[DIAGNOSIS] Session directory 是否存在: {session_dir.exists()}")
-        print(f"[DIAGNOSIS] Session directory 是否可寫: {os.access(session_dir, os.W_OK) if session_dir.exists() else False}")
         output_path = session_dir / OUTPUT_FILENAMES['environment']
-        print(f"[DIAGNOSIS] Output path: {output_path}")
-        print(f"[DIAGNOSIS] Output path (absolute): {output_path.resolve()}")
-        print(f"[DIAGNOSIS] Output path 父目錄是否存在: {output_path.parent.exists()}")
-        print(f"[DIAGNOSIS] Output path 父目錄是否可寫: {os.access(output_path.parent, os.W_OK) if output_path.parent.exists() else False}")
-        print("[DIAGNOSIS] ========== Environment 路徑診斷結束 ==========")
+        if diagnostics_enabled():
+            diagnostic("[DIAGNOSIS] ========== Environment 路徑診斷開始 ==========")
+            diagnostic(f"[DIAGNOSIS] Session directory (absolute): {session_dir.resolve()}")
+            diagnostic(f"[DIAGNOSIS] Session directory 是否存在: {session_dir.exists()}")
+            diagnostic(f"[DIAGNOSIS] Session directory 是否可寫: {os.access(session_dir, os.W_OK) if session_dir.exists() else False}")
+            diagnostic(f"[DIAGNOSIS] Output path (absolute): {output_path.resolve()}")
+            diagnostic(f"[DIAGNOSIS] Output path 父目錄是否可寫: {os.access(output_path.parent, os.W_OK) if output_path.parent.exists() else False}")
+            diagnostic("[DIAGNOSIS] ========== Environment 路徑診斷結束 ==========")
         return output_path
     except Exception as e:
         error_msg = f"[ERROR] Failed to get Environment output path: {str(e)}"
@@ -132,19 +95,107 @@ def get_environment_output_path() -> Path:
             pass
         raise Exception(error_msg) from e
 
-def update_session_activity():
-    """更新會話最後活動時間（通過更新目錄修改時間）"""
+def acquire_section_report(step_name: str):
+    """
+    獲取章節報告（tcfd / company / environment / governance / full_report）的 artifact handle
+    優先順序：artifact store > session_state 路徑（{step}_report_file）> 標準路徑
+    
+    在 store 之外找到的文件會登記到 store，之後的查找不再掃描文件系統。
+    
+    Returns:
+        ArtifactHandle（使用完畢需 release，或以 with 使用）；找不到時返回 None
+    """
+    from .output_config import get_session_id
+    store = get_artifact_store()
+    session_id = get_session_id()
+    name = OUTPUT_FILENAMES[step_name]
+    
+    handle = store.acquire(session_id, name)
+    if handle is not None:
+        return handle
+    
+    candidates = []
+    st = _get_streamlit()
+    if st is not None:
+        try:
+            if path := st.session_state.get(f"{step_name}_report_file"):
+                candidates.append(Path(path))
+        except Exception as e:
+            print(f"Warning: Failed to access session_state: {e}")
+    candidates.append(store.session_dir(session_id) / name)
+    
+    for path in candidates:
+        if path.exists():
+            try:
+                store.put_file(session_id, name, path)
+                return store.acquire(session_id, name)
+            except Exception as e:
+                print(f"Warning: Failed to register {path} in artifact store: {e}")
+    return None
+
+def get_full_report_output_path() -> Path:
+    """獲取完整報告輸出路徑（兩層結構：output/{session_id}/ESG_full_report.pptx）"""
+    return get_step_output_dir('full_report') / OUTPUT_FILENAMES['full_report']
+
+def _streamlit_session_state():
+    """
+    st.session_state of the current Streamlit script run
+    （server / CLI / 背景執行緒中沒有 ScriptRunContext，session_state 是進程共用的，返回 None）
+    """
+    st = _get_streamlit()
+    if st is None:
+        return None
     try:
-        from .output_config import get_session_output_dir
-        session_dir = get_session_output_dir()
-        # 觸摸目錄以更新修改時間
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
         try:
-            import os
-            os.utime(session_dir, None)
-        except Exception as utime_error:
-            # 失敗不影響主流程，只記錄警告
-            print(f"Warning: Failed to update session activity time: {utime_error}")
+            ctx = get_script_run_ctx(suppress_warning=True)
+        except TypeError:  # 舊版 streamlit 沒有 suppress_warning
+            ctx = get_script_run_ctx()
+    except Exception:
+        return None
+    return st.session_state if ctx is not None else None
+
+def session_run_manifest() -> RunManifest | None:
+    """Streamlit 會話的 RunManifest（首次使用時建立）；不在 Streamlit 會話中時返回 None"""
+    session_state = _streamlit_session_state()
+    if session_state is None:
+        return None
+    manifest = session_state.get("run_manifest")
+    if manifest is None:
+        from .output_config import get_session_id
+        manifest = RunManifest(run_id=get_session_id())
+        session_state["run_manifest"] = manifest
+    return manifest
+
+def get_run_manifest() -> RunManifest:
+    """
+    獲取本次執行的 RunManifest
+    Streamlit 中每個會話一份（存於 session_state），其他環境（CLI / 腳本）為進程內一份；
+    server / CLI 中每份報告應自行建立 RunManifest（見 EnvironmentPPTXEngine）
+    """
+    global _process_manifest
+    manifest = session_run_manifest()
+    if manifest is not None:
+        return manifest
+    if _process_manifest is None:
+        _process_manifest = RunManifest()
+    return _process_manifest
+
+def register_report(step_name: str, path: Path) -> ArtifactRef:
+    """
+    將已保存的報告文件登記到 artifact store（文件已在會話目錄中時原地登記，不複製），
+    並記錄到本次執行的 RunManifest，供下游步驟解析
+    """
+    from .output_config import get_session_id
+    info = get_artifact_store().put_file(get_session_id(), OUTPUT_FILENAMES[step_name], path)
+    return get_run_manifest().record(ArtifactRef.from_artifact(STEP_KINDS[step_name], info, step=step_name))
+
+def update_session_activity():
+    """更新會話最後活動時間（交給背景回收器追蹤，不觸碰文件系統）"""
+    try:
+        from .output_config import get_session_id
+        from .session_cleanup import get_session_reaper
+        get_session_reaper().touch(get_session_id())
     except Exception as e:
         # 失敗不影響主流程，只記錄警告
         print(f"Warning: Failed to update session activity: {e}")
-
@@ -0,0 +1,135 @@
+"""
+Streaming PPTX Writer
+串流寫出 PPTX 套件：逐個 part 序列化並寫入 zip，可寫到任何 stream（檔案、HTTP 回應）
+
+Compared with python-pptx's Presentation.save():
+
+    - parts are serialized and written one at a time; only the current part and
+      its compressed bytes are held in memory, never a second copy of the deck
+    - already-compressed media (PNG, JPEG, GIF, video / audio) is stored as-is
+      instead of being deflated again
+    - XML parts use a configurable deflate level (ESG_PPTX_XML_COMPRESSLEVEL,
+      default 6; 1 is much faster for a slightly larger file)
+    - the target does not need to be seekable (zip data descriptors are used)
+
+The per-part serializer uses python-pptx 1.x internals; on older versions both
+functions fall back to Presentation.save() (whole deck buffered, default compression).
+
+Usage:
+    write_pptx(prs, "report.pptx")
+    write_pptx(prs, response_stream, xml_compresslevel=1)
+    return StreamingResponse(iter_pptx(prs), media_type=PPTX_MEDIA_TYPE)
+"""
+import io
+import os
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+try:
+    from pptx.opc.oxml import serialize_part_xml
+    from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+    from pptx.opc.serialized import _ContentTypesItem
+    STREAMING_SUPPORTED = True
+except ImportError:  # python-pptx < 1.0
+    STREAMING_SUPPORTED = False
+
+from .artifact_store import PPTX_MEDIA_TYPE
+from .tracing import span
+
+XML_COMPRESSLEVEL = int(os.getenv("ESG_PPTX_XML_COMPRESSLEVEL", "6"))
+
+# Part extensions whose content is already compressed: stored, not deflated
+STORED_EXTENSIONS = frozenset({
+    "png", "jpg", "jpeg", "jpe", "jfif", "gif", "wdp", "hdp",
+    "mp4", "m4v", "mov", "mp3", "m4a", "wma", "wmv", "avi",
+    "zip", "xlsx", "docx", "pptx",
+})
+
+
+class _ChunkBuffer:
+    """Write-only, non-seekable sink that hands out what was written since the last drain"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _members(prs) -> Iterator[Tuple[str, object]]:
+    """(membername, part or XML bytes) in python-pptx's save order"""
+    package = prs.part.package
+    parts = tuple(package.iter_parts())
+    yield CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts))
+    yield PACKAGE_URI.rels_uri.membername, package._rels.xml
+    for part in parts:
+        yield part.partname.membername, part
+        if part._rels:
+            yield part.partname.rels_uri.membername, part.rels.xml
+
+
+def iter_pptx(prs, xml_compresslevel: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Yield the .pptx bytes of prs incrementally (one chunk per part)
+
+    Args:
+        prs: python-pptx Presentation
+        xml_compresslevel: Deflate level 0-9 for XML and other compressible parts
+                           (default ESG_PPTX_XML_COMPRESSLEVEL)
+    """
+    if not STREAMING_SUPPORTED:
+        buffer = io.BytesIO()
+        prs.save(buffer)
+        yield buffer.getvalue()
+        return
+
+    level = XML_COMPRESSLEVEL if xml_compresslevel is None else xml_compresslevel
+    sink = _ChunkBuffer()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=level,
+                         strict_timestamps=False) as zf:
+        for membername, item in _members(prs):
+            # Parts are serialized only when their turn comes
+            blob = item if isinstance(item, bytes) else item.blob
+            stored = membername.rsplit(".", 1)[-1].lower() in STORED_EXTENSIONS
+            zf.writestr(membername, blob, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
+
+
+def write_pptx(prs, target: Union[str, Path, BinaryIO], xml_compresslevel: Optional[int] = None) -> int:
+    """
+    Write prs as a .pptx package to a path or a binary stream
+
+    Args:
+        prs: python-pptx Presentation
+        target: File path, or any object with write() (need not be seekable)
+        xml_compresslevel: Deflate level for XML parts (default ESG_PPTX_XML_COMPRESSLEVEL)
+
+    Returns:
+        Number of bytes written
+    """
+    with span("pptx.write", slides=len(prs.slides)) as write_span:
+        is_path = isinstance(target, (str, Path))
+        stream = open(target, "wb") if is_path else target
+        written = 0
+        try:
+            for chunk in iter_pptx(prs, xml_compresslevel):
+                stream.write(chunk)
+                written += len(chunk)
+        finally:
+            if is_path:
+                stream.close()
+        write_span.set("bytes", written)
+    return written
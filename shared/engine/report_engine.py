@@ -0,0 +1,196 @@
+"""
+Report Engine - Unified entry point for CLI, server and Streamlit
+Runs the module generators (environment, company, governance) under one ModeManager
+"""
+import asyncio
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from shared.mode_manager import ModeManager
+from .company import CompanyGenerator
+from .environment import EnvironmentGenerator
+from .governance import GovernanceGenerator
+from .aio import run_sync
+from .artifact_store import ArtifactStore, get_artifact_store
+from .usage_ledger import UsageLedger, use_ledger, usage_labels
+
+
+MOCK_MEMO_SIZE = int(os.getenv("ESG_MOCK_MEMO_SIZE", "256"))
+
+
+class MockResultMemo:
+    """
+    LRU memo of mock-mode module results
+
+    Keyed by module, mock data file (path + mtime) and the input data normalized
+    to canonical JSON; results are deep-copied in and out so callers may mutate them.
+    """
+
+    def __init__(self, max_entries: int = MOCK_MEMO_SIZE):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(module_name: str, input_data: Dict[str, Any], mode_manager: ModeManager) -> Tuple:
+        normalized = json.dumps(input_data, sort_keys=True, ensure_ascii=False, default=str)
+        return module_name, mode_manager.mock_data_signature(module_name), normalized
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                self.stats["misses"] += 1
+                return None
+            self._results.move_to_end(key)
+            self.stats["hits"] += 1
+        return copy.deepcopy(result)
+
+    def put(self, key: Tuple, result: Dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+_mock_memo = MockResultMemo()
+
+
+def get_mock_memo() -> MockResultMemo:
+    """Process-wide memo of mock-mode results"""
+    return _mock_memo
+
+
+class ReportEngine:
+    """Generate one or more report modules in the selected execution mode"""
+
+    def __init__(self, mode: Optional[str] = None, store: Optional[ArtifactStore] = None):
+        """
+        Args:
+            mode: Execution mode (mock, llm-test, production); see ModeManager
+            store: Artifact store for generated results (defaults to the process-wide store)
+        """
+        self.mode_manager = ModeManager(mode)
+        self.store = store
+        self.generators = {
+            generator.get_module_name(): generator
+            for generator in (EnvironmentGenerator(), CompanyGenerator(), GovernanceGenerator())
+        }
+
+    @property
+    def mode(self) -> str:
+        return self.mode_manager.current_mode.value
+
+    def get_available_modules(self) -> List[str]:
+        """Names of the available modules, in report order"""
+        return list(self.generators.keys())
+
+    def log_mode_info(self):
+        self.mode_manager.log_mode_info()
+
+    def generate_module(self, module_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate a single module
+
+        Raises:
+            ValueError: Unknown module name
+        """
+        generator = self.generators.get(module_name)
+        if generator is None:
+            raise ValueError(f"Invalid module: {module_name}. Available: {self.get_available_modules()}")
+        if self.mode_manager.should_use_llm(module_name):
+            return generator.generate(input_data, self.mode_manager)
+
+        # Mock results depend only on the module, mock data and input: memoized
+        key = MockResultMemo.key(module_name, input_data, self.mode_manager)
+        result = _mock_memo.get(key)
+        if result is None:
+            result = generator.generate(input_data, self.mode_manager)
+            _mock_memo.put(key, result)
+        return result
+
+    async def generate_module_async(self, module_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of generate_module
+
+        Raises:
+            ValueError: Unknown module name
+        """
+        generator = self.generators.get(module_name)
+        if generator is None:
+            raise ValueError(f"Invalid module: {module_name}. Available: {self.get_available_modules()}")
+        if self.mode_manager.should_use_llm(module_name):
+            return await generator.generate_async(input_data, self.mode_manager)
+
+        # Mock results are memoized; a hit is served without leaving the event loop
+        key = MockResultMemo.key(module_name, input_data, self.mode_manager)
+        result = _mock_memo.get(key)
+        if result is None:
+            result = await generator.generate_async(input_data, self.mode_manager)
+            _mock_memo.put(key, result)
+        return result
+
+    def generate_all(
+        self,
+        input_data: Dict[str, Any],
+        modules: Optional[List[str]] = None,
+        session_id: Optional[str] = None,
+        ledger: Optional[UsageLedger] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate several modules; a failing module is reported as {"error": ...}
+
+        Args:
+            input_data: Input data shared by all modules
+            modules: Modules to generate (None = all)
+            session_id: When given, each result is stored as "{module}.json" in the
+                        artifact store and its artifact info is added under "artifact"
+            ledger: Usage ledger collecting the LLM calls of this run (labelled by module)
+
+        Returns:
+            Dict of module name -> result
+        """
+        return run_sync(self.generate_all_async(input_data, modules=modules, session_id=session_id, ledger=ledger))
+
+    async def generate_all_async(
+        self,
+        input_data: Dict[str, Any],
+        modules: Optional[List[str]] = None,
+        session_id: Optional[str] = None,
+        ledger: Optional[UsageLedger] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Async version of generate_all: the modules run concurrently, their LLM
+        calls share the event loop's semaphore (same arguments and result)
+        """
+        module_names = list(modules or self.get_available_modules())
+
+        async def run(module_name: str) -> Dict[str, Any]:
+            try:
+                with use_ledger(ledger), usage_labels(module=module_name):
+                    result = await self.generate_module_async(module_name, input_data)
+            except Exception as e:
+                return {"error": str(e)}
+
+            if session_id:
+                store = self.store or get_artifact_store()
+                data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+                info = await asyncio.to_thread(store.put, session_id, f"{module_name}.json", data)
+                result["artifact"] = info.to_dict()
+            return result
+
+        outcomes = await asyncio.gather(*(run(module_name) for module_name in module_names))
+        return dict(zip(module_names, outcomes))
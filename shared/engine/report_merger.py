@@ -0,0 +1,227 @@
+"""
+Full Report Merger
+完整報告合併：將各章節簡報（Company → Environment → Governance）串流合併為單一套件
+
+The first available section deck becomes the host; every later section is
+opened, grafted into the host at package level and released before the next
+one is read, so at most two decks are in memory at a time.
+
+    - media parts are deduplicated by content hash (SHA1) across all sections
+    - slide layouts are reused when an equivalent one (same layout, master and
+      theme XML, same images) already exists in the host; otherwise the source
+      master is adopted once, with its layouts, and its ids are renumbered
+    - the merged package is serialized to the output zip in a single pass
+"""
+import hashlib
+import io
+import logging
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.parts.image import ImagePart
+
+from .pptx_writer import write_pptx
+from .slide_graft import SlideGrafter
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# 章節合併順序（對應 OUTPUT_FILENAMES 的鍵）
+SECTION_ORDER = ('company', 'environment', 'governance')
+
+# sldMasterId / sldLayoutId 必須 >= 2^31 且在整份簡報中唯一
+_MIN_LAYOUT_ID = 2147483648
+
+SectionSource = Union[str, Path, bytes, BinaryIO, "Presentation"]
+
+
+def _open_presentation(source: SectionSource):
+    """Open a section deck from a path, raw bytes, a binary stream or an already-open Presentation"""
+    if isinstance(source, (bytes, bytearray)):
+        return Presentation(io.BytesIO(source))
+    if isinstance(source, (str, Path)):
+        return Presentation(str(source))
+    if hasattr(source, "read"):
+        return Presentation(source)
+    return source
+
+
+def _part_fingerprint(part, cache: Dict) -> str:
+    """
+    Content hash of a layout / master / theme part and everything it relates to
+
+    Images contribute their SHA1, XML parts their serialized XML (recursively,
+    except back-references to parts already being hashed).
+    """
+    if part in cache:
+        return cache[part]
+    cache[part] = ""  # 循環關聯（layout ↔ master）保護
+    if isinstance(part, ImagePart):
+        digest = part.sha1
+    else:
+        h = hashlib.sha1(part.blob)
+        for rId, rel in sorted(part.rels.items()):
+            if rel.is_external:
+                h.update(f"{rId}:{rel.target_ref}".encode("utf-8"))
+            elif rel.reltype != RT.SLIDE_LAYOUT:
+                # master → layouts 關聯不納入，否則同一母片的所有版面會互相影響
+                h.update(f"{rId}:{_part_fingerprint(rel.target_part, cache)}".encode("utf-8"))
+        digest = h.hexdigest()
+    cache[part] = digest
+    return digest
+
+
+class ReportMerger:
+    """
+    Streams section decks into one host presentation
+
+    Usage:
+        merger = ReportMerger(company_deck)
+        merger.append(environment_deck)
+        merger.append(governance_deck)
+        merger.save(output_path)
+    """
+
+    def __init__(self, host: SectionSource):
+        """
+        Args:
+            host: First section deck (path, bytes, binary stream or Presentation); it receives all other sections
+        """
+        self.prs = _open_presentation(host)
+        self.grafter = SlideGrafter(self.prs)
+        self.sections: List[Tuple[str, int]] = []
+
+        self._fingerprints: Dict = {}
+        self._layouts_by_fingerprint = {}
+        for master in self.prs.slide_masters:
+            for layout in master.slide_layouts:
+                key = _part_fingerprint(layout.part, self._fingerprints)
+                self._layouts_by_fingerprint.setdefault(key, layout)
+
+        self.stats = {"layouts_reused": 0, "masters_added": 0}
+
+    def append(self, source: SectionSource, name: Optional[str] = None) -> int:
+        """
+        Graft every slide of a section deck onto the end of the report
+
+        Args:
+            source: Section deck (path, bytes, binary stream or Presentation; consumed)
+            name: Section label for logging / statistics
+
+        Returns:
+            Number of slides appended
+        """
+        with span("merge.open", section=name or ""):
+            source_prs = _open_presentation(source)
+        source_fingerprints: Dict = {}
+        adopted_masters = set()
+
+        def resolve_layout(source_layout):
+            key = _part_fingerprint(source_layout.part, source_fingerprints)
+            host_layout = self._layouts_by_fingerprint.get(key)
+            if host_layout is not None:
+                self.stats["layouts_reused"] += 1
+                return host_layout
+            master = source_layout.slide_master
+            if master.part not in adopted_masters:
+                self._adopt_master(master, source_fingerprints)
+                adopted_masters.add(master.part)
+            return source_layout
+
+        with span("merge.graft", section=name or "") as graft_span:
+            count = len(self.grafter.graft(source_prs, layout_resolver=resolve_layout))
+            graft_span.set("slides", count)
+        self.sections.append((name or f"section_{len(self.sections) + 2}", count))
+        logger.info(f"Merged section {name}: {count} slides")
+        return count
+
+    def save(self, output_path: Union[str, Path]) -> Path:
+        """Write the merged package (streamed part by part, media stored as-is)"""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with span("merge.save", slides=len(self.prs.slides)) as save_span:
+            save_span.set("bytes", write_pptx(self.prs, output_path))
+        return output_path
+
+    def _adopt_master(self, master, source_fingerprints: Dict):
+        """Move a source slide master (with its layouts and theme) into the host"""
+        master_part = master.part
+        self.grafter._adopt(master_part, {})
+
+        next_id = self._next_layout_id()
+        sldMasterIdLst = self.prs.slide_masters._sldMasterIdLst
+        sldMasterId = sldMasterIdLst._add_sldMasterId()
+        sldMasterId.set("id", str(next_id))
+        sldMasterId.rId = self.prs.part.relate_to(master_part, RT.SLIDE_MASTER)
+        for sldLayoutId in master_part._element.get_or_add_sldLayoutIdLst().sldLayoutId_lst:
+            next_id += 1
+            sldLayoutId.set("id", str(next_id))
+
+        # 之後的章節可直接重用此母片的版面
+        for layout in master.slide_layouts:
+            key = _part_fingerprint(layout.part, source_fingerprints)
+            self._layouts_by_fingerprint.setdefault(key, layout)
+        self.stats["masters_added"] += 1
+
+    def _next_layout_id(self) -> int:
+        """Smallest id above every sldMasterId / sldLayoutId in the host"""
+        used = [int(e.get("id")) for e in self.prs.slide_masters._sldMasterIdLst.sldMasterId_lst if e.get("id")]
+        for master in self.prs.slide_masters:
+            sldLayoutIdLst = master.part._element.sldLayoutIdLst
+            if sldLayoutIdLst is not None:
+                used.extend(int(e.get("id")) for e in sldLayoutIdLst.sldLayoutId_lst if e.get("id"))
+        return max(used + [_MIN_LAYOUT_ID - 1]) + 1
+
+
+def merge_report(
+    sections: Sequence[Tuple[str, SectionSource]],
+    output_path: Union[str, Path]
+) -> Dict:
+    """
+    Merge section decks into one report, in the given order
+
+    Args:
+        sections: (name, deck) pairs; deck is a path, bytes, binary stream or Presentation
+        output_path: Output .pptx path
+
+    Returns:
+        Summary dict: output_path, total_slides, sections [(name, slides)],
+        parts_moved, media_reused, layouts_reused, masters_added, file_size, elapsed
+    """
+    if not sections:
+        raise ValueError("沒有可合併的章節簡報")
+
+    start = time.perf_counter()
+    with span("merge", sections=len(sections)) as merge_span:
+        (first_name, first_source), rest = sections[0], sections[1:]
+        with span("merge.open", section=first_name):
+            merger = ReportMerger(first_source)
+        merger.sections.append((first_name, len(merger.prs.slides)))
+        for name, source in rest:
+            merger.append(source, name=name)
+        output_path = merger.save(output_path)
+        merge_span.set_attributes(
+            slides=len(merger.prs.slides), media_reused=merger.grafter.stats["media_reused"],
+            layouts_reused=merger.stats["layouts_reused"]
+        )
+
+    summary = {
+        "output_path": output_path,
+        "total_slides": len(merger.prs.slides),
+        "sections": merger.sections,
+        "parts_moved": merger.grafter.stats["parts_moved"],
+        "media_reused": merger.grafter.stats["media_reused"],
+        "layouts_reused": merger.stats["layouts_reused"],
+        "masters_added": merger.stats["masters_added"],
+        "file_size": output_path.stat().st_size,
+        "elapsed": time.perf_counter() - start,
+    }
+    logger.info(
+        f"Report merged: {summary['total_slides']} slides, {summary['media_reused']} media reused, "
+        f"{summary['layouts_reused']} layouts reused, {summary['masters_added']} masters added "
+        f"({summary['elapsed']:.2f}s)"
+    )
+    return summary
@@ -0,0 +1,190 @@
+"""
+Run Manifest
+管線步驟之間以型別化的產出物參照（ArtifactRef）傳遞輸入，取代以檔名樣式 + 修改時間搜尋目錄
+
+Each step records what it produced (kind, content hash, media type, location)
+in the run's manifest; downstream steps resolve their inputs by kind:
+
+    manifest.record(ArtifactRef.from_artifact("tcfd_deck", info, step="tcfd"))
+    ...
+    ref = manifest.resolve("tcfd_deck")
+    prs = Presentation(ref.open())
+
+Outputs derived from request data carry an input key (e.g. a hash of the emission
+figures); resolve(kind, key=...) only returns a ref recorded for the same inputs.
+
+A location is either a file path or an artifact-store URI
+("artifact://{session_id}/{name}").
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from .artifact_store import ArtifactInfo, get_artifact_store, guess_media_type
+
+STORE_SCHEME = "artifact://"
+
+# 產出物種類（kind）
+TCFD_DECK = "tcfd_deck"
+EMISSION_TABLE = "emission_table"
+EMISSION_PIE = "emission_pie"
+ENVIRONMENT_DECK = "environment_deck"
+COMPANY_DECK = "company_deck"
+GOVERNANCE_DECK = "governance_deck"
+FULL_REPORT = "full_report"
+
+# OUTPUT_FILENAMES 步驟名 → 產出物種類
+STEP_KINDS = {
+    'tcfd': TCFD_DECK,
+    'environment': ENVIRONMENT_DECK,
+    'company': COMPANY_DECK,
+    'governance': GOVERNANCE_DECK,
+    'full_report': FULL_REPORT,
+}
+
+
+@dataclass(frozen=True)
+class ArtifactRef:
+    """Immutable handle to one step output"""
+    kind: str
+    artifact_id: str
+    sha256: str
+    media_type: str
+    location: str
+    size: int
+    step: str = ""
+    created_at: float = 0.0
+    key: str = ""  # 產生此產出物的輸入鍵（空字串 = 與輸入無關）
+
+    @classmethod
+    def from_file(cls, kind: str, path: Union[str, Path], step: str = "", key: str = "") -> "ArtifactRef":
+        """Reference a file on disk (hashes it once)"""
+        path = Path(path)
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return cls(
+            kind=kind, artifact_id=f"{kind}-{h.hexdigest()[:12]}", sha256=h.hexdigest(),
+            media_type=guess_media_type(path.name), location=str(path.resolve()),
+            size=path.stat().st_size, step=step, created_at=time.time(), key=key
+        )
+
+    @classmethod
+    def from_artifact(cls, kind: str, info: ArtifactInfo, step: str = "", key: str = "") -> "ArtifactRef":
+        """Reference an artifact held by the artifact store"""
+        return cls(
+            kind=kind, artifact_id=info.artifact_id, sha256=info.sha256, media_type=info.media_type,
+            location=f"{STORE_SCHEME}{info.artifact_id}", size=info.size, step=step,
+            created_at=info.created_at, key=key
+        )
+
+    @property
+    def in_store(self) -> bool:
+        return self.location.startswith(STORE_SCHEME)
+
+    def open(self) -> BinaryIO:
+        """
+        Binary stream over the artifact content
+
+        Raises:
+            FileNotFoundError: The artifact no longer exists
+        """
+        if self.in_store:
+            session_id, name = self.location[len(STORE_SCHEME):].split("/", 1)
+            handle = get_artifact_store().acquire(session_id, name)
+            if handle is None:
+                raise FileNotFoundError(f"Artifact not found: {self.location}")
+            with handle:
+                return io.BytesIO(handle.read_bytes())
+        return open(self.location, "rb")
+
+    def local_path(self) -> Path:
+        """Filesystem path of the artifact (store artifacts are written to their session directory)"""
+        if self.in_store:
+            session_id, name = self.location[len(STORE_SCHEME):].split("/", 1)
+            handle = get_artifact_store().acquire(session_id, name)
+            if handle is None:
+                raise FileNotFoundError(f"Artifact not found: {self.location}")
+            with handle:
+                return handle.path()
+        return Path(self.location)
+
+    def exists(self) -> bool:
+        if self.in_store:
+            session_id, name = self.location[len(STORE_SCHEME):].split("/", 1)
+            return get_artifact_store().info(session_id, name) is not None
+        return os.path.exists(self.location)
+
+
+class RunManifest:
+    """Per-run record of step outputs, keyed by artifact kind (latest record wins)"""
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id or str(uuid.uuid4())
+        self.created_at = time.time()
+        self._artifacts: Dict[str, ArtifactRef] = {}
+        self._lock = threading.Lock()
+
+    def record(self, ref: ArtifactRef) -> ArtifactRef:
+        with self._lock:
+            self._artifacts[ref.kind] = ref
+        return ref
+
+    def resolve(self, kind: str, key: Optional[str] = None) -> Optional[ArtifactRef]:
+        """
+        Latest artifact of a kind (None if the producing step has not run)
+
+        Args:
+            kind: Artifact kind
+            key: Input key the artifact must have been recorded with (None = any)
+        """
+        with self._lock:
+            ref = self._artifacts.get(kind)
+        if ref is None or (key is not None and ref.key != key):
+            return None
+        return ref if ref.exists() else None
+
+    def require(self, kind: str, key: Optional[str] = None) -> ArtifactRef:
+        ref = self.resolve(kind, key)
+        if ref is None:
+            raise LookupError(f"Run {self.run_id} has no '{kind}' artifact")
+        return ref
+
+    def artifacts(self) -> List[ArtifactRef]:
+        with self._lock:
+            return list(self._artifacts.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            "run_id": self.run_id,
+            "created_at": self.created_at,
+            "artifacts": [asdict(ref) for ref in self.artifacts()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RunManifest":
+        manifest = cls(run_id=data.get("run_id"))
+        manifest.created_at = data.get("created_at", manifest.created_at)
+        for ref in data.get("artifacts", []):
+            manifest.record(ArtifactRef(**ref))
+        return manifest
+
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "RunManifest":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
@@ -1,60 +1,337 @@
 """
-會話清理工具 - 方案 A
-在請求時檢查並清理過期會話（基於文件修改時間）
+會話清理工具 - 方案 B（背景回收）
+以記憶體中的到期最小堆追蹤會話最後活動時間，由背景執行緒在最近的到期時間到達時批次刪除
+
+    - update_session_activity() → SessionReaper.touch()：O(log n)，不掃描目錄
+    - 背景執行緒只在下一個到期時間到達時喚醒，刪除工作不在使用者請求路徑上
+    - 索引（session_id → 最後活動時間）持久化到會話根目錄，重啟後沿用；
+      首次啟動沒有索引時，由背景執行緒掃描一次既有會話目錄
+    - 刪除前在鎖內重新檢查最後活動時間並標記為回收中；實際刪除在鎖外進行，
+      不會讓 touch() 等待磁碟刪除（回收中到達的 touch() 建立新的索引項目）
+    - session_id 必須是安全的目錄名稱，刪除前確認目錄位於會話根目錄之內
 """
+import heapq
+import json
+import os
 import time
 import shutil
+import threading
 from pathlib import Path
 import logging
-import streamlit as st
-from .output_config import SESSIONS_DIR
+from typing import Dict, List, Optional, Set, Tuple
+from .output_config import USE_TEMP_DIR, SESSIONS_DIR, get_temp_base_dir
+from .artifact_store import (
+    SESSION_ID_PATTERN, InvalidSessionIdError, contained_session_dir, get_artifact_store, validate_session_id
+)
 
 logger = logging.getLogger(__name__)
 
 MAX_SESSION_AGE_HOURS = 2  # 會話最大保留時間（2 小時）
+REAPER_BATCH_SIZE = 50  # 每批最多刪除的會話數
+REAPER_INDEX_FILENAME = ".session_index.json"
+REAPER_FLUSH_INTERVAL = 30  # 索引寫回間隔（秒）
+
+def get_sessions_root() -> Path:
+    """會話目錄的實際根目錄（與 get_session_output_dir 一致）"""
+    return get_temp_base_dir() if USE_TEMP_DIR else SESSIONS_DIR
+
+def _delete_session(sessions_root: Path, session_id: str) -> bool:
+    """刪除單一會話：先釋放 artifact store，再刪除目錄（目錄必須位於 sessions_root 之內）"""
+    try:
+        session_dir = contained_session_dir(sessions_root, session_id)
+    except InvalidSessionIdError as e:
+        logger.warning(f"略過不安全的會話 ID: {e}")
+        return False
+    try:
+        get_artifact_store().drop_session(session_id)
+        shutil.rmtree(session_dir, ignore_errors=True)
+        return True
+    except Exception as e:
+        logger.error(f"清理會話失敗 {session_id}: {e}")
+        return False
+
+class SessionReaper:
+    """
+    Background reaper for expired session directories
+
+    touch() records activity; a daemon thread sleeps until the earliest deadline,
+    then deletes expired sessions in batches.
+    """
+
+    def __init__(self, sessions_root: Optional[Path] = None, max_age_hours: float = MAX_SESSION_AGE_HOURS):
+        """
+        Args:
+            sessions_root: Directory holding one sub-directory per session
+            max_age_hours: Idle time after which a session is deleted
+        """
+        self.sessions_root = Path(sessions_root) if sessions_root else get_sessions_root()
+        self.max_age = max_age_hours * 3600
+        self.index_path = self.sessions_root / REAPER_INDEX_FILENAME
+
+        self._last_activity: Dict[str, float] = {}
+        self._reaping: Set[str] = set()  # 已出列、正在鎖外刪除的會話
+        self._heap: List[Tuple[float, str]] = []  # (deadline, session_id)，過時項目延遲丟棄
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._last_flush = 0.0
+        self._index_loaded = False
+        self._load_lock = threading.Lock()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"touches": 0, "reaped": 0, "batches": 0}
+
+    # ---- 公開介面 ----
+
+    def start(self):
+        """Start the background thread (loads the persisted index first)"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="session-reaper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the thread and persist the index"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._flush(force=True)
+
+    def touch(self, session_id: str, now: Optional[float] = None):
+        """
+        Record activity for a session (pushes its new deadline)
+
+        Raises:
+            InvalidSessionIdError: session_id is not a safe directory name
+        """
+        validate_session_id(session_id)
+        now = now if now is not None else time.time()
+        deadline = now + self.max_age
+        with self._cond:
+            earliest = self._heap[0][0] if self._heap else None
+            self._last_activity[session_id] = now
+            heapq.heappush(self._heap, (deadline, session_id))
+            self._dirty = True
+            self.stats["touches"] += 1
+            self._compact()
+            if earliest is None or deadline < earliest:
+                self._cond.notify()
+
+    def forget(self, session_id: str):
+        """Stop tracking a session (e.g. deleted explicitly)"""
+        with self._cond:
+            if self._last_activity.pop(session_id, None) is not None:
+                self._dirty = True
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._last_activity)
+
+    def sweep(self, max_age_hours: Optional[float] = None) -> int:
+        """
+        Delete every session idle for longer than max_age_hours (maintenance path)
+
+        Last activity comes from the index; directories the index does not know
+        fall back to their mtime.
+
+        Returns:
+            Number of sessions deleted
+        """
+        self._ensure_index_loaded()
+        if not self.sessions_root.exists():
+            return 0
+        max_age = self.max_age if max_age_hours is None else max_age_hours * 3600
+        cutoff = time.time() - max_age
+
+        reaped = 0
+        for session_dir in self.sessions_root.iterdir():
+            if not session_dir.is_dir() or not SESSION_ID_PATTERN.match(session_dir.name):
+                continue
+            with self._cond:
+                last = self._last_activity.get(session_dir.name)
+            if last is None:
+                try:
+                    last = session_dir.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+            if last < cutoff and self._reap(session_dir.name, cutoff):
+                reaped += 1
+                logger.info(f"已清理過期會話: {session_dir.name}")
+        self._flush(force=True)
+        return reaped
+
+    # ---- 背景執行緒 ----
+
+    def _run(self):
+        self._ensure_index_loaded()
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    timeout = self._next_timeout()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    if self._dirty:
+                        flush_in = REAPER_FLUSH_INTERVAL - (time.time() - self._last_flush)
+                        if flush_in <= 0:
+                            break
+                        timeout = flush_in if timeout is None else min(timeout, flush_in)
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                now = time.time()
+                batch = self._pop_expired(now)
+
+            if batch:
+                # Sessions touched after the pop are back in the index and are skipped
+                reaped = sum(self._reap(session_id, now - self.max_age) for session_id in batch)
+                self.stats["batches"] += 1
+                logger.info(f"已清理 {reaped} 個過期會話")
+            self._flush()
+
+    def _reap(self, session_id: str, cutoff: float) -> bool:
+        """
+        Delete a session unless it has been active since cutoff
+
+        The deadline is re-checked and the session marked as being reaped under the
+        lock; the deletion itself runs outside it, so touch() never waits on disk I/O.
+        A touch() that lands during the deletion starts a fresh index entry.
+        """
+        with self._cond:
+            last = self._last_activity.get(session_id)
+            if (last is not None and last >= cutoff) or session_id in self._reaping:
+                return False
+            if self._last_activity.pop(session_id, None) is not None:
+                self._dirty = True
+            self._reaping.add(session_id)
+        try:
+            deleted = _delete_session(self.sessions_root, session_id)
+        finally:
+            with self._cond:
+                self._reaping.discard(session_id)
+        if deleted:
+            with self._cond:
+                self.stats["reaped"] += 1
+        return deleted
+
+    def _next_timeout(self) -> Optional[float]:
+        """Seconds until the earliest live deadline (None if nothing is tracked)"""
+        while self._heap:
+            deadline, session_id = self._heap[0]
+            last = self._last_activity.get(session_id)
+            if last is None or last + self.max_age != deadline:
+                heapq.heappop(self._heap)  # 過時項目
+                continue
+            return deadline - time.time()
+        return None
+
+    def _pop_expired(self, now: float) -> List[str]:
+        batch = []
+        while self._heap and len(batch) < REAPER_BATCH_SIZE:
+            deadline, session_id = self._heap[0]
+            last = self._last_activity.get(session_id)
+            if last is None or last + self.max_age != deadline:
+                heapq.heappop(self._heap)
+                continue
+            if deadline > now:
+                break
+            heapq.heappop(self._heap)
+            del self._last_activity[session_id]
+            batch.append(session_id)
+        if batch:
+            self._dirty = True
+        return batch
+
+    def _compact(self):
+        """Rebuild the heap when stale entries dominate it"""
+        if len(self._heap) > 2 * len(self._last_activity) + 64:
+            self._heap = [(last + self.max_age, sid) for sid, last in self._last_activity.items()]
+            heapq.heapify(self._heap)
+
+    # ---- 索引持久化 ----
+
+    def _ensure_index_loaded(self):
+        with self._load_lock:
+            if not self._index_loaded:
+                self._load_index()
+                self._index_loaded = True
+
+    def _load_index(self):
+        """Load the persisted index; without one, scan existing session directories once"""
+        entries: Dict[str, float] = {}
+        try:
+            if self.index_path.exists():
+                entries = {sid: float(t) for sid, t in json.loads(self.index_path.read_text(encoding="utf-8")).items()}
+            elif self.sessions_root.exists():
+                for session_dir in self.sessions_root.iterdir():
+                    if session_dir.is_dir() and SESSION_ID_PATTERN.match(session_dir.name):
+                        entries[session_dir.name] = session_dir.stat().st_mtime
+                self._dirty = True
+        except Exception as e:
+            logger.error(f"讀取會話索引失敗: {e}")
+
+        with self._cond:
+            for session_id, last in entries.items():
+                if not SESSION_ID_PATTERN.match(session_id):
+                    continue
+                if session_id not in self._last_activity or last > self._last_activity[session_id]:
+                    self._last_activity[session_id] = last
+            self._heap = [(last + self.max_age, sid) for sid, last in self._last_activity.items()]
+            heapq.heapify(self._heap)
+
+    def _flush(self, force: bool = False):
+        with self._cond:
+            if not self._dirty or (not force and time.time() - self._last_flush < REAPER_FLUSH_INTERVAL):
+                return
+            snapshot = dict(self._last_activity)
+            self._dirty = False
+            self._last_flush = time.time()
+        try:
+            self.sessions_root.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(snapshot), encoding="utf-8")
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            logger.error(f"寫入會話索引失敗: {e}")
+
+_reaper: Optional[SessionReaper] = None
+_reaper_lock = threading.Lock()
+
+def get_session_reaper() -> SessionReaper:
+    """獲取進程內唯一的會話回收器（首次使用時啟動背景執行緒）"""
+    global _reaper
+    if _reaper is None:
+        with _reaper_lock:
+            if _reaper is None:
+                reaper = SessionReaper()
+                reaper.start()
+                _reaper = reaper
+    return _reaper
 
 def cleanup_expired_sessions(max_age_hours: int = MAX_SESSION_AGE_HOURS):
     """
-    清理超過指定時間未活動的會話（方案 A）
-    
+    完整掃描並清理超過指定時間未活動的會話（維護用；一般請求由 SessionReaper 處理）
+    最後活動時間取自回收器索引（.session_index.json），索引中沒有的目錄才以 mtime 判斷
+
     Args:
         max_age_hours: 會話最大保留時間（小時）
     """
-    if not SESSIONS_DIR.exists():
-        return
-    
-    cutoff_time = time.time() - (max_age_hours * 3600)
-    cleaned_count = 0
-    
-    for session_dir in SESSIONS_DIR.iterdir():
-        if not session_dir.is_dir():
-            continue
-        
-        # 檢查目錄修改時間（最後活動時間）
-        mtime = session_dir.stat().st_mtime
-        
-        if mtime < cutoff_time:
-            try:
-                shutil.rmtree(session_dir)
-                cleaned_count += 1
-                logger.info(f"已清理過期會話: {session_dir.name}")
-            except Exception as e:
-                logger.error(f"清理會話失敗 {session_dir.name}: {e}")
-    
+    cleaned_count = get_session_reaper().sweep(max_age_hours)
+
     if cleaned_count > 0:
         logger.info(f"共清理 {cleaned_count} 個過期會話")
 
 def smart_cleanup():
     """
-    智能清理：在請求時檢查並清理過期會話
-    只在第一次請求時執行（避免每次都執行）
+    確保背景回收器已啟動並記錄本會話的活動（不在請求路徑上掃描目錄）
     """
-    # 只在第一次請求時執行（避免每次都執行）
+    import streamlit as st
     if 'cleanup_done' not in st.session_state:
         try:
-            cleanup_expired_sessions()
+            from .output_config import get_session_id
+            get_session_reaper().touch(get_session_id())
             st.session_state['cleanup_done'] = True
         except Exception as e:
             logger.error(f"清理任務錯誤: {e}")
             # 清理失敗不影響主流程
-
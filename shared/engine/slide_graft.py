@@ -0,0 +1,198 @@
+"""
+Slide Grafting
+投影片嫁接：在 OPC 套件層級將投影片（含關聯與媒體）移入另一份簡報
+
+Grafting moves already-parsed parts between python-pptx packages instead of
+rebuilding slides shape by shape:
+
+    - each source slide part (and everything it relates to: images, charts,
+      embedded workbooks, ...) is re-homed into the host package under a fresh
+      partname; nothing is re-parsed or deep-copied
+    - the slide's layout relationship is re-pointed at a host layout
+    - identical media already present in the host is reused (SHA1 match)
+    - the slide is inserted at any position by reordering sldIdLst
+
+Cost scales with the inserted slides only; the host deck is never rebuilt.
+Parts are moved, not copied: the source Presentation must not be used or saved
+after grafting.
+
+Works on python-pptx 1.x OPC internals (_Relationship, Part._package, the rels
+mapping); requirements.txt pins python-pptx>=1.0,<2 accordingly.
+"""
+import re
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part, _Relationship
+from pptx.opc.packuri import PackURI
+from pptx.parts.image import ImagePart
+
+logger = logging.getLogger(__name__)
+
+# Relationships that must not follow a slide into the host package
+_DROPPED_RELTYPES = {RT.NOTES_SLIDE}
+_PARTNAME_NUMBER = re.compile(r"^(.*?)(\d*)(\.[^./]+)$")
+
+
+def find_blank_layout(prs):
+    """Return the host's blank layout (by name, then index 6, then the last layout)"""
+    for layout in prs.slide_layouts:
+        name = layout.name.lower()
+        if 'blank' in name or 'empty' in name or layout.name == '空白':
+            return layout
+    if len(prs.slide_layouts) > 6:
+        return prs.slide_layouts[6]
+    return prs.slide_layouts[len(prs.slide_layouts) - 1]
+
+
+def layout_by_name(host_prs, fallback=None) -> Callable:
+    """
+    Layout resolver: host layout with the same name as the source layout, else `fallback`
+    (defaults to the host's blank layout)
+    """
+    host_layouts = {layout.name: layout for layout in host_prs.slide_layouts}
+    fallback = fallback or find_blank_layout(host_prs)
+    return lambda source_layout: host_layouts.get(source_layout.name, fallback)
+
+
+class SlideGrafter:
+    """
+    Moves slides from source presentations into one host presentation
+
+    Reuse one instance for several grafts into the same host so that the
+    partname and media indexes are built only once.
+    """
+
+    def __init__(self, host_prs, dedupe_media: bool = True):
+        """
+        Args:
+            host_prs: Host Presentation that receives the slides
+            dedupe_media: Reuse identical host image parts instead of adding copies
+        """
+        self.host_prs = host_prs
+        self.host_package = host_prs.part.package
+        self.dedupe_media = dedupe_media
+
+        self._used_partnames: Set[str] = set()
+        self._next_number: Dict[str, int] = {}
+        self._images_by_sha1: Dict[str, ImagePart] = {}
+        for part in self.host_package.iter_parts():
+            self._used_partnames.add(str(part.partname))
+            if isinstance(part, ImagePart):
+                self._images_by_sha1.setdefault(part.sha1, part)
+
+        self.stats = {"slides": 0, "parts_moved": 0, "media_reused": 0}
+
+    def graft(
+        self,
+        source_prs,
+        index: Optional[int] = None,
+        layout_resolver: Optional[Callable] = None,
+        slide_indices: Optional[Iterable[int]] = None
+    ) -> List:
+        """
+        Move slides from `source_prs` into the host
+
+        Args:
+            source_prs: Source Presentation (consumed: do not use it afterwards)
+            index: 0-based position of the first inserted slide (None = append)
+            layout_resolver: Maps a source SlideLayout to a host SlideLayout
+                             (defaults to layout_by_name with blank fallback)
+            slide_indices: Subset of source slides to move (default: all, in order)
+
+        Returns:
+            List of grafted Slide objects (now owned by the host)
+        """
+        layout_resolver = layout_resolver or layout_by_name(self.host_prs)
+        source_slides = list(source_prs.slides)
+        if slide_indices is not None:
+            source_slides = [source_slides[i] for i in slide_indices]
+
+        sldIdLst = self.host_prs.slides._sldIdLst
+        if index is None or index > len(sldIdLst):
+            index = len(sldIdLst)
+        index = max(index, 0)
+
+        adopted: Dict[Part, Part] = {}
+        grafted = []
+        for offset, source_slide in enumerate(source_slides):
+            slide_part = source_slide.part
+            host_layout = layout_resolver(source_slide.slide_layout)
+
+            for rId, rel in list(slide_part.rels.items()):
+                if rel.reltype in _DROPPED_RELTYPES:
+                    slide_part.rels.pop(rId)
+                elif rel.reltype == RT.SLIDE_LAYOUT:
+                    self._retarget(slide_part, rel, host_layout.part)
+
+            self._adopt(slide_part, adopted)
+
+            rId = self.host_prs.part.relate_to(slide_part, RT.SLIDE)
+            sldId = sldIdLst.add_sldId(rId)
+            sldIdLst.remove(sldId)
+            sldIdLst.insert(index + offset, sldId)
+
+            grafted.append(slide_part.slide)
+
+        self.stats["slides"] += len(grafted)
+        logger.info(f"Grafted {len(grafted)} slides at position {index + 1} "
+                    f"({self.stats['parts_moved']} parts moved, {self.stats['media_reused']} media reused)")
+        return grafted
+
+    def _adopt(self, part: Part, adopted: Dict[Part, Part]) -> Part:
+        """Re-home `part` and its related parts into the host package; return the host part"""
+        if part in adopted:
+            return adopted[part]
+        if part.package is self.host_package:
+            return part
+
+        if self.dedupe_media and isinstance(part, ImagePart):
+            existing = self._images_by_sha1.get(part.sha1)
+            if existing is not None:
+                adopted[part] = existing
+                self.stats["media_reused"] += 1
+                return existing
+
+        part.partname = self._allocate_partname(str(part.partname))
+        part._package = self.host_package
+        adopted[part] = part
+        self.stats["parts_moved"] += 1
+        if isinstance(part, ImagePart):
+            self._images_by_sha1.setdefault(part.sha1, part)
+
+        for rel in list(part.rels.values()):
+            if rel.is_external:
+                continue
+            target = self._adopt(rel.target_part, adopted)
+            if target is not rel.target_part:
+                self._retarget(part, rel, target)
+        return part
+
+    def _allocate_partname(self, partname: str) -> PackURI:
+        """Next unused partname following the numbering scheme of `partname`"""
+        prefix, _, ext = _PARTNAME_NUMBER.match(partname).groups()
+        key = prefix + "%d" + ext
+        n = self._next_number.get(key, 1)
+        while (prefix + str(n) + ext) in self._used_partnames:
+            n += 1
+        self._next_number[key] = n + 1
+        new_partname = prefix + str(n) + ext
+        self._used_partnames.add(new_partname)
+        return PackURI(new_partname)
+
+    @staticmethod
+    def _retarget(part: Part, rel: _Relationship, target: Part):
+        """Point an existing relationship (same rId) at another part"""
+        part.rels._rels[rel.rId] = _Relationship(
+            part.rels._base_uri, rel.rId, rel.reltype, rel._target_mode, target
+        )
+
+
+def graft_slides(host_prs, source_prs, index: Optional[int] = None, layout_resolver: Optional[Callable] = None) -> List:
+    """
+    Move every slide of `source_prs` into `host_prs` at `index` (0-based, None = append)
+
+    Convenience wrapper around SlideGrafter for a single graft.
+    """
+    return SlideGrafter(host_prs).graft(source_prs, index=index, layout_resolver=layout_resolver)
@@ -19,6 +19,8 @@ from .main import (
     generate_table,
     generate_all_tables,
     generate_table_content,
+    generate_table_content_async,
+    generate_all_table_contents_async,
     load_table_module,
     generate_combined_pptx
 )
@@ -39,6 +41,8 @@ __all__ = [
     'generate_table',
     'generate_all_tables',
     'generate_table_content',
+    'generate_table_content_async',
+    'generate_all_table_contents_async',
     'load_table_module',
     'generate_combined_pptx'
 ]
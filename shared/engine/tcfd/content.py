@@ -3,6 +3,10 @@ TCFD Prompt Content
 Prompt 內容模板：所有表格的 prompt 定義
 """
 from .config import DEFAULT_INDUSTRY, DEFAULT_REVENUE
+from ..carbon.scenarios import scenario_targets, format_scenario_context
+
+# 使用計算情境數值的 prompt（LLM 只需撰寫敘述，不需自行推估數字）
+SCENARIO_PROMPT_IDS = ('prompt_table_5_metrics',)
 
 
 def get_common_role(industry: str = None, revenue: str = None) -> str:
@@ -63,6 +67,14 @@ Context: Current carbon emission data
 - Region: {emission_data.get('region', 'N/A')}
 """
         full_prompt = f"{full_prompt}\n\n{emission_context}"
+        
+        # Table 5：附上確定性的減碳情境數值，LLM 直接引用
+        if prompt_id in SCENARIO_PROMPT_IDS:
+            scenario_context = format_scenario_context(scenario_targets(emission_data))
+            full_prompt = f"""{full_prompt}
+Computed Scope 1+2 pathways (use these figures verbatim as targets; do not invent other numbers; keep each cell under 30 words):
+{scenario_context}
+"""
     
     return full_prompt
 
@@ -2,6 +2,7 @@
 TCFD Main Engine
 主邏輯：協調配置、內容生成和表格生成
 """
+import asyncio
 import os
 import sys
 import importlib.util
@@ -9,22 +10,35 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any
 import json
 import re
+import time
 
 from . import config
 from . import content
-from ..path_manager import get_tcfd_output_path, update_session_activity
+from ..carbon.scenarios import scenario_targets
+from ..aio import run_sync
+from ..pptx_writer import write_pptx
+from ..path_manager import get_tcfd_output_path, update_session_activity, register_report
+from ..tracing import span, traced, current_span, diagnostic, diagnostics_enabled
+from ..usage_ledger import current_labels, degraded_reasons, mark_degraded, metered, record_call, usage_labels
 
 # 嘗試導入 Claude API
 try:
     import anthropic
+    from shared.llm.claude_client import get_pooled_async_client
+    from shared.llm.hedging import create_message_async
+    from shared.llm.routing import get_router, expected_lines
     ANTHROPIC_AVAILABLE = True
 except ImportError:
     ANTHROPIC_AVAILABLE = False
 
 
+# script_file -> (mtime_ns, module)；表格模組（及其快取的表格骨架）只在檔案變更時重新載入
+_table_modules: Dict[str, tuple] = {}
+
+
 def load_table_module(script_file: str):
     """
-    動態載入表格生成模組
+    動態載入表格生成模組（依檔案修改時間快取）
     
     Args:
         script_file: 表格腳本文件名（如 'table01.py'）
@@ -37,6 +51,11 @@ def load_table_module(script_file: str):
     if not script_path.exists():
         raise FileNotFoundError(f"Table script not found: {script_path}")
     
+    mtime_ns = script_path.stat().st_mtime_ns
+    cached = _table_modules.get(script_file)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    
     module_name = f"tcfd_table_{script_file.replace('.py', '')}"
     spec = importlib.util.spec_from_file_location(module_name, script_path)
     
@@ -46,13 +65,23 @@ def load_table_module(script_file: str):
     module = importlib.util.module_from_spec(spec)
     sys.modules[module_name] = module
     spec.loader.exec_module(module)
+    _table_modules[script_file] = (mtime_ns, module)
     
     return module
 
 
 def call_claude_api(prompt: str, api_key: str, model: str = None) -> str:
     """
-    調用 Claude API 生成內容
+    調用 Claude API 生成內容（call_claude_api_async 的同步包裝）
+    """
+    if not ANTHROPIC_AVAILABLE:
+        raise ImportError("anthropic package not installed. Install with: pip install anthropic")
+    return run_sync(call_claude_api_async(prompt, api_key, model=model))
+
+
+async def call_claude_api_async(prompt: str, api_key: str, model: str = None) -> str:
+    """
+    調用 Claude API 生成內容（AsyncAnthropic，受 event loop 的 LLM semaphore 限流）
     
     使用多個備選模型，第一個失敗就嘗試下一個
     
@@ -79,19 +108,26 @@ def call_claude_api(prompt: str, api_key: str, model: str = None) -> str:
     if model:
         model_list = [model] + [m for m in model_list if m != model]
     
-    client = anthropic.Anthropic(api_key=api_key)
+    client = get_pooled_async_client(api_key)
     
-    # 嘗試每個模型，直到成功
+    # 嘗試每個模型，直到成功（整個過程記為一次呼叫，換模型次數記為 retries）
     last_error = None
-    for model_name in model_list:
+    started = time.perf_counter()
+    for attempt, model_name in enumerate(model_list):
         try:
-            message = client.messages.create(
-                model=model_name,
-                max_tokens=2000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            with span("llm.call", provider="anthropic", model=model_name, prompt_chars=len(prompt)) as llm_span:
+                message = await create_message_async(
+                    client, current_labels().get("prompt"),
+                    model=model_name,
+                    max_tokens=2000,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
+                usage = getattr(message, "usage", None)
+                if usage is not None:
+                    llm_span.set_attributes(input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+            record_call(model_name, time.perf_counter() - started, message, retries=attempt)
             return message.content[0].text
         except Exception as e:
             last_error = e
@@ -99,9 +135,11 @@ def call_claude_api(prompt: str, api_key: str, model: str = None) -> str:
             if "not_found_error" in str(e) or "404" in str(e):
                 continue
             # 其他錯誤直接拋出
+            record_call(model_name, time.perf_counter() - started, retries=attempt, error=e)
             raise
     
     # 所有模型都失敗
+    record_call(model_list[-1], time.perf_counter() - started, retries=len(model_list) - 1, error=last_error)
     raise Exception(f"All models failed. Last error: {str(last_error)}")
 
 
@@ -194,8 +232,14 @@ def generate_mock_data(prompt_id: str, industry: str = None, carbon_emission: Di
         ]
     elif 'metrics' in prompt_id:
         total_emission = carbon_emission.get('total_tco2e', 100) if carbon_emission else 100
+        # 使用情境引擎計算的 2030 / 2050 目標值（Stated Policies 與 Net Zero 2050）
+        baseline = carbon_emission if carbon_emission and carbon_emission.get('scope2') is not None else {
+            "scope1": total_emission * 0.1, "scope2": total_emission * 0.9
+        }
+        targets = scenario_targets(baseline)
+        stated, net_zero = targets[1]["milestones"], targets[-1]["milestones"]
         return [
-            f"GHG Emissions Target;Reduce total emissions by 30% by 2030 (Current: {total_emission:.1f} tCO2e). Achieve carbon neutrality by 2040 through comprehensive emission reduction strategies ||| Progress: 15% reduction achieved through energy efficiency improvements. On track to meet 2030 target with current initiatives. Additional 10% reduction planned through renewable energy transition ||| Action Plan: Energy efficiency projects, renewable energy adoption, and process optimization. Implement carbon capture technologies where feasible. Budget: $1M for efficiency projects, $2M for renewable energy, $500K for monitoring",
+            f"GHG Emissions Target;Reduce Scope 1+2 emissions to {net_zero[2030]['tco2e']:.1f} tCO2e by 2030 (-{net_zero[2030]['reduction_pct']:.1f}%, Current: {total_emission:.1f} tCO2e) and {net_zero[2050]['tco2e']:.1f} tCO2e by 2050 (-{net_zero[2050]['reduction_pct']:.1f}%) on the Net Zero 2050 pathway; stated-policy trajectory reaches {stated[2030]['tco2e']:.1f} tCO2e by 2030 ||| Progress: 15% reduction achieved through energy efficiency improvements. On track to meet 2030 target with current initiatives. Additional 10% reduction planned through renewable energy transition ||| Action Plan: Energy efficiency projects, renewable energy adoption, and process optimization. Implement carbon capture technologies where feasible. Budget: $1M for efficiency projects, $2M for renewable energy, $500K for monitoring",
             f"Renewable Energy Target;Increase renewable energy usage to 50% by 2028 and 100% by 2035. Reduce dependence on fossil fuels and achieve energy independence ||| Progress: 25% renewable energy achieved through solar installations. Wind power projects in planning phase. Grid integration systems being developed ||| Action Plan: Solar and wind investments, energy storage systems, and grid infrastructure upgrades. Develop long-term energy procurement strategy. Budget: $2M for solar, $1.5M for wind, $800K for storage systems",
             f"Water Conservation Target;Reduce water consumption by 40% by 2030 through efficiency improvements and recycling systems. Achieve zero wastewater discharge by 2035 ||| Progress: 20% reduction achieved through process optimization. Water recycling pilot program showing positive results. Monitoring systems in place ||| Action Plan: Advanced water treatment and recycling systems. Process redesign for water efficiency. Implement water monitoring and management systems. Budget: $1.2M for recycling systems, $600K for process upgrades, $200K for monitoring",
             f"Waste Reduction Target;Achieve zero waste to landfill by 2030 through comprehensive recycling and circular economy initiatives. Reduce overall waste generation by 50% ||| Progress: 30% waste reduction achieved through source reduction programs. Recycling rate increased to 75%. Composting programs established ||| Action Plan: Waste minimization programs, advanced recycling infrastructure, and circular economy partnerships. Develop waste-to-energy solutions. Budget: $900K for recycling infrastructure, $400K for programs, $300K for partnerships"
@@ -230,6 +274,24 @@ def generate_table_content(
     llm_api_key: str = None,
     llm_provider: str = None,
     use_mock: bool = False
+) -> List[str]:
+    """
+    生成表格內容（generate_table_content_async 的同步包裝）
+    """
+    return run_sync(generate_table_content_async(
+        prompt_id, industry=industry, revenue=revenue, carbon_emission=carbon_emission,
+        llm_api_key=llm_api_key, llm_provider=llm_provider, use_mock=use_mock
+    ))
+
+
+async def generate_table_content_async(
+    prompt_id: str,
+    industry: str = None,
+    revenue: str = None,
+    carbon_emission: Dict[str, Any] = None,
+    llm_api_key: str = None,
+    llm_provider: str = None,
+    use_mock: bool = False
 ) -> List[str]:
     """
     生成表格內容（調用 LLM 或使用模擬數據）
@@ -247,31 +309,76 @@ def generate_table_content(
         表格內容列表（每行是 ||| 分隔的字符串）
     """
     # 構建完整 prompt
-    full_prompt = content.get_prompt(
-        prompt_id=prompt_id,
-        industry=industry,
-        revenue=revenue,
-        carbon_emission=carbon_emission
-    )
+    with span("prompt.build", prompt_id=prompt_id):
+        full_prompt = content.get_prompt(
+            prompt_id=prompt_id,
+            industry=industry,
+            revenue=revenue,
+            carbon_emission=carbon_emission
+        )
     
     # 如果明確要求使用 Mock，或沒有提供 API Key，使用模擬數據
     if use_mock or not llm_api_key or not llm_provider:
-        return generate_mock_data(prompt_id, industry, carbon_emission)
+        with span("mock.generate", prompt_id=prompt_id):
+            return generate_mock_data(prompt_id, industry, carbon_emission)
     
     # 嘗試調用 LLM API
     try:
         if llm_provider.lower() == 'anthropic' or llm_provider.lower() == 'claude':
-            response = call_claude_api(full_prompt, llm_api_key)
-            return parse_llm_response(response)
+            # 依路由表選擇模型等級；行數不足時升級一級重試一次（已是最高等級則不重試）
+            router = get_router()
+            tier = router.tier_for(prompt_id)
+            rows_expected = expected_lines(full_prompt)
+            quality_retry = False
+            while True:
+                with usage_labels(prompt=prompt_id):
+                    response = await call_claude_api_async(full_prompt, llm_api_key, model=router.model_for_tier(tier))
+                with span("llm.parse", response_chars=len(response), tier=tier) as parse_span:
+                    data_lines = parse_llm_response(response)
+                    parse_span.set("rows", len(data_lines))
+                if quality_retry or rows_expected is None or len(data_lines) >= rows_expected:
+                    break
+                if not router.can_escalate(tier):
+                    break
+                router.record(tier, quality_retry=True)
+                quality_retry = True
+                tier = router.escalate(tier)
+            router.record(tier)
+            return data_lines
         else:
             # 不支持的提供商，使用 Mock
             return generate_mock_data(prompt_id, industry, carbon_emission)
     except Exception as e:
         print(f"Error calling LLM API: {str(e)}")
-        # API 調用失敗，回退到 Mock
+        current_span().event("llm.fallback", error=str(e))
+        # API 調用失敗（或斷路器已斷開），回退到 Mock，報告標示為降級
+        mark_degraded(type(e).__name__)
         return generate_mock_data(prompt_id, industry, carbon_emission)
 
 
+async def generate_all_table_contents_async(
+    page_keys: List[str],
+    **kwargs
+) -> Dict[str, List[str]]:
+    """
+    並行生成多個頁面的表格內容
+
+    Args:
+        page_keys: 頁面鍵列表（如 ['page_1', 'page_2']）
+        **kwargs: 傳給 generate_table_content_async 的參數（industry, llm_api_key, use_mock...）
+
+    Returns:
+        字典：{page_key: 表格內容列表}
+    """
+    async def one(page_key: str) -> List[str]:
+        page_info = config.TCFD_PAGES[page_key]
+        with usage_labels(page=page_key, table=Path(page_info['script_file']).stem):
+            return await generate_table_content_async(page_info['prompt_id'], **kwargs)
+
+    results = await asyncio.gather(*(one(page_key) for page_key in page_keys))
+    return dict(zip(page_keys, results))
+
+
 def generate_table(
     page_key: str,
     output_dir: Path = None,
@@ -313,15 +420,16 @@ def generate_table(
         if use_mock is None:
             use_mock = (not llm_api_key or not llm_provider)
         
-        data_lines = generate_table_content(
-            prompt_id=page_info['prompt_id'],
-            industry=industry,
-            revenue=revenue,
-            carbon_emission=carbon_emission,
-            llm_api_key=llm_api_key,
-            llm_provider=llm_provider,
-            use_mock=use_mock
-        )
+        with usage_labels(module="tcfd", page=page_key, table=Path(page_info['script_file']).stem):
+            data_lines = generate_table_content(
+                prompt_id=page_info['prompt_id'],
+                industry=industry,
+                revenue=revenue,
+                carbon_emission=carbon_emission,
+                llm_api_key=llm_api_key,
+                llm_provider=llm_provider,
+                use_mock=use_mock
+            )
         
         # 3. 調用表格生成函數
         entry_func_name = page_info['entry_function']
@@ -386,6 +494,8 @@ def generate_all_tables(
     return results
 
 
+@traced("tcfd.build")
+@metered("tcfd")
 def generate_combined_pptx(
     output_filename: str = "TCFD_table.pptx",
     template_path: Path = None,
@@ -445,85 +555,101 @@ def generate_combined_pptx(
         
         # 按順序生成每個表格
         slide_order = ['page_1', 'page_2', 'page_3', 'page_4', 'page_5', 'page_6', 'page_7']
+        slide_order = [page_key for page_key in slide_order if page_key in config.TCFD_PAGES]
         
-        for page_key in slide_order:
-            if page_key not in config.TCFD_PAGES:
-                continue
-            
-            page_info = config.TCFD_PAGES[page_key]
-            
-            # 載入表格生成模組
-            table_module = load_table_module(page_info['script_file'])
-            func = getattr(table_module, page_info['entry_function'])
-            
-            # 檢查函數簽名
-            import inspect
-            sig = inspect.signature(func)
-            has_prs_param = 'prs' in sig.parameters
-            
-            # 生成表格內容（所有表格都需要）
-            data_lines = generate_table_content(
-                prompt_id=page_info['prompt_id'],
+        # 所有表格內容並行生成（LLM 呼叫共用 event loop 的 semaphore），再依序渲染
+        with span("tcfd.content", pages=len(slide_order)):
+            contents = run_sync(generate_all_table_contents_async(
+                slide_order,
                 industry=industry,
                 revenue=revenue,
                 carbon_emission=carbon_emission,
                 llm_api_key=llm_api_key,
                 llm_provider=llm_provider,
                 use_mock=use_mock
-            )
+            ))
+        
+        for page_key in slide_order:
             
-            # 統一處理：如果函數接受 prs 參數，直接傳入；否則使用臨時文件
-            try:
-                if has_prs_param:
-                    # 函數接受 prs 參數，直接添加到主 PPTX（一次輸出，不用 add_slide）
-                    # 檢查是否還需要 data_lines 參數
-                    if 'data_lines' in sig.parameters:
-                        func(prs=prs, data_lines=data_lines)
-                    else:
-                        func(prs=prs)
-                else:
-                    # 函數不接受 prs 參數，使用臨時文件（向後兼容）
-                    with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False) as tmp:
-                        temp_file = Path(tmp.name)
-                    
+            page_info = config.TCFD_PAGES[page_key]
+            with span("tcfd.table", page=page_key, script=page_info['script_file']), \
+                    usage_labels(page=page_key, table=Path(page_info['script_file']).stem):
+                # 載入表格生成模組
+                table_module = load_table_module(page_info['script_file'])
+                func = getattr(table_module, page_info['entry_function'])
+            
+                # 檢查函數簽名
+                import inspect
+                sig = inspect.signature(func)
+                has_prs_param = 'prs' in sig.parameters
+            
+                # 表格內容（已並行生成）
+                data_lines = contents[page_key]
+            
+                # 統一處理：如果函數接受 prs 參數，直接傳入；否則使用臨時文件
+                with span("tcfd.render", page=page_key, rows=len(data_lines)):
                     try:
-                        # 生成臨時文件
-                        func(data_lines=data_lines, filename=str(temp_file))
+                        if has_prs_param:
+                            # 函數接受 prs 參數，直接添加到主 PPTX（一次輸出，不用 add_slide）
+                            # 檢查是否還需要 data_lines 參數
+                            if 'data_lines' in sig.parameters:
+                                func(prs=prs, data_lines=data_lines)
+                            else:
+                                func(prs=prs)
+                        else:
+                            # 函數不接受 prs 參數，使用臨時文件（向後兼容）
+                            with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False) as tmp:
+                                temp_file = Path(tmp.name)
+                    
+                            try:
+                                # 生成臨時文件
+                                func(data_lines=data_lines, filename=str(temp_file))
                         
-                        # 讀取臨時文件的 slide，直接移動到主 PPTX
-                        temp_prs = Presentation(str(temp_file))
+                                # 讀取臨時文件的 slide，直接移動到主 PPTX
+                                temp_prs = Presentation(str(temp_file))
                         
-                        # 直接移動 slide 的 XML 元素到主 prs（一次輸出，不用 add_slide）
-                        import copy
-                        for slide in temp_prs.slides:
-                            # 深拷貝 slide 的 XML 元素
-                            slide_element = copy.deepcopy(slide._element)
-                            # 添加到主 prs 的 slide ID 列表
-                            prs.slides._sldIdLst.append(slide_element)
-                    finally:
-                        # 刪除臨時文件
-                        if temp_file.exists():
-                            os.unlink(temp_file)
-            except Exception as table_error:
-                # 捕獲單個表格的錯誤，提供詳細信息
-                error_msg = f"Error generating table {page_key} ({page_info['title']}): {str(table_error)}"
-                print(error_msg)
-                import traceback
-                print(f"Table {page_key} traceback:")
-                traceback.print_exc()
-                # 重新拋出錯誤，讓外層處理
-                raise Exception(error_msg) from table_error
+                                # 直接移動 slide 的 XML 元素到主 prs（一次輸出，不用 add_slide）
+                                import copy
+                                for slide in temp_prs.slides:
+                                    # 深拷貝 slide 的 XML 元素
+                                    slide_element = copy.deepcopy(slide._element)
+                                    # 添加到主 prs 的 slide ID 列表
+                                    prs.slides._sldIdLst.append(slide_element)
+                            finally:
+                                # 刪除臨時文件
+                                if temp_file.exists():
+                                    os.unlink(temp_file)
+                    except Exception as table_error:
+                        # 捕獲單個表格的錯誤，提供詳細信息
+                        error_msg = f"Error generating table {page_key} ({page_info['title']}): {str(table_error)}"
+                        print(error_msg)
+                        import traceback
+                        print(f"Table {page_key} traceback:")
+                        traceback.print_exc()
+                        # 重新拋出錯誤，讓外層處理
+                        raise Exception(error_msg) from table_error
         
         # 保存文件 - 使用統一的路徑管理器
         import streamlit as st
         
-        print("[DEBUG] ========== TCFD 文件保存開始 ==========")
+        # 有表格以 Mock 內容代替（LLM 不可用）：在文件屬性與 UI 中標示為降級報告
+        degraded = degraded_reasons()
+        if degraded:
+            prs.core_properties.keywords = "degraded"
+            prs.core_properties.comments = f"DEGRADED: LLM unavailable, sample content used ({', '.join(degraded)})"
+            print(f"[WARNING] Degraded TCFD report: {sum(degraded.values())} table(s) use sample content ({', '.join(degraded)})")
+            try:
+                st.warning(f"⚠️ LLM 服務不可用，{sum(degraded.values())} 個表格使用範例內容（降級報告）")
+            except:
+                pass
+        
+        diagnostic("[DEBUG] ========== TCFD 文件保存開始 ==========")
         
         # 使用統一的 path_manager 獲取輸出路徑（包含 session_id）
         try:
-            print("[DEBUG] Step 1: 獲取輸出路徑...")
+            diagnostic("[DEBUG] Step 1: 獲取輸出路徑...")
             output_path = get_tcfd_output_path()
-            print(f"[DEBUG] Step 1 成功: {output_path}")
+            diagnostic(f"[DEBUG] Step 1 成功: {output_path}")
         except Exception as path_error:
             error_msg = f"[ERROR] Failed to get output path: {str(path_error)}"
             print(error_msg)
@@ -541,7 +667,7 @@ def generate_combined_pptx(
         
         # 確保目錄存在（強制創建）
         try:
-            print(f"[DEBUG] Step 2: 強制創建目錄 {output_path.parent}...")
+            diagnostic(f"[DEBUG] Step 2: 強制創建目錄 {output_path.parent}...")
             
             # 方法 1: 標準 mkdir
             try:
@@ -551,7 +677,7 @@ def generate_combined_pptx(
                 # 方法 2: 使用 os.makedirs 強制創建
                 try:
                     os.makedirs(str(output_path.parent), exist_ok=True, mode=0o777)
-                    print(f"[DEBUG] os.makedirs() 成功")
+                    diagnostic(f"[DEBUG] os.makedirs() 成功")
                 except Exception as e2:
                     print(f"[ERROR] os.makedirs() 也失敗: {e2}")
                     raise
@@ -566,9 +692,8 @@ def generate_combined_pptx(
             except:
                 pass  # 權限修改失敗不影響
             
-            print(f"[DEBUG] Step 2 成功: 目錄已創建/存在")
-            print(f"[DEBUG] 目錄是否存在: {output_path.parent.exists()}")
-            print(f"[DEBUG] 目錄是否可寫: {os.access(output_path.parent, os.W_OK)}")
+            if diagnostics_enabled():
+                diagnostic(f"[DEBUG] Step 2 成功: 目錄已創建/存在，可寫={os.access(output_path.parent, os.W_OK)}")
         except Exception as dir_error:
             error_msg = f"[ERROR] Failed to create output directory: {str(dir_error)}"
             print(error_msg)
@@ -585,16 +710,16 @@ def generate_combined_pptx(
         
         # 保存文件
         try:
-            print(f"[DEBUG] Step 3: 保存文件到 {output_path}...")
-            print(f"[DEBUG] Presentation 對象: {type(prs)}")
-            print(f"[DEBUG] Slides 數量: {len(prs.slides)}")
+            diagnostic(f"[DEBUG] Step 3: 保存文件到 {output_path}...")
+            diagnostic(f"[DEBUG] Presentation 對象: {type(prs)}")
+            diagnostic(f"[DEBUG] Slides 數量: {len(prs.slides)}")
             
             # 確保路徑是字符串
             save_path = str(output_path)
-            print(f"[DEBUG] 保存路徑 (字符串): {save_path}")
+            diagnostic(f"[DEBUG] 保存路徑 (字符串): {save_path}")
             
             # 強制保存文件（多次嘗試）
-            print(f"[DEBUG] 準備保存文件到: {save_path}")
+            diagnostic(f"[DEBUG] 準備保存文件到: {save_path}")
             
             # 確保父目錄存在且可寫（多次嘗試）
             parent_dir = Path(save_path).parent
@@ -621,12 +746,13 @@ def generate_combined_pptx(
                 print(f"[WARNING] 父目錄不可寫，嘗試修改權限...")
                 try:
                     os.chmod(str(parent_dir), 0o777)
-                    print(f"[DEBUG] 權限修改完成")
+                    diagnostic(f"[DEBUG] 權限修改完成")
                 except Exception as perm_ex:
                     print(f"[WARNING] 無法修改權限: {perm_ex}")
                     # 即使權限修改失敗，也繼續嘗試保存
             
-            print(f"[DEBUG] 父目錄狀態: 存在={parent_dir.exists()}, 可寫={os.access(parent_dir, os.W_OK)}")
+            if diagnostics_enabled():
+                diagnostic(f"[DEBUG] 父目錄狀態: 存在={parent_dir.exists()}, 可寫={os.access(parent_dir, os.W_OK)}")
             
             # 強制保存文件（多次嘗試不同方法）
             save_success = False
@@ -634,9 +760,10 @@ def generate_combined_pptx(
             
             # 嘗試 1: 直接保存
             try:
-                print(f"[DEBUG] 嘗試 1: 直接保存到 {save_path}")
-                prs.save(save_path)
-                print(f"[DEBUG] prs.save() 調用完成")
+                diagnostic(f"[DEBUG] 嘗試 1: 直接保存到 {save_path}")
+                with span("tcfd.save", slides=len(prs.slides)):
+                    write_pptx(prs, save_path)
+                diagnostic(f"[DEBUG] write_pptx() 調用完成")
                 save_success = True
             except Exception as save_ex1:
                 print(f"[WARNING] 嘗試 1 失敗: {save_ex1}")
@@ -645,10 +772,10 @@ def generate_combined_pptx(
                 # 嘗試 2: 使用絕對路徑
                 try:
                     abs_path = Path(save_path).resolve()
-                    print(f"[DEBUG] 嘗試 2: 使用絕對路徑 {abs_path}")
+                    diagnostic(f"[DEBUG] 嘗試 2: 使用絕對路徑 {abs_path}")
                     prs.save(str(abs_path))
                     save_path = str(abs_path)  # 更新路徑
-                    print(f"[DEBUG] 使用絕對路徑保存成功")
+                    diagnostic(f"[DEBUG] 使用絕對路徑保存成功")
                     save_success = True
                 except Exception as save_ex2:
                     print(f"[WARNING] 嘗試 2 也失敗: {save_ex2}")
@@ -657,10 +784,10 @@ def generate_combined_pptx(
                     # 嘗試 3: 先刪除舊文件（如果存在）再保存
                     try:
                         if Path(save_path).exists():
-                            print(f"[DEBUG] 嘗試 3: 刪除舊文件後保存")
+                            diagnostic(f"[DEBUG] 嘗試 3: 刪除舊文件後保存")
                             Path(save_path).unlink()
                         prs.save(save_path)
-                        print(f"[DEBUG] 刪除舊文件後保存成功")
+                        diagnostic(f"[DEBUG] 刪除舊文件後保存成功")
                         save_success = True
                     except Exception as save_ex3:
                         print(f"[ERROR] 嘗試 3 也失敗: {save_ex3}")
@@ -690,24 +817,24 @@ def generate_combined_pptx(
             if not file_exists:
                 error_msg = f"[ERROR] 文件保存後不存在！保存路徑: {save_path}"
                 print(error_msg)
-                print(f"[DEBUG] 父目錄是否存在: {Path(save_path).parent.exists()}")
-                print(f"[DEBUG] 父目錄: {Path(save_path).parent}")
-                print(f"[DEBUG] 父目錄是否可寫: {os.access(Path(save_path).parent, os.W_OK)}")
+                diagnostic(f"[DEBUG] 父目錄是否存在: {Path(save_path).parent.exists()}")
+                diagnostic(f"[DEBUG] 父目錄: {Path(save_path).parent}")
+                diagnostic(f"[DEBUG] 父目錄是否可寫: {os.access(Path(save_path).parent, os.W_OK)}")
                 # 列出父目錄中的所有文件
                 try:
                     files_in_parent = list(Path(save_path).parent.iterdir())
-                    print(f"[DEBUG] 父目錄中的文件: {files_in_parent}")
+                    diagnostic(f"[DEBUG] 父目錄中的文件: {files_in_parent}")
                 except:
                     pass
                 raise Exception(error_msg)
             
             # 使用實際存在的路徑
             save_path = str(actual_path)
-            print(f"[DEBUG] 文件確認存在於: {save_path}")
+            diagnostic(f"[DEBUG] 文件確認存在於: {save_path}")
             
             file_size = Path(save_path).stat().st_size
-            print(f"[DEBUG] Step 3 成功: 文件已保存")
-            print(f"[DEBUG] 文件大小: {file_size} bytes")
+            diagnostic(f"[DEBUG] Step 3 成功: 文件已保存")
+            diagnostic(f"[DEBUG] 文件大小: {file_size} bytes")
             
             # 驗證文件大小是否合理（至少應該有幾 KB）
             if file_size < 1000:  # 小於 1KB 可能不正常
@@ -733,9 +860,9 @@ def generate_combined_pptx(
         
         # 更新會話活動時間（用於會話清理）
         try:
-            print("[DEBUG] Step 4: 更新會話活動時間...")
+            diagnostic("[DEBUG] Step 4: 更新會話活動時間...")
             update_session_activity()
-            print("[DEBUG] Step 4 成功")
+            diagnostic("[DEBUG] Step 4 成功")
         except Exception as activity_error:
             # 更新活動時間失敗不影響主流程，只記錄警告
             print(f"[WARNING] Failed to update session activity: {str(activity_error)}")
@@ -744,22 +871,17 @@ def generate_combined_pptx(
             except:
                 pass
         
-        # 保存文件內容到 session_state（內存儲存方案）
+        # 登記到 artifact store（文件已在會話目錄中，原地登記，不再複製 bytes 到 session_state）
         try:
-            print("[DEBUG] Step 5: 保存文件內容到 session_state（內存）...")
-            # 讀取文件內容為 bytes
-            with open(save_path, 'rb') as f:
-                file_bytes = f.read()
-            
-            # 保存到 session_state
-            st.session_state["tcfd_report_bytes"] = file_bytes
+            diagnostic("[DEBUG] Step 5: 登記報告到 artifact store...")
+            artifact = register_report('tcfd', save_path)
             st.session_state["tcfd_report_file"] = str(output_path)  # 保留路徑作為備用
-            print(f"[DEBUG] Step 5 成功: 文件大小 {len(file_bytes)} bytes，已保存到 session_state")
+            diagnostic(f"[DEBUG] Step 5 成功: {artifact.artifact_id} ({artifact.size} bytes, sha256 {artifact.sha256[:12]})")
         except Exception as state_error:
-            # session_state 保存失敗不影響主流程，只記錄警告
-            print(f"[WARNING] Failed to save file to session_state: {str(state_error)}")
+            # 登記失敗不影響主流程（仍可從標準路徑讀取），只記錄警告
+            print(f"[WARNING] Failed to register report in artifact store: {str(state_error)}")
             try:
-                st.warning(f"⚠️ 保存文件到 session_state 失敗: {str(state_error)}")
+                st.warning(f"⚠️ 登記報告到 artifact store 失敗: {str(state_error)}")
             except:
                 pass
         
@@ -778,10 +900,11 @@ def generate_combined_pptx(
             raise Exception(error_msg)
         
         file_size = final_path.stat().st_size
-        print("[DEBUG] ========== TCFD 文件保存完成 ==========")
-        print(f"[DEBUG] 最終輸出路徑: {save_path}")
-        print(f"[DEBUG] 最終輸出路徑 (absolute): {final_path.resolve()}")
-        print(f"[DEBUG] 文件大小: {file_size} bytes")
+        current_span().set_attributes(bytes=file_size, slides=len(prs.slides))
+        diagnostic("[DEBUG] ========== TCFD 文件保存完成 ==========")
+        diagnostic(f"[DEBUG] 最終輸出路徑: {save_path}")
+        diagnostic(f"[DEBUG] 最終輸出路徑 (absolute): {final_path.resolve()}")
+        diagnostic(f"[DEBUG] 文件大小: {file_size} bytes")
         
         # 在 UI 中顯示保存成功訊息（只有文件真的存在時才顯示）
         try:
@@ -0,0 +1,71 @@
+"""
+TCFD Table Skeletons
+表格的靜態結構（欄寬、合併、框線、底色、標題與固定標籤）只建一次並快取為 XML 片段，
+之後每次渲染只複製骨架、填入資料儲存格
+
+Usage (in tables/table0X.py):
+    def _build_skeleton(slide):
+        table = init_zebra_table(slide)
+        ...                              # headers, merges, fills, fixed labels
+        return table
+
+    table = add_table_from_skeleton(slide, _build_skeleton)
+    set_text(table.cell(2, 3), description, 9)
+"""
+import copy
+import threading
+import weakref
+from typing import Callable
+
+from pptx import Presentation
+from pptx.shapes.graphfrm import GraphicFrame
+from pptx.table import Table
+
+# build function -> detached <p:graphicFrame>; a reloaded table module brings new
+# functions, so edited skeletons are recompiled
+_skeletons: "weakref.WeakKeyDictionary[Callable, object]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _compile(build: Callable) -> object:
+    """Run build() once on a scratch slide and detach the table's graphicFrame"""
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    table = build(slide)
+    frame = table._graphic_frame._element
+    frame.getparent().remove(frame)
+    return frame
+
+
+def get_skeleton(build: Callable) -> object:
+    """Cached graphicFrame of a build function (compiled on first use)"""
+    skeleton = _skeletons.get(build)
+    if skeleton is None:
+        with _lock:
+            skeleton = _skeletons.get(build)
+            if skeleton is None:
+                skeleton = _skeletons[build] = _compile(build)
+    return skeleton
+
+
+def add_table_from_skeleton(slide, build: Callable) -> Table:
+    """
+    Add a copy of build()'s table to slide
+
+    Args:
+        slide: Target slide
+        build: Function that draws the static table on a slide and returns the table
+
+    Returns:
+        The new table (data cells still to be filled)
+    """
+    frame = copy.deepcopy(get_skeleton(build))
+    frame.nvGraphicFramePr.cNvPr.id = slide.shapes._next_shape_id
+    slide.shapes._spTree.insert_element_before(frame, "p:extLst")
+    return GraphicFrame(frame, slide.shapes).table
+
+
+def clear_skeletons():
+    """Drop all compiled skeletons"""
+    with _lock:
+        _skeletons.clear()
@@ -4,6 +4,8 @@ from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.oxml.xmlchemy import OxmlElement
 
+from shared.engine.tcfd.skeleton import add_table_from_skeleton
+
 # ================= 🛠️ 底層繪圖工具 =================
 def set_cell_bg(cell, hex_color):
     if not hex_color: return
@@ -60,27 +62,7 @@ COLOR_BG_STRIPE = 'F7F7F7'
 COLOR_TEXT_SUB = '333333'
 
 # ================= 📝 修正後的 Transformation Risk 表格 =================
-def create_slide_transformation_corrected(prs=None, output_filename=None, data_lines=None):
-    # 如果提供了 prs，直接使用；否則創建新的（向後兼容）
-    if prs is None:
-        prs = Presentation()
-        output_mode = True
-    else:
-        output_mode = False
-    
-    # 動態查找空白 layout
-    blank_layout = None
-    for i, layout in enumerate(prs.slide_layouts):
-        layout_name_lower = layout.name.lower()
-        if 'blank' in layout_name_lower or 'empty' in layout_name_lower:
-            blank_layout = layout
-            break
-    if blank_layout is None and len(prs.slide_layouts) > 6:
-        blank_layout = prs.slide_layouts[6]
-    elif blank_layout is None:
-        blank_layout = prs.slide_layouts[-1]
-    
-    slide = prs.slides.add_slide(blank_layout)
+def _build_skeleton(slide):
     table = init_zebra_table(slide)
 
     # 1. 主標題 (Climate-Related Risks / Financial Impacts)
@@ -131,6 +113,31 @@ def create_slide_transformation_corrected(prs=None, output_filename=None, data_l
         set_text(table.cell(3, c), "", 9)
         table.cell(3, c).vertical_anchor = MSO_ANCHOR.TOP
         set_cell_bg(table.cell(3, c), COLOR_BG_STRIPE)
+    return table
+
+
+def create_slide_transformation_corrected(prs=None, output_filename=None, data_lines=None):
+    # 如果提供了 prs，直接使用；否則創建新的（向後兼容）
+    if prs is None:
+        prs = Presentation()
+        output_mode = True
+    else:
+        output_mode = False
+    
+    # 動態查找空白 layout
+    blank_layout = None
+    for i, layout in enumerate(prs.slide_layouts):
+        layout_name_lower = layout.name.lower()
+        if 'blank' in layout_name_lower or 'empty' in layout_name_lower:
+            blank_layout = layout
+            break
+    if blank_layout is None and len(prs.slide_layouts) > 6:
+        blank_layout = prs.slide_layouts[6]
+    elif blank_layout is None:
+        blank_layout = prs.slide_layouts[-1]
+    
+    slide = prs.slides.add_slide(blank_layout)
+    table = add_table_from_skeleton(slide, _build_skeleton)
     
     # 填充 LLM 返回的數據（如果有）
     if data_lines:
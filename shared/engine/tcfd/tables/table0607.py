@@ -4,6 +4,8 @@ from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.oxml.xmlchemy import OxmlElement
 
+from shared.engine.tcfd.skeleton import add_table_from_skeleton
+
 # ================= 🛠️ 基礎工具函數 (保持不變) =================
 def set_cell_bg(cell, hex_color):
     if not hex_color: return
@@ -58,20 +60,7 @@ COLOR_BG_STRIPE = 'F7F7F7'
 COLOR_TEXT_SUB = '333333'
 
 # ================= 📝 Table 6: Systemic Risk Control (原 Governance) =================
-def create_slide_6_risk_control(prs, data_lines=None):
-    # 動態查找空白 layout
-    blank_layout = None
-    for i, layout in enumerate(prs.slide_layouts):
-        layout_name_lower = layout.name.lower()
-        if 'blank' in layout_name_lower or 'empty' in layout_name_lower:
-            blank_layout = layout
-            break
-    if blank_layout is None and len(prs.slide_layouts) > 6:
-        blank_layout = prs.slide_layouts[6]
-    elif blank_layout is None:
-        blank_layout = prs.slide_layouts[-1]
-    
-    slide = prs.slides.add_slide(blank_layout)
+def _build_skeleton_6(slide):
     table = init_zebra_table(slide)
 
     # 1. 主標題 (完全移除 Governance 字眼)
@@ -101,6 +90,24 @@ def create_slide_6_risk_control(prs, data_lines=None):
         set_text(table.cell(3, c), "", 9)
         table.cell(3, c).vertical_anchor = MSO_ANCHOR.TOP
     for c in range(0, 6): set_cell_bg(table.cell(3, c), COLOR_BG_STRIPE)
+    return table
+
+
+def create_slide_6_risk_control(prs, data_lines=None):
+    # 動態查找空白 layout
+    blank_layout = None
+    for i, layout in enumerate(prs.slide_layouts):
+        layout_name_lower = layout.name.lower()
+        if 'blank' in layout_name_lower or 'empty' in layout_name_lower:
+            blank_layout = layout
+            break
+    if blank_layout is None and len(prs.slide_layouts) > 6:
+        blank_layout = prs.slide_layouts[6]
+    elif blank_layout is None:
+        blank_layout = prs.slide_layouts[-1]
+    
+    slide = prs.slides.add_slide(blank_layout)
+    table = add_table_from_skeleton(slide, _build_skeleton_6)
     
     # 填充 LLM 返回的數據（列 3-5: Mitigation Protocol, Liability Avoidance, Budget）
     if data_lines:
@@ -123,20 +130,7 @@ def create_slide_6_risk_control(prs, data_lines=None):
 
 
 # ================= 📝 Table 7: Operational Resilience (原 Social) =================
-def create_slide_7_resilience(prs, data_lines=None):
-    # 動態查找空白 layout
-    blank_layout = None
-    for i, layout in enumerate(prs.slide_layouts):
-        layout_name_lower = layout.name.lower()
-        if 'blank' in layout_name_lower or 'empty' in layout_name_lower:
-            blank_layout = layout
-            break
-    if blank_layout is None and len(prs.slide_layouts) > 6:
-        blank_layout = prs.slide_layouts[6]
-    elif blank_layout is None:
-        blank_layout = prs.slide_layouts[-1]
-    
-    slide = prs.slides.add_slide(blank_layout)
+def _build_skeleton_7(slide):
     table = init_zebra_table(slide)
 
     # 1. 主標題 (完全移除 Social 字眼，使用 IPCC 術語)
@@ -165,6 +159,24 @@ def create_slide_7_resilience(prs, data_lines=None):
         set_text(table.cell(3, c), "", 9)
         table.cell(3, c).vertical_anchor = MSO_ANCHOR.TOP
     for c in range(0, 6): set_cell_bg(table.cell(3, c), COLOR_BG_STRIPE)
+    return table
+
+
+def create_slide_7_resilience(prs, data_lines=None):
+    # 動態查找空白 layout
+    blank_layout = None
+    for i, layout in enumerate(prs.slide_layouts):
+        layout_name_lower = layout.name.lower()
+        if 'blank' in layout_name_lower or 'empty' in layout_name_lower:
+            blank_layout = layout
+            break
+    if blank_layout is None and len(prs.slide_layouts) > 6:
+        blank_layout = prs.slide_layouts[6]
+    elif blank_layout is None:
+        blank_layout = prs.slide_layouts[-1]
+    
+    slide = prs.slides.add_slide(blank_layout)
+    table = add_table_from_skeleton(slide, _build_skeleton_7)
     
     # 填充 LLM 返回的數據（列 3-5: Adaptation Strategy, Continuity Benefit, Budget）
     if data_lines:
@@ -0,0 +1,302 @@
+"""
+Stage Tracing
+輕量的巢狀計時 span（prompt build / LLM call / parse / render / save / merge），
+匯出為 JSON Lines 或 OTLP/JSON 檔案
+
+Enable with an environment variable (or configure()):
+    ESG_TRACE=jsonl:/tmp/esg_trace.jsonl
+    ESG_TRACE=otlp:/tmp/esg_trace.otlp.jsonl
+    ESG_TRACE_DIAG_SAMPLE=0.05     # share of diagnostic messages kept as span events
+    ESG_DIAGNOSTICS=1              # also print diagnostic messages (old [DIAGNOSIS] output)
+
+Usage:
+    with span("tcfd.table", page=page_key) as s:
+        ...
+        s.set("tokens_out", 812)
+
+    @traced("llm.call")
+    def call_api(...): ...
+
+When tracing is disabled span() returns a shared no-op object: the cost is one
+global check per call.
+"""
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_enabled = False
+_exporter = None
+_diag_sample_rate = float(os.getenv("ESG_TRACE_DIAG_SAMPLE", "0.05"))
+_print_diagnostics = os.getenv("ESG_DIAGNOSTICS", "").lower() in ("1", "true", "yes")
+_current: contextvars.ContextVar = contextvars.ContextVar("esg_trace_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return random.getrandbits(nbytes * 8).to_bytes(nbytes, "big").hex()
+
+
+class Span:
+    """A timed stage; use as a context manager"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "events", "error", "_t0", "_token")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else _new_id(16)
+        self.span_id = _new_id(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.start_ns = self.end_ns = 0
+        self._t0 = 0
+        self._token = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def event(self, name: str, **attributes):
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._t0)
+        _current.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        exporter = _exporter
+        if exporter is not None:
+            try:
+                exporter.export(self)
+            except Exception as e:
+                print(f"Warning: Failed to export span {self.name}: {e}")
+        return False
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled"""
+
+    __slots__ = ()
+    name = ""
+    attributes: Dict[str, Any] = {}
+
+    def set(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def event(self, name, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, **attributes):
+    """Start a span (child of the current one); no-op while tracing is disabled"""
+    if not _enabled:
+        return NOOP_SPAN
+    return Span(name, _current.get(), attributes)
+
+
+def current_span():
+    """Innermost active span (no-op span if none / disabled)"""
+    return (_current.get() or NOOP_SPAN) if _enabled else NOOP_SPAN
+
+
+def traced(name: Optional[str] = None, **attributes):
+    """Decorator: run the function inside a span"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(span_name, _current.get(), dict(attributes)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(func: Callable) -> Callable:
+    """
+    Carry the current span into another thread (for executor.submit / map)
+
+    Always copies the context, so other context variables (usage ledger labels)
+    follow as well even while tracing is disabled.
+    """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(func, *args, **kwargs)
+
+
+def diagnostic(message: str, **attributes):
+    """
+    Diagnostic message (replaces the [DIAGNOSIS] / [DEBUG] prints)
+
+    Kept as a sampled event on the current span while tracing; printed only when
+    ESG_DIAGNOSTICS is set.
+    """
+    if _print_diagnostics:
+        print(message)
+    if _enabled and random.random() < _diag_sample_rate:
+        current = _current.get()
+        if current is not None:
+            current.event("diagnostic", message=message, **attributes)
+
+
+def diagnostics_enabled() -> bool:
+    """True when diagnostic messages are printed or may be recorded (guard expensive checks)"""
+    return _print_diagnostics or _enabled
+
+
+# ---- Exporters ----
+
+class JsonLinesExporter:
+    """One JSON object per finished span"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _record(self, s: Span) -> Dict[str, Any]:
+        return {
+            "trace_id": s.trace_id,
+            "span_id": s.span_id,
+            "parent_id": s.parent_id,
+            "name": s.name,
+            "start_ns": s.start_ns,
+            "duration_ms": round(s.duration_ms, 3),
+            "attributes": s.attributes,
+            "events": s.events,
+            "error": s.error,
+        }
+
+    def export(self, s: Span):
+        line = json.dumps(self._record(s), ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+
+class OTLPFileExporter(JsonLinesExporter):
+    """OTLP/JSON ExportTraceServiceRequest per line (collector file-receiver compatible)"""
+
+    SERVICE_NAME = "esg-report"
+
+    def _record(self, s: Span) -> Dict[str, Any]:
+        otlp_span = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": _otlp_attributes(s.attributes),
+            "events": [
+                {"timeUnixNano": str(e["time_ns"]), "name": e["name"], "attributes": _otlp_attributes(e["attributes"])}
+                for e in s.events
+            ],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            otlp_span["parentSpanId"] = s.parent_id
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [otlp_span]}],
+            }]
+        }
+
+
+class MemoryExporter:
+    """Keeps finished spans in memory (benchmarks / tests)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, s: Span):
+        with self._lock:
+            self.spans.append(s)
+
+
+_EXPORTERS = {"jsonl": JsonLinesExporter, "otlp": OTLPFileExporter}
+
+
+def configure(exporter=None, spec: Optional[str] = None, diag_sample_rate: Optional[float] = None):
+    """
+    Enable tracing
+
+    Args:
+        exporter: Exporter instance (anything with export(span))
+        spec: "jsonl:/path" or "otlp:/path" (used when exporter is None)
+        diag_sample_rate: Share of diagnostic() messages kept as span events
+    """
+    global _enabled, _exporter, _diag_sample_rate
+    if exporter is None and spec:
+        kind, _, path = spec.partition(":")
+        if kind not in _EXPORTERS or not path:
+            raise ValueError(f"Invalid trace spec '{spec}' (expected jsonl:/path or otlp:/path)")
+        exporter = _EXPORTERS[kind](path)
+    if diag_sample_rate is not None:
+        _diag_sample_rate = diag_sample_rate
+    _exporter = exporter
+    _enabled = exporter is not None
+
+
+def disable():
+    global _enabled, _exporter
+    _enabled = False
+    _exporter = None
+
+
+if os.getenv("ESG_TRACE"):
+    try:
+        configure(spec=os.getenv("ESG_TRACE"))
+    except Exception as e:
+        print(f"Warning: Tracing disabled: {e}")
@@ -0,0 +1,310 @@
+"""
+LLM Usage Ledger
+每次 LLM 呼叫的 token（input / output / cache）、模型、延遲與重試次數，
+按模組 / 表格 / 頁面彙總，附在 CLI / server 結果的 metadata 中，並可匯出
+
+Usage:
+    ledger = UsageLedger()
+    with use_ledger(ledger), usage_labels(module="tcfd", page="page_1", table="table01"):
+        ...                      # call sites call record_call(...)
+    ledger.summary()             # totals + by_module / by_table / by_page
+    ledger.export("usage.csv")   # .csv, .jsonl or .json
+
+Without an active ledger record_call() does nothing. Labels and the active ledger
+live in context variables: worker threads need tracing.bind() to inherit them.
+"""
+import csv
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+_ledger: ContextVar = ContextVar("esg_usage_ledger", default=None)
+_labels: ContextVar = ContextVar("esg_usage_labels", default={})
+
+LABEL_KEYS = ("module", "page", "table", "prompt")
+
+# USD per million tokens: (input, output); matched by model-name prefix, longest first.
+# Cache writes cost 1.25x input, cache reads 0.1x input.
+PRICING_PER_MTOK = {
+    "claude-opus-4": (15.0, 75.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "claude-3-opus": (15.0, 75.0),
+    "claude-3-sonnet": (3.0, 15.0),
+    "claude-3-haiku": (0.25, 1.25),
+}
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int,
+                  cache_creation_tokens: int = 0, cache_read_tokens: int = 0) -> Optional[float]:
+    """Estimated cost in USD (None for models without a price)"""
+    for prefix in sorted(PRICING_PER_MTOK, key=len, reverse=True):
+        if model and model.startswith(prefix):
+            price_in, price_out = PRICING_PER_MTOK[prefix]
+            cost = (input_tokens * price_in
+                    + cache_creation_tokens * price_in * CACHE_WRITE_MULTIPLIER
+                    + cache_read_tokens * price_in * CACHE_READ_MULTIPLIER
+                    + output_tokens * price_out)
+            return round(cost / 1e6, 6)
+    return None
+
+
+@dataclass
+class UsageRecord:
+    """One logical LLM call (model fallbacks / retries included)"""
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    latency_ms: float = 0.0
+    retries: int = 0
+    ok: bool = True
+    error: Optional[str] = None
+    cost_usd: Optional[float] = None
+    module: Optional[str] = None
+    page: Optional[str] = None
+    table: Optional[str] = None
+    prompt: Optional[str] = None
+    timestamp: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0, "errors": 0, "retries": 0,
+        "input_tokens": 0, "output_tokens": 0,
+        "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0,
+        "latency_ms": 0.0, "max_latency_ms": 0.0, "cost_usd": 0.0,
+    }
+
+
+def _add(totals: Dict[str, Any], record: UsageRecord):
+    totals["calls"] += 1
+    totals["errors"] += 0 if record.ok else 1
+    totals["retries"] += record.retries
+    totals["input_tokens"] += record.input_tokens
+    totals["output_tokens"] += record.output_tokens
+    totals["cache_creation_input_tokens"] += record.cache_creation_input_tokens
+    totals["cache_read_input_tokens"] += record.cache_read_input_tokens
+    totals["latency_ms"] += record.latency_ms
+    totals["max_latency_ms"] = max(totals["max_latency_ms"], record.latency_ms)
+    totals["cost_usd"] += record.cost_usd or 0.0
+
+
+def _finish(totals: Dict[str, Any]) -> Dict[str, Any]:
+    totals["mean_latency_ms"] = round(totals["latency_ms"] / totals["calls"], 1) if totals["calls"] else 0.0
+    totals["latency_ms"] = round(totals["latency_ms"], 1)
+    totals["max_latency_ms"] = round(totals["max_latency_ms"], 1)
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    return totals
+
+
+class UsageLedger:
+    """Thread-safe list of UsageRecords for one report run"""
+
+    def __init__(self):
+        self._records: List[UsageRecord] = []
+        self._degraded: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, record: UsageRecord) -> UsageRecord:
+        with self._lock:
+            self._records.append(record)
+        return record
+
+    def mark_degraded(self, reason: str):
+        """Note that part of the report fell back to mock / placeholder content"""
+        with self._lock:
+            self._degraded[reason] = self._degraded.get(reason, 0) + 1
+
+    @property
+    def degraded(self) -> Dict[str, int]:
+        """Fallback reason -> count (empty when every call produced LLM content)"""
+        with self._lock:
+            return dict(self._degraded)
+
+    @property
+    def records(self) -> List[UsageRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Totals plus breakdowns by module, table and page
+
+        Table and page keys are qualified with the module ("tcfd/page_1").
+        """
+        total = _empty_totals()
+        groups: Dict[str, Dict[str, Dict[str, Any]]] = {"by_module": {}, "by_table": {}, "by_page": {}}
+        for record in self.records:
+            _add(total, record)
+            module = record.module or "unknown"
+            keys = {
+                "by_module": module,
+                "by_table": f"{module}/{record.table}" if record.table else None,
+                "by_page": f"{module}/{record.page}" if record.page else None,
+            }
+            for group, key in keys.items():
+                if key is not None:
+                    _add(groups[group].setdefault(key, _empty_totals()), record)
+        degraded = self.degraded
+        summary = {"total": _finish(total), "degraded": bool(degraded), "degraded_reasons": degraded}
+        for group, entries in groups.items():
+            summary[group] = {key: _finish(totals) for key, totals in entries.items()}
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"summary": self.summary(), "records": [r.to_dict() for r in self.records]}
+
+    def export(self, path: Union[str, Path]) -> Path:
+        """Write the ledger: .csv / .jsonl (one record per row) or .json (summary + records)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        records = self.records
+        if path.suffix == ".csv":
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=[fld.name for fld in fields(UsageRecord)])
+                writer.writeheader()
+                writer.writerows(r.to_dict() for r in records)
+        elif path.suffix == ".jsonl":
+            with open(path, "w", encoding="utf-8") as f:
+                for r in records:
+                    f.write(json.dumps(r.to_dict(), ensure_ascii=False) + "\n")
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        return path
+
+    def format_summary(self) -> str:
+        """One-line summary for console logs"""
+        t = self.summary()["total"]
+        cost = f", ~${t['cost_usd']:.4f}" if t["cost_usd"] else ""
+        fallbacks = sum(self.degraded.values())
+        degraded = f" - DEGRADED: {fallbacks} fallback(s) to mock content" if fallbacks else ""
+        return (f"{t['calls']} LLM call(s), {t['input_tokens']} in / {t['output_tokens']} out tokens, "
+                f"{t['retries']} retries, {t['errors']} errors, {t['latency_ms'] / 1000:.1f}s total{cost}{degraded}")
+
+
+def current_ledger() -> Optional[UsageLedger]:
+    return _ledger.get()
+
+
+def current_labels() -> Dict[str, str]:
+    return _labels.get()
+
+
+def mark_degraded(reason: str):
+    """Flag the active ledger's report as degraded (no-op without a ledger)"""
+    ledger = _ledger.get()
+    if ledger is not None:
+        ledger.mark_degraded(reason)
+
+
+def degraded_reasons() -> Dict[str, int]:
+    """Fallback reasons recorded in the active ledger"""
+    ledger = _ledger.get()
+    return ledger.degraded if ledger is not None else {}
+
+
+@contextmanager
+def use_ledger(ledger: Optional[UsageLedger]) -> Iterator[Optional[UsageLedger]]:
+    """Make ledger the active ledger for this context (None leaves the current one)"""
+    if ledger is None:
+        yield _ledger.get()
+        return
+    token = _ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _ledger.reset(token)
+
+
+@contextmanager
+def usage_labels(**labels):
+    """Attach module / page / table / prompt labels to the calls recorded inside"""
+    merged = dict(_labels.get())
+    merged.update({k: v for k, v in labels.items() if v is not None})
+    token = _labels.set(merged)
+    try:
+        yield merged
+    finally:
+        _labels.reset(token)
+
+
+def metered(module: str) -> Callable:
+    """
+    Decorator for a report build: labels its calls with the module and, when no
+    ledger is active, collects them in its own ledger and prints a summary line
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            owned = _ledger.get() is None
+            with use_ledger(UsageLedger() if owned else None) as ledger, usage_labels(module=module):
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    if owned and (len(ledger) or ledger.degraded):
+                        print(f"  LLM usage ({module}): {ledger.format_summary()}")
+        return wrapper
+    return decorator
+
+
+def record_call(
+    model: str,
+    latency_s: float,
+    message: Any = None,
+    retries: int = 0,
+    error: Optional[BaseException] = None,
+    **labels
+) -> Optional[UsageRecord]:
+    """
+    Record one LLM call in the active ledger (no-op without one)
+
+    Args:
+        model: Model that answered (or the last one tried)
+        latency_s: Wall time of the call including retries / fallbacks
+        message: Anthropic Message; token counts come from message.usage
+        retries: Extra attempts before the final one (model fallbacks, retries)
+        error: Exception when the call failed
+        **labels: Overrides for the context labels (module, page, table, prompt)
+    """
+    ledger = _ledger.get()
+    if ledger is None:
+        return None
+    usage = getattr(message, "usage", None)
+    tokens = {
+        key: getattr(usage, key, None) or 0
+        for key in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+    }
+    context = dict(_labels.get())
+    context.update({k: v for k, v in labels.items() if v is not None})
+    record = UsageRecord(
+        model=model,
+        latency_ms=round(latency_s * 1000, 1),
+        retries=retries,
+        ok=error is None,
+        error=f"{type(error).__name__}: {error}" if error is not None else None,
+        cost_usd=estimate_cost(model, tokens["input_tokens"], tokens["output_tokens"],
+                               tokens["cache_creation_input_tokens"], tokens["cache_read_input_tokens"]),
+        timestamp=time.time(),
+        **tokens,
+        **{key: context.get(key) for key in LABEL_KEYS},
+    )
+    return ledger.add(record)
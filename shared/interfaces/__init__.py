@@ -1,6 +1,7 @@
 """
 Unified interfaces for all modules
 """
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 
@@ -22,6 +23,15 @@ class ModuleInterface(ABC):
         """
         pass
     
+    async def generate_async(self, input_data: Dict[str, Any], mode_manager) -> Dict[str, Any]:
+        """
+        Async version of generate()
+        
+        The default runs generate() in a worker thread; modules with native
+        async LLM calls override it.
+        """
+        return await asyncio.to_thread(self.generate, input_data, mode_manager)
+    
     @abstractmethod
     def get_module_name(self) -> str:
         """Get the name of the module"""
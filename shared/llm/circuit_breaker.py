@@ -0,0 +1,285 @@
+"""
+LLM Circuit Breaker
+每個 provider + API key 共用一個斷路器：連續失敗（或連續延遲異常）達門檻即斷開，
+其後的呼叫立即拋出 CircuitOpenError，由呼叫端走 Mock / 快取內容；
+斷開期間由背景執行緒探測服務是否恢復（沒有探測函式時，間隔到期後放行一次試探呼叫：half-open）
+
+Configuration (environment variables):
+    ESG_LLM_BREAKER_FAILURES=3       # consecutive failures that open the circuit
+    ESG_LLM_BREAKER_LATENCY_S=90     # a call slower than this counts as a failure
+    ESG_LLM_BREAKER_PROBE_S=10       # first probe interval (doubles up to 120s)
+    ESG_LLM_BREAKER=0                # disable
+
+Only provider-side trouble counts as a failure: 5xx / 529 overload, timeouts and
+connection errors. Authentication / permission errors (invalid key) open the
+circuit at once. Rate limits (429) and other client errors (400, 404 unknown
+model, ...) are neutral: they say nothing about provider health, and tripping on
+429 under load would degrade whole reports.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, breaker: "CircuitBreaker"):
+        self.breaker_name = breaker.name
+        super().__init__(f"LLM provider unavailable (circuit open: {breaker.name}, last error: {breaker.last_error})")
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _is_transport_error(error: BaseException) -> bool:
+    """Timeouts and connection failures (anthropic / httpx / builtin), matched by class name"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    names = [cls.__name__ for cls in type(error).__mro__]
+    return any("Timeout" in name or "Connection" in name or name == "TransportError" for name in names)
+
+
+def _is_neutral(error: BaseException) -> bool:
+    """
+    Errors that say nothing about provider health: rate limits (429), other 4xx
+    client errors (unknown model, bad request), cancelled hedges, non-HTTP errors
+    """
+    if type(error).__name__ == "HedgeCancelled":
+        return True
+    status = _status_code(error)
+    if status is None:
+        return not _is_transport_error(error)
+    return status < 500 and not _is_fatal(error)
+
+
+def _is_fatal(error: BaseException) -> bool:
+    """Errors that will not go away by retrying (bad / revoked key)"""
+    return _status_code(error) in (401, 403)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a background recovery probe (or in-line half-open trials)"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        latency_threshold_s: Optional[float] = 90.0,
+        probe_interval_s: float = 10.0,
+        max_probe_interval_s: float = 120.0,
+        probe: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Args:
+            name: Label for logs / metrics (provider and key fingerprint)
+            failure_threshold: Consecutive failures (or slow calls) that open the circuit
+            latency_threshold_s: Successful calls slower than this count as failures (None = off)
+            probe_interval_s: First delay between recovery probes (doubles each failed probe)
+            max_probe_interval_s: Upper bound of the probe delay
+            probe: Cheap call that raises while the provider is unavailable; without one,
+                   a single real call is let through per probe interval (half-open trial)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold_s = latency_threshold_s
+        self.probe_interval_s = probe_interval_s
+        self.max_probe_interval_s = max_probe_interval_s
+        self.probe = probe
+        self.state = CLOSED
+        self.last_error: Optional[str] = None
+        self._consecutive_failures = 0
+        self._lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._trial_delay = probe_interval_s
+        self._next_trial_at = 0.0
+        self._trial_started: Optional[float] = None
+        self._counters = {"opened": 0, "short_circuited": 0, "failures": 0, "slow_calls": 0, "probes": 0,
+                          "trials": 0}
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != CLOSED
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError while the circuit is open
+
+        Without a probe, the first call after the probe interval is let through as
+        a half-open trial; its outcome closes the circuit or re-opens it with a
+        doubled interval.
+        """
+        if self.state == CLOSED:
+            return
+        with self._lock:
+            if self.state != CLOSED and self.probe is None and self._trial_due(time.monotonic()):
+                self.state = HALF_OPEN
+                self._trial_started = time.monotonic()
+                self._counters["trials"] += 1
+                return
+            if self.state == CLOSED:
+                return
+            self._counters["short_circuited"] += 1
+        raise CircuitOpenError(self)
+
+    def _trial_due(self, now: float) -> bool:
+        """A trial may start: interval elapsed, and no trial in flight (or the last one was abandoned)"""
+        if self.state == OPEN:
+            return now >= self._next_trial_at
+        # HALF_OPEN: a cancelled trial never reports back; allow another after a grace period
+        grace = self.latency_threshold_s or self.max_probe_interval_s
+        return self._trial_started is not None and now - self._trial_started > grace
+
+    def record_success(self, latency_s: float):
+        if self.latency_threshold_s is not None and latency_s > self.latency_threshold_s:
+            with self._lock:
+                self._counters["slow_calls"] += 1
+            self._failure(f"slow response ({latency_s:.1f}s > {self.latency_threshold_s:.0f}s)")
+            return
+        with self._lock:
+            self._consecutive_failures = 0
+            if self.state == CLOSED:
+                return
+            self._close()
+        print(f"  ✓ LLM circuit closed for {self.name} (trial call succeeded)")
+
+    def record_failure(self, error: BaseException):
+        if _is_neutral(error):
+            with self._lock:
+                if self.state == HALF_OPEN:
+                    # The trial proved nothing; let the next call try again
+                    self.state = OPEN
+                    self._trial_started = None
+                    self._next_trial_at = time.monotonic()
+            return
+        with self._lock:
+            self._counters["failures"] += 1
+        self._failure(f"{type(error).__name__}: {error}", trip=_is_fatal(error))
+
+    def _failure(self, reason: str, trip: bool = False):
+        with self._lock:
+            self.last_error = reason
+            self._consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                # Failed trial: re-open and back off
+                self.state = OPEN
+                self._trial_started = None
+                self._trial_delay = min(self._trial_delay * 2, self.max_probe_interval_s)
+                self._next_trial_at = time.monotonic() + self._trial_delay
+                return
+            if self.state == OPEN or (not trip and self._consecutive_failures < self.failure_threshold):
+                return
+            self.state = OPEN
+            self._trial_delay = self.probe_interval_s
+            self._next_trial_at = time.monotonic() + self._trial_delay
+            self._counters["opened"] += 1
+        print(f"  ⚠ LLM circuit opened for {self.name}: {reason}")
+        self._start_probe()
+
+    def _start_probe(self):
+        if self.probe is None or (self._probe_thread is not None and self._probe_thread.is_alive()):
+            return
+        self._probe_thread = threading.Thread(target=self._probe_loop, name=f"llm-probe-{self.name}", daemon=True)
+        self._probe_thread.start()
+
+    def _probe_loop(self):
+        delay = self.probe_interval_s
+        while self.state == OPEN:
+            time.sleep(delay)
+            with self._lock:
+                self._counters["probes"] += 1
+            try:
+                self.probe()
+            except Exception as e:
+                self.last_error = f"probe: {type(e).__name__}: {e}"
+                delay = min(delay * 2, self.max_probe_interval_s)
+                continue
+            self.reset()
+            print(f"  ✓ LLM circuit closed for {self.name} (probe succeeded)")
+
+    def reset(self):
+        """Close the circuit"""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        self.state = CLOSED
+        self._consecutive_failures = 0
+        self._trial_started = None
+        self._trial_delay = self.probe_interval_s
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "last_error": self.last_error,
+                    "consecutive_failures": self._consecutive_failures, **self._counters}
+
+
+_ENABLED = os.getenv("ESG_LLM_BREAKER", "1").lower() not in ("0", "false", "no")
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _key_fingerprint(api_key: Optional[str]) -> str:
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:8] if api_key else "nokey"
+
+
+def get_breaker(provider: str, api_key: Optional[str], base_url: Optional[str] = None,
+                probe: Optional[Callable[[], Any]] = None) -> Optional[CircuitBreaker]:
+    """
+    Shared breaker for a provider + API key (+ base URL); None when breakers are disabled
+
+    Args:
+        probe: Recovery probe installed on the breaker the first time it is created
+    """
+    if not _ENABLED:
+        return None
+    name = f"{provider}:{_key_fingerprint(api_key)}"
+    if base_url:
+        name += f"@{base_url}"
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                latency = os.getenv("ESG_LLM_BREAKER_LATENCY_S", "90")
+                breaker = _breakers[name] = CircuitBreaker(
+                    name,
+                    failure_threshold=int(os.getenv("ESG_LLM_BREAKER_FAILURES", "3")),
+                    latency_threshold_s=float(latency) if float(latency) > 0 else None,
+                    probe_interval_s=float(os.getenv("ESG_LLM_BREAKER_PROBE_S", "10")),
+                    probe=probe,
+                )
+    return breaker
+
+
+def breaker_for_client(client) -> Optional[CircuitBreaker]:
+    """
+    Breaker for an anthropic.Anthropic / AsyncAnthropic client
+    (probe: list models, sync; clients without an API key recover through half-open trials)
+    """
+    api_key = getattr(client, "api_key", None)
+    base_url = getattr(client, "base_url", None)
+    base_url = str(base_url) if base_url else None
+
+    def probe():
+        from .claude_client import get_pooled_client
+        get_pooled_client(api_key, base_url).models.list(limit=1)
+
+    return get_breaker("anthropic", api_key, base_url, probe=probe if api_key else None)
+
+
+def all_breakers() -> Dict[str, Dict[str, Any]]:
+    """Metrics of every breaker created so far"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.metrics() for breaker in breakers}
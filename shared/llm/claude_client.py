@@ -3,10 +3,18 @@ Claude API Client
 Wrapper for Anthropic Claude API calls
 支持全局單例模式，確保整個系統只有一個 client 實例
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+import asyncio
+import os
 import threading
+import time
+import weakref
 import anthropic
+import httpx
 from shared.mode_manager import ModeManager
+from shared.engine.usage_ledger import current_labels, record_call
+from .hedging import create_message
+from .routing import get_router
 
 
 class ClaudeClient:
@@ -27,13 +35,8 @@ class ClaudeClient:
         if not self.api_key:
             raise ValueError("Claude API key is required. Please set it in the sidebar or environment variable.")
 
-        # Initialize Anthropic client with API version in default headers       
-        self.client = anthropic.Anthropic(
-            api_key=self.api_key,
-            default_headers={
-                "anthropic-version": self.api_version
-            }
-        )
+        # Pooled client shared with the engines (API version in default headers)
+        self.client = get_pooled_client(self.api_key, api_version=self.api_version)
 
     def generate_message(
         self,
@@ -51,12 +54,13 @@ class ClaudeClient:
             system_prompt: System prompt (optional)
             max_tokens: Maximum tokens in response
             temperature: Temperature for generation (0.0-1.0)
-            model: Model to use (overrides default)
+            model: Model to use (overrides the routing table and the default)
 
         Returns:
             Generated text response
         """
-        model = model or self.model
+        prompt_type = current_labels().get("prompt")
+        model = model or (get_router().model_for(prompt_type) if prompt_type else self.model)
 
         # Prepare messages
         messages = [{"role": "user", "content": prompt}]
@@ -64,15 +68,18 @@ class ClaudeClient:
         # Prepare system message if provided
         system_message = system_prompt if system_prompt else None
 
+        started = time.perf_counter()
         try:
             # Call Claude API (API version is set in client initialization)     
-            response = self.client.messages.create(
+            response = create_message(
+                self.client, current_labels().get("prompt"),
                 model=model,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 system=system_message,
                 messages=messages
             )
+            record_call(model, time.perf_counter() - started, response)
 
             # Extract text content
             if response.content:
@@ -86,8 +93,10 @@ class ClaudeClient:
                 return ""
 
         except anthropic.APIError as e:
+            record_call(model, time.perf_counter() - started, error=e)
             raise ValueError(f"Claude API error: {e.message}")
         except Exception as e:
+            record_call(model, time.perf_counter() - started, error=e)
             raise ValueError(f"Error calling Claude API: {str(e)}")
 
     def generate_structured(
@@ -158,6 +167,11 @@ class ClaudeClient:
 # 全局單例 Client 管理器（新增）
 # ==================================================
 
+# 連線池設定：每個 (API key, base URL) 一個 HTTP client，保持連線重用（省去 TCP/TLS 建立）
+POOL_MAX_CONNECTIONS = int(os.getenv("ESG_LLM_POOL_MAX_CONNECTIONS", "32"))
+POOL_MAX_KEEPALIVE = int(os.getenv("ESG_LLM_POOL_MAX_KEEPALIVE", "16"))
+POOL_KEEPALIVE_EXPIRY_S = float(os.getenv("ESG_LLM_POOL_KEEPALIVE_S", "120"))
+
 class APIClientManager:
     """
     全局 API Client 管理器（單例模式）
@@ -186,25 +200,105 @@ class APIClientManager:
         self._client: Optional[anthropic.Anthropic] = None
         self._api_key: Optional[str] = None
         self._api_version: str = "2023-06-01"
+        self._pool: Dict[Tuple[str, str, str], anthropic.Anthropic] = {}
+        # AsyncAnthropic 的連線綁定 event loop：每個 loop 各自一組 client
+        self._async_pool: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = weakref.WeakKeyDictionary()
         self._initialized = True
     
-    def initialize(self, api_key: str, api_version: str = "2023-06-01") -> None:
+    def get_pooled_client(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        api_version: str = "2023-06-01"
+    ) -> anthropic.Anthropic:
         """
-        初始化 Client（只需要調用一次）
+        獲取共用的 pooled client（依 API key + base URL 快取，所有引擎共用）
         
         Args:
             api_key: Anthropic API Key
+            base_url: API base URL（可選，預設讀取 ANTHROPIC_BASE_URL）
             api_version: Anthropic API Version（可選）
+        
+        Returns:
+            Anthropic client 實例（keep-alive 連線池）
         """
-        if self._client is None or self._api_key != api_key:
+        base_url = base_url or os.environ.get("ANTHROPIC_BASE_URL") or ""
+        key = (api_key, base_url, api_version)
+        client = self._pool.get(key)
+        if client is None:
             with self._lock:
-                if self._client is None or self._api_key != api_key:
-                    self._client = anthropic.Anthropic(
+                client = self._pool.get(key)
+                if client is None:
+                    http_client = anthropic.DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=POOL_MAX_CONNECTIONS,
+                            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                            keepalive_expiry=POOL_KEEPALIVE_EXPIRY_S
+                        )
+                    )
+                    client = self._pool[key] = anthropic.Anthropic(
                         api_key=api_key,
+                        base_url=base_url or None,
+                        http_client=http_client,
                         default_headers={
                             "anthropic-version": api_version
                         }
                     )
+        return client
+    
+    def get_pooled_async_client(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        api_version: str = "2023-06-01"
+    ) -> anthropic.AsyncAnthropic:
+        """
+        獲取目前 event loop 共用的 pooled async client（依 API key + base URL 快取）
+        
+        必須在 event loop 內呼叫
+        """
+        base_url = base_url or os.environ.get("ANTHROPIC_BASE_URL") or ""
+        key = (api_key, base_url, api_version)
+        loop = asyncio.get_running_loop()
+        clients = self._async_pool.get(loop)
+        if clients is None:
+            clients = self._async_pool.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            http_client = anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=POOL_KEEPALIVE_EXPIRY_S
+                )
+            )
+            client = clients[key] = anthropic.AsyncAnthropic(
+                api_key=api_key,
+                base_url=base_url or None,
+                http_client=http_client,
+                default_headers={
+                    "anthropic-version": api_version
+                }
+            )
+        return client
+    
+    def pool_size(self) -> int:
+        """已建立的 pooled client 數量"""
+        return len(self._pool)
+    
+    def initialize(self, api_key: str, api_version: str = "2023-06-01") -> None:
+        """
+        初始化 Client（只需要調用一次）
+        
+        Args:
+            api_key: Anthropic API Key
+            api_version: Anthropic API Version（可選）
+        """
+        if self._client is None or self._api_key != api_key:
+            client = self.get_pooled_client(api_key, api_version=api_version)
+            with self._lock:
+                if self._client is None or self._api_key != api_key:
+                    self._client = client
                     self._api_key = api_key
                     self._api_version = api_version
     
@@ -229,8 +323,15 @@ class APIClientManager:
         return self._client is not None
     
     def reset(self) -> None:
-        """重置 Client（用於測試或重新初始化）"""
+        """重置 Client 與連線池（用於測試或重新初始化）"""
         with self._lock:
+            for client in self._pool.values():
+                try:
+                    client.close()
+                except Exception:
+                    pass
+            self._pool.clear()
+            self._async_pool.clear()
             self._client = None
             self._api_key = None
             self._api_version = "2023-06-01"
@@ -269,6 +370,38 @@ def initialize_client(api_key: str, api_version: str = "2023-06-01") -> None:
     _global_client_manager.initialize(api_key, api_version)
 
 
+def get_pooled_client(
+    api_key: str,
+    base_url: Optional[str] = None,
+    api_version: str = "2023-06-01"
+) -> anthropic.Anthropic:
+    """
+    獲取共用的 pooled client（便捷函數）
+    
+    同一個 API key + base URL 只建立一次 client，HTTP 連線在呼叫之間保持並重用
+    
+    使用範例:
+        from shared.llm.claude_client import get_pooled_client
+        client = get_pooled_client(api_key)
+    """
+    return _global_client_manager.get_pooled_client(api_key, base_url, api_version)
+
+
+def get_pooled_async_client(
+    api_key: str,
+    base_url: Optional[str] = None,
+    api_version: str = "2023-06-01"
+) -> anthropic.AsyncAnthropic:
+    """
+    獲取目前 event loop 的 pooled async client（便捷函數）
+    
+    使用範例:
+        client = get_pooled_async_client(api_key)
+        message = await client.messages.create(...)
+    """
+    return _global_client_manager.get_pooled_async_client(api_key, base_url, api_version)
+
+
 def get_client() -> anthropic.Anthropic:
     """
     獲取全局 Client 實例（便捷函數）
@@ -327,16 +460,19 @@ def call_claude_api(
     # 準備 messages
     messages = [{"role": "user", "content": prompt}]
     
-    # 嘗試每個模型，直到成功
+    # 嘗試每個模型，直到成功（換模型次數記為 retries）
     last_error = None
-    for model_name in model_list:
+    started = time.perf_counter()
+    for attempt, model_name in enumerate(model_list):
         try:
-            message = client.messages.create(
+            message = create_message(
+                client, current_labels().get("prompt"),
                 model=model_name,
                 max_tokens=max_tokens,
                 system=system_prompt,
                 messages=messages
             )
+            record_call(model_name, time.perf_counter() - started, message, retries=attempt)
             # 提取文本內容
             if message.content:
                 text_content = ""
@@ -352,7 +488,9 @@ def call_claude_api(
             if "not_found_error" in str(e) or "404" in str(e):
                 continue
             # 其他錯誤直接拋出
+            record_call(model_name, time.perf_counter() - started, retries=attempt, error=e)
             raise
     
     # 所有模型都失敗
+    record_call(model_list[-1], time.perf_counter() - started, retries=len(model_list) - 1, error=last_error)
     raise Exception(f"All models failed. Last error: {str(last_error)}")
\ No newline at end of file
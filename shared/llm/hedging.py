@@ -0,0 +1,307 @@
+"""
+Hedged LLM Requests
+呼叫超過同類 prompt 近期延遲的指定百分位數仍未返回時，送出一個重複請求，
+先完成者勝出，另一個被取消（關閉串流連線）；重複請求比例受預算限制
+
+Enable with environment variables (or configure_hedging()):
+    ESG_LLM_HEDGE=1
+    ESG_LLM_HEDGE_PERCENTILE=95      # hedge after p95 of recent latencies of the prompt type
+    ESG_LLM_HEDGE_MAX_RATIO=0.1      # at most 1 duplicate per 10 calls
+    ESG_LLM_HEDGE_MIN_SAMPLES=5      # observations needed before a prompt type is hedged
+
+Usage:
+    message = create_message(client, "prompt_table_1_trans", model=..., max_tokens=..., messages=[...])
+
+Hedged attempts use the streaming API so the losing request can be closed mid-flight.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from shared.engine.aio import llm_semaphore
+from shared.engine.tracing import bind, current_span
+from .circuit_breaker import breaker_for_client
+
+
+class HedgeCancelled(Exception):
+    """Raised inside an attempt that lost the race"""
+
+
+class _Attempt:
+    """One in-flight request; cancel() closes its stream from another thread"""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self._stream = None
+        self._lock = threading.Lock()
+
+    def attach(self, stream):
+        with self._lock:
+            self._stream = stream
+            if self.cancelled.is_set():
+                stream.close()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled.set()
+            if self._stream is not None:
+                try:
+                    self._stream.close()
+                except Exception:
+                    pass
+
+
+def _percentile(sorted_values, q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class HedgePolicy:
+    """Per-prompt-type latency windows, hedge delay and duplicate budget"""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_duplicate_ratio: float = 0.1,
+        min_samples: int = 5,
+        window: int = 100,
+        min_delay_s: float = 0.5,
+        max_workers: int = 32
+    ):
+        """
+        Args:
+            percentile: Hedge once a call runs longer than this percentile of recent latencies
+            max_duplicate_ratio: Maximum duplicates / calls
+            min_samples: Recent latencies needed before a prompt type is hedged
+            window: Latencies kept per prompt type
+            min_delay_s: Never hedge earlier than this
+            max_workers: Threads shared by primary and duplicate attempts
+        """
+        self.percentile = percentile
+        self.max_duplicate_ratio = max_duplicate_ratio
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay_s = min_delay_s
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._counters = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0, "errors": 0}
+
+    def observe(self, prompt_type: str, latency_s: float):
+        with self._lock:
+            samples = self._latencies.setdefault(prompt_type, deque(maxlen=self.window))
+            samples.append(latency_s)
+
+    def hedge_delay(self, prompt_type: str) -> Optional[float]:
+        """Seconds to wait before hedging (None until enough latencies are known)"""
+        with self._lock:
+            samples = self._latencies.get(prompt_type)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            return max(self.min_delay_s, _percentile(sorted(samples), self.percentile))
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if (self._counters["hedged"] + 1) / max(1, self._counters["calls"]) > self.max_duplicate_ratio:
+                self._counters["budget_denied"] += 1
+                return False
+            self._counters["hedged"] += 1
+            return True
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def call(self, prompt_type: str, fn: Callable[[_Attempt], Any]) -> Any:
+        """
+        Run fn(attempt), hedging it with a duplicate when it is slow
+
+        fn should stop (raise HedgeCancelled) once attempt.cancelled is set; streams
+        passed to attempt.attach() are closed on cancel.
+        """
+        self._count("calls")
+        delay = self.hedge_delay(prompt_type or "")
+
+        def run(attempt: _Attempt):
+            started = time.perf_counter()
+            result = fn(attempt)
+            return result, time.perf_counter() - started
+
+        primary = _Attempt()
+        attempts = {self._pool.submit(bind(run), primary): primary}
+        done, _ = wait(attempts, timeout=delay)
+
+        if not done and self._take_budget():
+            duplicate = _Attempt()
+            attempts[self._pool.submit(bind(run), duplicate)] = duplicate
+            current_span().event("llm.hedge", prompt_type=prompt_type, delay_s=round(delay, 3))
+
+        # First successful attempt wins; the rest are cancelled
+        pending = set(attempts)
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result, latency_s = future.result()
+                except Exception as e:
+                    first_error = first_error or e
+                    continue
+                for other in pending:
+                    attempts[other].cancel()
+                self.observe(prompt_type or "", latency_s)
+                if attempts[future] is not primary:
+                    self._count("hedge_wins")
+                return result
+        self._count("errors")
+        raise first_error
+
+    async def call_async(self, prompt_type: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of call(): factory() starts one attempt; the loser task is cancelled"""
+        self._count("calls")
+        delay = self.hedge_delay(prompt_type or "")
+
+        async def run():
+            started = time.perf_counter()
+            result = await factory()
+            return result, time.perf_counter() - started
+
+        primary = asyncio.ensure_future(run())
+        tasks = {primary}
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done and self._take_budget():
+            tasks.add(asyncio.ensure_future(run()))
+            current_span().event("llm.hedge", prompt_type=prompt_type, delay_s=round(delay, 3))
+
+        pending = set(tasks)
+        first_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        first_error = first_error or task.exception()
+                        continue
+                    result, latency_s = task.result()
+                    self.observe(prompt_type or "", latency_s)
+                    if task is not primary:
+                        self._count("hedge_wins")
+                    return result
+        finally:
+            for task in pending:
+                task.cancel()
+        self._count("errors")
+        raise first_error
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters, duplicate ratio and current hedge delay per prompt type"""
+        with self._lock:
+            counters = dict(self._counters)
+            prompt_types = list(self._latencies)
+        counters["duplicate_ratio"] = round(counters["hedged"] / counters["calls"], 4) if counters["calls"] else 0.0
+        counters["max_duplicate_ratio"] = self.max_duplicate_ratio
+        counters["percentile"] = self.percentile
+        counters["hedge_delay_s"] = {
+            prompt_type: round(delay, 3)
+            for prompt_type in prompt_types
+            if (delay := self.hedge_delay(prompt_type)) is not None
+        }
+        return counters
+
+
+def _stream_message(client, attempt: _Attempt, kwargs: Dict[str, Any]):
+    """messages.create via the streaming API so a losing attempt can be aborted"""
+    with client.messages.stream(**kwargs) as stream:
+        attempt.attach(stream)
+        for _ in stream:
+            if attempt.cancelled.is_set():
+                raise HedgeCancelled()
+        return stream.get_final_message()
+
+
+_policy: Optional[HedgePolicy] = None
+_policy_lock = threading.Lock()
+
+
+def configure_hedging(enabled: bool = True, **options) -> Optional[HedgePolicy]:
+    """Install (or remove with enabled=False) the process-wide hedge policy"""
+    global _policy
+    with _policy_lock:
+        _policy = HedgePolicy(**options) if enabled else None
+        return _policy
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    """Process-wide hedge policy (None when hedging is off)"""
+    return _policy
+
+
+def create_message(client, prompt_type: Optional[str], **kwargs):
+    """
+    client.messages.create(**kwargs), hedged when a policy is configured and
+    guarded by the provider / key circuit breaker
+
+    Args:
+        client: anthropic.Anthropic client
+        prompt_type: Latency class of the prompt (prompt ID / content method)
+
+    Raises:
+        CircuitOpenError: The provider is failing; callers fall back to mock content
+    """
+    breaker = breaker_for_client(client)
+    if breaker is not None:
+        breaker.before_call()
+    started = time.perf_counter()
+    try:
+        policy = _policy
+        if policy is None:
+            message = client.messages.create(**kwargs)
+        else:
+            message = policy.call(prompt_type, lambda attempt: _stream_message(client, attempt, kwargs))
+    except Exception as e:
+        if breaker is not None:
+            breaker.record_failure(e)
+        raise
+    if breaker is not None:
+        breaker.record_success(time.perf_counter() - started)
+    return message
+
+
+async def create_message_async(client, prompt_type: Optional[str], **kwargs):
+    """
+    await client.messages.create(**kwargs) for an AsyncAnthropic client: same
+    breaker and hedging as create_message(), bounded by the event loop's LLM semaphore
+
+    Raises:
+        CircuitOpenError: The provider is failing; callers fall back to mock content
+    """
+    breaker = breaker_for_client(client)
+    if breaker is not None:
+        breaker.before_call()
+    async with llm_semaphore():
+        started = time.perf_counter()
+        try:
+            policy = _policy
+            if policy is None:
+                message = await client.messages.create(**kwargs)
+            else:
+                message = await policy.call_async(prompt_type, lambda: client.messages.create(**kwargs))
+        except Exception as e:
+            if breaker is not None:
+                breaker.record_failure(e)
+            raise
+    if breaker is not None:
+        breaker.record_success(time.perf_counter() - started)
+    return message
+
+
+if os.getenv("ESG_LLM_HEDGE", "").lower() in ("1", "true", "yes"):
+    configure_hedging(
+        percentile=float(os.getenv("ESG_LLM_HEDGE_PERCENTILE", "95")),
+        max_duplicate_ratio=float(os.getenv("ESG_LLM_HEDGE_MAX_RATIO", "0.1")),
+        min_samples=int(os.getenv("ESG_LLM_HEDGE_MIN_SAMPLES", "5")),
+    )
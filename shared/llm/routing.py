@@ -0,0 +1,179 @@
+"""
+Model Routing
+依 prompt 類型（TCFD prompt ID / ContentEngine 方法）選擇模型等級：
+短文案走快速、低成本模型，長篇表格維持標準模型；品質檢查不通過時升級一級重試
+（已是最高等級時不重試，避免以同一模型重複相同呼叫），並按等級統計品質重試率
+
+Per-deployment override (JSON file or inline JSON):
+    ESG_LLM_ROUTING=/etc/esg/routing.json
+    {
+        "tiers": {"fast": "claude-3-5-haiku-20241022"},
+        "routes": {"generate_water_management": "fast", "prompt_table_*": "standard"},
+        "default_tier": "standard"
+    }
+Keys that are left out keep their defaults; route patterns are fnmatch globs.
+"""
+import fnmatch
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+MODEL_TIERS = {
+    "fast": "claude-3-5-haiku-20241022",
+    "standard": "claude-sonnet-4-20250514",
+    "premium": "claude-opus-4-20250514",
+}
+
+# Tier used for the retry after a failed quality check (same tier = no retry)
+ESCALATION = {
+    "fast": "standard",
+    "standard": "premium",
+    "premium": "premium",
+}
+
+ROUTES = {
+    # 50-70 word blurbs
+    "generate_environmental_cover": "fast",
+    "generate_environmental_education": "fast",
+    "generate_green_planting_program": "fast",
+    # 140-170 word sections
+    "generate_*": "standard",
+    # TCFD risk / opportunity tables (150-200 words per row)
+    "prompt_table_*": "standard",
+}
+
+DEFAULT_TIER = "standard"
+
+
+class ModelRouter:
+    """Routing table: prompt type -> tier -> model, plus per-tier quality-retry counters"""
+
+    def __init__(
+        self,
+        tiers: Optional[Dict[str, str]] = None,
+        routes: Optional[Dict[str, str]] = None,
+        escalation: Optional[Dict[str, str]] = None,
+        default_tier: str = DEFAULT_TIER
+    ):
+        self.tiers = dict(tiers or MODEL_TIERS)
+        self.routes = dict(routes or ROUTES)
+        self.escalation = dict(escalation or ESCALATION)
+        self.default_tier = default_tier
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_override(cls, override: Dict[str, Any]) -> "ModelRouter":
+        """Defaults updated with a deployment override ({"tiers", "routes", "escalation", "default_tier"})"""
+        # Override routes are matched before the defaults
+        routes = dict(override.get("routes", {}))
+        routes.update({k: v for k, v in ROUTES.items() if k not in routes})
+        return cls(
+            tiers={**MODEL_TIERS, **override.get("tiers", {})},
+            routes=routes,
+            escalation={**ESCALATION, **override.get("escalation", {})},
+            default_tier=override.get("default_tier", DEFAULT_TIER),
+        )
+
+    def tier_for(self, prompt_type: Optional[str]) -> str:
+        """First matching route (exact names before glob patterns)"""
+        if prompt_type:
+            if prompt_type in self.routes:
+                return self.routes[prompt_type]
+            for pattern, tier in self.routes.items():
+                if fnmatch.fnmatchcase(prompt_type, pattern):
+                    return tier
+        return self.default_tier
+
+    def model_for_tier(self, tier: str) -> str:
+        return self.tiers.get(tier) or self.tiers[self.default_tier]
+
+    def model_for(self, prompt_type: Optional[str]) -> str:
+        return self.model_for_tier(self.tier_for(prompt_type))
+
+    def escalate(self, tier: str) -> str:
+        return self.escalation.get(tier, tier)
+
+    def can_escalate(self, tier: str) -> bool:
+        """True when a quality retry would use a different model than `tier`"""
+        return self.model_for_tier(self.escalate(tier)) != self.model_for_tier(tier)
+
+    def record(self, tier: str, quality_retry: bool = False):
+        """Count one routed call, and whether its output needed a quality retry"""
+        with self._lock:
+            stats = self._stats.setdefault(tier, {"calls": 0, "quality_retries": 0})
+            stats["calls"] += 1
+            stats["quality_retries"] += 1 if quality_retry else 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-tier call counts and quality-retry rate"""
+        with self._lock:
+            stats = {tier: dict(values) for tier, values in self._stats.items()}
+        for tier, values in stats.items():
+            values["model"] = self.model_for_tier(tier)
+            values["quality_retry_rate"] = round(values["quality_retries"] / values["calls"], 4) if values["calls"] else 0.0
+        return {"default_tier": self.default_tier, "tiers": stats}
+
+
+# ---- Quality checks (cheap heuristics on the response) ----
+
+_WORDS_PATTERN = re.compile(r"(\d+)\s*-\s*(\d+)\s+words")
+_LINES_PATTERN = re.compile(r"Output exactly (\d+) lines")
+
+
+def expected_words(prompt: str) -> Optional[int]:
+    """Lower bound of an "N-M words" instruction in the prompt"""
+    match = _WORDS_PATTERN.search(prompt)
+    return int(match.group(1)) if match else None
+
+
+def expected_lines(prompt: str) -> Optional[int]:
+    """Row count of an "Output exactly N lines" instruction in the prompt"""
+    match = _LINES_PATTERN.search(prompt)
+    return int(match.group(1)) if match else None
+
+
+def is_too_short(prompt: str, text: str, tolerance: float = 0.6) -> bool:
+    """True when prose falls well short of the requested word count"""
+    minimum = expected_words(prompt)
+    return minimum is not None and len(text.split()) < minimum * tolerance
+
+
+def load_router() -> ModelRouter:
+    """Router with the ESG_LLM_ROUTING override applied (path to a JSON file or inline JSON)"""
+    spec = os.getenv("ESG_LLM_ROUTING", "").strip()
+    if not spec:
+        return ModelRouter()
+    try:
+        if spec.startswith("{"):
+            override = json.loads(spec)
+        else:
+            override = json.loads(Path(spec).read_text(encoding="utf-8"))
+        return ModelRouter.from_override(override)
+    except Exception as e:
+        print(f"Warning: Ignoring ESG_LLM_ROUTING override: {e}")
+        return ModelRouter()
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """Process-wide router (created on first use)"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = load_router()
+    return _router
+
+
+def set_router(router: Optional[ModelRouter]):
+    """Replace the process-wide router (None reloads from the environment on next use)"""
+    global _router
+    with _router_lock:
+        _router = router
@@ -4,11 +4,45 @@ Mode Manager - Handles three execution modes:
 - LLM-Test: Test single module with LLM
 - Production: Full LLM execution for all modules
 """
+import copy
 import os
+import threading
 from enum import Enum
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 import json
 
+# path -> ((mtime_ns, size), parsed JSON); files are re-read only when they change
+_json_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+_json_cache_lock = threading.Lock()
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_json_cached(path: str) -> Optional[Any]:
+    """
+    Parsed JSON file, cached until its mtime / size changes (None if missing)
+
+    The returned object is shared between callers: copy it before mutating.
+    """
+    signature = file_signature(path)
+    if signature is None:
+        return None
+    cached = _json_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    with _json_cache_lock:
+        _json_cache[path] = (signature, data)
+    return data
+
 
 class ExecutionMode(Enum):
     """Three execution modes"""
@@ -56,12 +90,9 @@ class ModeManager:
         return ExecutionMode.MOCK
     
     def _load_config(self) -> Dict[str, Any]:
-        """Load configuration from config file"""
+        """Load configuration from config file (parsed once, reloaded when the file changes)"""
         config_path = os.path.join('config', 'config.json')
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        return dict(load_json_cached(config_path) or {})
     
     def should_use_llm(self, module_name: Optional[str] = None) -> bool:
         """
@@ -98,6 +129,16 @@ class ModeManager:
             return custom_path
         return default_path
     
+    def load_mock_data(self, module_name: str) -> Optional[Dict[str, Any]]:
+        """Mock data for a module (cached by file mtime; None if no mock file exists)"""
+        data = load_json_cached(self.get_mock_data_path(module_name))
+        return copy.deepcopy(data) if data is not None else None
+    
+    def mock_data_signature(self, module_name: str) -> Tuple[str, Optional[Tuple[int, int]]]:
+        """Mock data file in use and its (mtime_ns, size); changes when the mock data changes"""
+        path = self.get_mock_data_path(module_name)
+        return path, file_signature(path)
+    
     def get_api_key(self) -> Optional[str]:
         """
         Get API key from multiple sources
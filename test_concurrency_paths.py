@@ -0,0 +1,286 @@
+"""
+Tests for the artifact download path, artifact store, session reaper,
+LLM hedging budget and circuit breaker
+"""
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from shared.engine import artifact_store, session_cleanup
+from shared.engine.artifact_store import ArtifactQuotaError, ArtifactStore, InvalidSessionIdError
+from shared.engine.session_cleanup import SessionReaper
+from shared.llm.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from shared.llm.hedging import HedgeCancelled, HedgePolicy
+
+
+class FakeAPIError(Exception):
+    """Stands in for anthropic.APIStatusError"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Process-wide artifact store and reaper rooted in a temp directory"""
+    store = ArtifactStore(root=tmp_path, memory_budget=20, session_quota=20)
+    monkeypatch.setattr(artifact_store, "_store", store)
+    monkeypatch.setattr(session_cleanup, "_reaper", SessionReaper(tmp_path))
+    return store
+
+
+@pytest.fixture
+def client(store):
+    store.put("s1", "usage.json", b"0123456789")
+    return TestClient(server.app)
+
+
+# ==================== Range / ETag ====================
+
+def test_parse_range():
+    assert server._parse_range("bytes=-3", 10) == (7, 9)
+    assert server._parse_range("bytes=-30", 10) == (0, 9)
+    assert server._parse_range("bytes=4-", 10) == (4, 9)
+    assert server._parse_range("bytes=2-5", 10) == (2, 5)
+    assert server._parse_range("bytes=2-50", 10) == (2, 9)
+    # Multiple ranges / other units are ignored (full body)
+    assert server._parse_range("bytes=0-1,4-5", 10) is None
+    assert server._parse_range("items=0-1", 10) is None
+    for header in ("bytes=10-", "bytes=5-2", "bytes=-", "bytes=-0"):
+        with pytest.raises(ValueError):
+            server._parse_range(header, 10)
+
+
+def test_download_ranges(client):
+    url = "/api/sessions/s1/artifacts/usage.json"
+    full = client.get(url)
+    assert full.status_code == 200
+    assert full.content == b"0123456789"
+    assert full.headers["accept-ranges"] == "bytes"
+
+    suffix = client.get(url, headers={"Range": "bytes=-3"})
+    assert suffix.status_code == 206
+    assert suffix.content == b"789"
+    assert suffix.headers["content-range"] == "bytes 7-9/10"
+
+    open_ended = client.get(url, headers={"Range": "bytes=4-"})
+    assert open_ended.status_code == 206
+    assert open_ended.content == b"456789"
+
+    unsatisfiable = client.get(url, headers={"Range": "bytes=20-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */10"
+
+
+def test_download_etag(client):
+    url = "/api/sessions/s1/artifacts/usage.json"
+    etag = client.get(url).headers["etag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+    # If-Range with the current ETag honours the range; a stale one gets the full body
+    fresh = client.get(url, headers={"Range": "bytes=0-1", "If-Range": etag})
+    assert fresh.status_code == 206
+    assert fresh.content == b"01"
+    stale = client.get(url, headers={"Range": "bytes=0-1", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == b"0123456789"
+
+
+def test_invalid_session_id(client, tmp_path):
+    assert client.get("/api/sessions/bad.id/artifacts").status_code == 400
+    assert client.delete("/api/sessions/%2E%2E").status_code == 400
+    assert tmp_path.exists()
+
+
+# ==================== ArtifactStore ====================
+
+def test_artifact_store_lru_spill(store, tmp_path):
+    store.put("s1", "a.json", b"aaaaaaaa")
+    store.put("s1", "b.json", b"bbbbbbbb")
+    with store.acquire("s1", "a.json") as handle:
+        assert handle.read_bytes() == b"aaaaaaaa"  # a becomes most recently used
+
+    store.put("s2", "c.json", b"cccccccc")  # over the 20-byte budget: b spills
+    assert store.stats["spills"] == 1
+    assert (tmp_path / "s1" / "b.json").read_bytes() == b"bbbbbbbb"
+    assert not (tmp_path / "s1" / "a.json").exists()
+    assert store.usage()["memory_used"] == 16
+
+    with store.acquire("s1", "b.json") as handle:
+        assert handle.read_bytes() == b"bbbbbbbb"
+    assert store.stats["hits_disk"] == 1
+
+    store.drop_session("s1")
+    assert not (tmp_path / "s1").exists()
+    assert store.acquire("s1", "b.json") is None
+
+
+def test_artifact_store_quota(store):
+    store.put("s1", "a.json", b"x" * 16)
+    with pytest.raises(ArtifactQuotaError):
+        store.put("s1", "b.json", b"x" * 8)
+    # Replacing an artifact only counts the new size; other sessions have their own quota
+    store.put("s1", "a.json", b"x" * 20)
+    store.put("s2", "a.json", b"x" * 8)
+    assert store.usage()["sessions"] == {"s1": 20, "s2": 8}
+
+    with pytest.raises(InvalidSessionIdError):
+        store.put("../s1", "a.json", b"x")
+
+
+def test_artifact_store_held_handle_outlives_drop(store, tmp_path):
+    store.put("s1", "a.json", b"a" * 12)
+    store.put("s1", "b.json", b"b" * 8)
+    store.put("s2", "c.json", b"c" * 8)  # spills a to disk
+    handle = store.acquire("s1", "a.json")
+    store.drop_session("s1")
+    assert handle.read_bytes() == b"a" * 12
+    handle.release()
+    assert not (tmp_path / "s1").exists()
+
+
+# ==================== SessionReaper ====================
+
+def test_reaper_touch_during_reap(tmp_path, monkeypatch):
+    """touch() must not wait for a slow deletion, and the fresh activity survives it"""
+    deleting, finish = threading.Event(), threading.Event()
+
+    def slow_delete(sessions_root, session_id):
+        deleting.set()
+        finish.wait(5)
+        return True
+
+    monkeypatch.setattr(session_cleanup, "_delete_session", slow_delete)
+    reaper = SessionReaper(tmp_path, max_age_hours=1)
+    reaper.touch("s1", now=time.time() - 7200)
+
+    worker = threading.Thread(target=reaper._reap, args=("s1", time.time() - 3600))
+    worker.start()
+    assert deleting.wait(5)
+
+    started = time.perf_counter()
+    reaper.touch("s1")
+    assert time.perf_counter() - started < 0.5
+    # A second reap of the same session is skipped while the first is in flight
+    assert reaper._reap("s1", time.time() + 1) is False
+
+    finish.set()
+    worker.join(5)
+    assert reaper.pending() == 1
+    assert reaper.stats["reaped"] == 1
+
+
+def test_reaper_rejects_unsafe_ids(tmp_path):
+    reaper = SessionReaper(tmp_path / "sessions")
+    with pytest.raises(InvalidSessionIdError):
+        reaper.touch("..")
+    assert session_cleanup._delete_session(tmp_path / "sessions", "..") is False
+    assert tmp_path.exists()
+
+
+# ==================== HedgePolicy ====================
+
+def test_hedge_duplicate_budget():
+    policy = HedgePolicy(percentile=0, max_duplicate_ratio=0.1, min_samples=1, min_delay_s=0.01, max_workers=4)
+    policy.observe("p", 0.001)
+
+    def slow(attempt):
+        if attempt.cancelled.wait(0.05):
+            raise HedgeCancelled()
+        return "ok"
+
+    try:
+        results = [policy.call("p", slow) for _ in range(20)]
+    finally:
+        policy._pool.shutdown(wait=True)
+    metrics = policy.metrics()
+    assert results == ["ok"] * 20
+    assert metrics["calls"] == 20
+    assert metrics["hedged"] == 2
+    assert metrics["budget_denied"] == 18
+    assert metrics["duplicate_ratio"] <= 0.1
+
+
+def test_hedge_not_before_min_samples():
+    policy = HedgePolicy(min_samples=3)
+    policy.observe("p", 0.1)
+    assert policy.hedge_delay("p") is None
+    policy._pool.shutdown(wait=False)
+
+
+# ==================== CircuitBreaker ====================
+
+def test_breaker_ignores_rate_limits():
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    for _ in range(10):
+        breaker.record_failure(FakeAPIError(429))
+        breaker.record_failure(FakeAPIError(404))
+        breaker.record_failure(ValueError("bad prompt"))
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_breaker_opens_on_server_errors_and_auth():
+    breaker = CircuitBreaker("test", failure_threshold=2, probe_interval_s=60)
+    breaker.record_failure(FakeAPIError(529))
+    assert breaker.state == CLOSED
+    breaker.record_failure(TimeoutError())
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.metrics()["short_circuited"] == 1
+
+    auth = CircuitBreaker("auth", failure_threshold=5, probe_interval_s=60)
+    auth.record_failure(FakeAPIError(401))
+    assert auth.state == OPEN
+
+
+def test_breaker_half_open_trial():
+    breaker = CircuitBreaker("test", failure_threshold=1, latency_threshold_s=None, probe_interval_s=0.02)
+    breaker.record_failure(FakeAPIError(500))
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # Failed trial: re-open with a doubled interval
+    time.sleep(0.03)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # one trial at a time
+    breaker.record_failure(FakeAPIError(503))
+    assert breaker.state == OPEN
+    time.sleep(0.03)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # Successful trial closes the circuit
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.metrics()["trials"] == 2
+
+
+def test_breaker_probe_closes():
+    calls = []
+
+    def probe():
+        calls.append(time.monotonic())
+        if len(calls) < 2:
+            raise ConnectionError("still down")
+
+    breaker = CircuitBreaker("test", failure_threshold=1, probe_interval_s=0.01, probe=probe)
+    breaker.record_failure(FakeAPIError(502))
+    assert breaker.state == OPEN
+    deadline = time.monotonic() + 5
+    while breaker.state != CLOSED and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert breaker.state == CLOSED
+    assert len(calls) == 2
+    breaker.before_call()